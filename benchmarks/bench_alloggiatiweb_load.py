@@ -0,0 +1,124 @@
+"""
+Load test: AlloggiatiWebApi throughput against the local AlloggiatiWeb stub.
+
+For each concurrency level, N threads share one AlloggiatiWebApi (and its pooled
+SoapTransport and token) and call an endpoint in a loop for a fixed time against
+registration.tests.stub_server.AlloggiatiWebStub, with the given simulated
+latency, error rates and payload sizes. Reports requests per second, p50/p99
+latency and failed calls (esito false or an exception).
+
+Usage: python -m benchmarks.bench_alloggiatiweb_load [--concurrency 1,4,16,64] [--seconds N]
+           [--operation authentication_test|test|send|gestione_appartamenti_test|tabella|ricevuta|mix]
+           [--latency S] [--jitter S] [--error-rate F] [--http-error-rate F] [--records N]
+           [--table-rows N] [--receipt-size BYTES] [--output results.json]
+"""
+from benchmarks.bench_async_concurrency import percentile
+from registration.models.guest import Guest, GuestGender, GuestType
+from registration.services.alloggiatiweb_api import AlloggiatiWebApi
+from registration.services.alloggiatiweb_tables import TableCache
+from registration.services.alloggiatiweb_tokens import TokenManager
+from registration.tests.stub_server import AlloggiatiWebStub
+from registration.utils.soap_utils import SoapTransport
+from datetime import datetime
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+
+OPERATIONS = ('authentication_test', 'test', 'send', 'gestione_appartamenti_test', 'tabella', 'ricevuta')
+
+
+def make_calls(api: AlloggiatiWebApi, records: int) -> dict:
+    guests = [Guest(GuestType.GROUP_MEMBER, datetime(2024, 5, 3), 3, "Rossi", f"Ospite {n}", GuestGender.FEMALE,
+                    "01/01/1980", "412058091", "RM", "100000100", "100000100", "", "", "") for n in range(records)]
+    return {
+        'authentication_test': api.authentication_test,
+        'test': lambda: api.test_schedine(guests),
+        'send': lambda: api.send_schedine(guests),
+        'gestione_appartamenti_test': lambda: api.gestione_appartamenti_test(1, guests),
+        'tabella': lambda: api.tabella(AlloggiatiWebApi.TableType.LOCATIONS),
+        'ricevuta': lambda: api.ricevuta(datetime.now()),
+    }
+
+
+def run(stub: AlloggiatiWebStub, concurrency: int, seconds: float, operation: str, records: int) -> dict:
+    transport = SoapTransport(pool_maxsize=concurrency, backoff_factor=0.05)
+    api = AlloggiatiWebApi("user", "password", "ws_key", table_cache=TableCache(), token_manager=TokenManager(),
+                           transport=transport)
+    api._url = stub.url
+    calls = make_calls(api, records)
+    latencies, failures = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(seed):
+        rng = random.Random(seed)
+        local, local_failures = [], 0
+        while time.perf_counter() < deadline:
+            call = calls[rng.choice(OPERATIONS) if operation == 'mix' else operation]
+            start = time.perf_counter()
+            try:
+                success = call().success
+            except RuntimeError:
+                success = False
+            if success:
+                local.append(time.perf_counter() - start)
+            else:
+                local_failures += 1
+        with lock:
+            latencies.extend(local)
+            failures[0] += local_failures
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    transport.close()
+    return {
+        'concurrency': concurrency, 'operation': operation, 'requests': len(latencies), 'failures': failures[0],
+        'rps': len(latencies) / elapsed, 'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--operation", default="authentication_test", choices=OPERATIONS + ('mix',))
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated service time, seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="random extra service time, seconds")
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--http-error-rate", type=float, default=0)
+    parser.add_argument("--records", type=int, default=10, help="schedine per Test/Send request")
+    parser.add_argument("--table-rows", type=int, default=8000)
+    parser.add_argument("--receipt-size", type=int, default=100000)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+    # The retries of the simulated HTTP errors are counted, not logged
+    logging.root.setLevel(logging.ERROR)
+
+    results = []
+    with AlloggiatiWebStub(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                           http_error_rate=args.http_error_rate, table_rows=args.table_rows,
+                           receipt_size=args.receipt_size, seed=0) as stub:
+        print(f"{args.operation}: {args.latency * 1000:g} ms + up to {args.jitter * 1000:g} ms service time, "
+              f"{args.seconds:g} s per run")
+        for concurrency in (int(x) for x in args.concurrency.split(",")):
+            result = run(stub, concurrency, args.seconds, args.operation, args.records)
+            results.append(result)
+            print(f"  {concurrency:4} clients  rps: {result['rps']:8.1f}   p50: {result['p50_ms']:7.2f} ms   "
+                  f"p99: {result['p99_ms']:7.2f} ms   failures: {result['failures']}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({'parameters': vars(args), 'results': results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark: concurrent availability checks, asyncio vs threads.
+
+Runs N concurrent clients calling find_available_dates (and a share of create)
+against a file-backed SQLite database in WAL mode: as N asyncio tasks on
+AsyncReservationService (aiosqlite), and as N threads on ReservationService.
+Reports operations per second and p50/p99 latency for each concurrency level.
+Requires aiosqlite.
+
+Usage: python -m benchmarks.bench_async_concurrency [--clients 1,10,50,100] [--seconds N] [--write-ratio F]
+"""
+from core.services.async_database_service import AsyncDatabaseService
+from core.services.database_service import DatabaseService
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.async_reservation_service import AsyncReservationService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reservation_service import ReservationService
+from sqlalchemy.exc import OperationalError
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+
+SQLITE_OPTIONS = {'sqlite_wal': True, 'sqlite_synchronous': "NORMAL", 'sqlite_busy_timeout': 5000}
+
+
+def make_database(path: str) -> list:
+    db_service = DatabaseService(f"sqlite:///{path}", **SQLITE_OPTIONS)
+    guesthouse_id = GuestHouseService(db_service).create("Benchmark")
+    apartment_service = ApartmentService(db_service)
+    apartment_ids = [apartment_service.create(guesthouse_id, f"Apartment {n}") for n in range(10)]
+    rng = random.Random(0)
+    ReservationService(db_service).create_many([{
+        'apartment_id': rng.choice(apartment_ids),
+        'check_in_date': day,
+        'check_out_date': day + timedelta(days=rng.randint(1, 7)),
+        'num_guests': 2, 'contact_name': "Guest", 'contact_number': "000",
+        'contact_email': "guest@example.com", 'booking_mode': "direct"
+    } for day in (datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 3650)) for _ in range(5000))])
+    db_service.engine.dispose()
+    return apartment_ids
+
+
+def operation(rng: random.Random, apartment_ids: list, write_ratio: float) -> tuple:
+    apartment_id = rng.choice(apartment_ids)
+    start_date = datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 3650))
+    if rng.random() < write_ratio:
+        return 'create', (apartment_id, start_date, start_date + timedelta(days=rng.randint(1, 7)),
+                          2, "Guest", "000", "guest@example.com", "direct")
+    return 'find_available_dates', (apartment_id, start_date, start_date + timedelta(days=90))
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+
+async def run_async(path: str, apartment_ids: list, clients: int, seconds: float, write_ratio: float) -> tuple:
+    db_service = AsyncDatabaseService(f"sqlite+aiosqlite:///{path}", pool_size=clients, **SQLITE_OPTIONS)
+    service = AsyncReservationService(db_service)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def client(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            name, args = operation(rng, apartment_ids, write_ratio)
+            start = time.perf_counter()
+            try:
+                await getattr(service, name)(*args)
+                latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                errors += 1
+
+    await asyncio.gather(*[client(n) for n in range(clients)])
+    await db_service.dispose()
+    return latencies, errors
+
+
+def run_threads(path: str, apartment_ids: list, clients: int, seconds: float, write_ratio: float) -> tuple:
+    db_service = DatabaseService(f"sqlite:///{path}", pool_size=clients, create_schema=False, **SQLITE_OPTIONS)
+    service = ReservationService(db_service)
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(seed):
+        rng = random.Random(seed)
+        local = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            name, args = operation(rng, apartment_ids, write_ratio)
+            start = time.perf_counter()
+            try:
+                getattr(service, name)(*args)
+                local.append(time.perf_counter() - start)
+            except OperationalError:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db_service.engine.dispose()
+    return latencies, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="1,10,50,100")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        apartment_ids = make_database(path)
+        print(f"{args.seconds:g} s per run, {args.write_ratio:.0%} writes")
+        for clients in (int(x) for x in args.clients.split(",")):
+            for name, (latencies, errors) in (
+                    ("asyncio", asyncio.run(run_async(path, apartment_ids, clients, args.seconds, args.write_ratio))),
+                    ("threads", run_threads(path, apartment_ids, clients, args.seconds, args.write_ratio))):
+                print(f"  {clients:4} clients  {name:8} ops/s: {len(latencies) / args.seconds:8.1f}   "
+                      f"p50: {percentile(latencies, 0.5) * 1000:7.2f} ms   "
+                      f"p99: {percentile(latencies, 0.99) * 1000:7.2f} ms   errors: {errors}")
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: availability of every apartment of a guest house.
+
+Compares AvailabilityCalculator (one query, interval index) with calling
+ReservationService.find_available_dates once per apartment.
+
+Usage: python -m benchmarks.bench_availability [--apartments N] [--reservations N] [--repeat N]
+"""
+from core.services.database_service import DatabaseService
+from reservation.models import Apartment, GuestHouse, Reservation
+from reservation.services.reservation_service import ReservationService
+from reservation.utils.availability_calculator import AvailabilityCalculator
+from datetime import datetime, timedelta
+import argparse
+import random
+import time
+
+
+def seed(db_service, num_apartments, reservations_per_apartment):
+    session = db_service.get_session()
+    guesthouse = GuestHouse(name="Benchmark")
+    session.add(guesthouse)
+    apartment_ids = []
+    rng = random.Random(42)
+    for n in range(num_apartments):
+        apartment = Apartment(name=f"Apartment {n}")
+        apartment.guesthouse_id = guesthouse.id
+        session.add(apartment)
+        apartment_ids.append(apartment.id)
+        check_in = datetime(2020, 1, 1)
+        for _ in range(reservations_per_apartment):
+            check_in += timedelta(days=rng.randint(0, 5))
+            check_out = check_in + timedelta(days=rng.randint(1, 10))
+            reservation = Reservation(check_in, check_out, 2, "Guest", "000", "guest@example.com", "direct")
+            reservation.apartment_id = apartment.id
+            session.add(reservation)
+            check_in = check_out
+    session.commit()
+    guesthouse_id = guesthouse.id
+    session.close()
+    return guesthouse_id, apartment_ids
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apartments", type=int, default=10)
+    parser.add_argument("--reservations", type=int, default=2000, help="reservations per apartment")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", default="sqlite://", help="SQLAlchemy connection string")
+    args = parser.parse_args()
+
+    db_service = DatabaseService(args.db)
+    guesthouse_id, apartment_ids = seed(db_service, args.apartments, args.reservations)
+    reservation_service = ReservationService(db_service)
+    calculator = AvailabilityCalculator(db_service)
+
+    print(f"{args.apartments} apartments x {args.reservations} reservations")
+    for label, days in (("1 month", 30), ("1 year", 365), ("5 years", 5 * 365)):
+        start_date = datetime(2021, 1, 1)
+        end_date = start_date + timedelta(days=days)
+        loop_time, expected = timed(lambda: {
+            apartment_id: reservation_service.find_available_dates(apartment_id, start_date, end_date)
+            for apartment_id in apartment_ids}, args.repeat)
+        batch_time, result = timed(
+            lambda: calculator.find_available_dates(guesthouse_id, start_date, end_date), args.repeat)
+        assert result == expected
+        print(f"  {label:8} loop: {loop_time * 1000:8.2f} ms   "
+              f"calculator: {batch_time * 1000:8.2f} ms   speedup: {loop_time / batch_time:5.2f}x")
+
+        check_in = start_date + timedelta(days=days // 2)
+        apartments_time, _ = timed(
+            lambda: calculator.find_available_apartments(guesthouse_id, check_in, check_in + timedelta(days=3)),
+            args.repeat)
+        print(f"  {'':8} available apartments for one stay: {apartments_time * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
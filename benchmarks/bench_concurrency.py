@@ -0,0 +1,97 @@
+"""
+Benchmark: reservation service throughput with concurrent readers and writers.
+
+Runs reader threads (find_available_dates) and writer threads (create) against
+a file-backed SQLite database for each DatabaseService configuration and reports
+operations per second and lock errors.
+
+Usage: python -m benchmarks.bench_concurrency [--readers N] [--writers N] [--seconds N]
+"""
+from core.services.database_service import DatabaseService
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reservation_service import ReservationService
+from sqlalchemy.exc import OperationalError
+from datetime import datetime, timedelta
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+CONFIGURATIONS = {
+    "default": {},
+    "wal": {'sqlite_wal': True, 'sqlite_busy_timeout': 5000},
+    "wal+normal": {'sqlite_wal': True, 'sqlite_synchronous': "NORMAL", 'sqlite_busy_timeout': 5000},
+    "wal+normal+scoped": {'sqlite_wal': True, 'sqlite_synchronous': "NORMAL", 'sqlite_busy_timeout': 5000,
+                          'scoped': True},
+}
+
+
+def worker(db_service, apartment_ids, write, deadline, seed, counters, lock):
+    reservation_service = ReservationService(db_service)
+    rng = random.Random(seed)
+    ops = errors = 0
+    while time.perf_counter() < deadline:
+        apartment_id = rng.choice(apartment_ids)
+        start_date = datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 3650))
+        try:
+            if write:
+                reservation_service.create(apartment_id, start_date, start_date + timedelta(days=rng.randint(1, 7)),
+                                           2, "Guest", "000", "guest@example.com", "direct")
+            else:
+                reservation_service.find_available_dates(apartment_id, start_date, start_date + timedelta(days=90))
+            ops += 1
+        except OperationalError:
+            errors += 1
+    db_service.remove_session()
+    with lock:
+        key = "writes" if write else "reads"
+        counters[key] += ops
+        counters["errors"] += errors
+
+
+def run(options, readers, writers, seconds):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        db_service = DatabaseService(f"sqlite:///{path}", pool_size=readers + writers, **options)
+        guesthouse_id = GuestHouseService(db_service).create("Benchmark")
+        apartment_service = ApartmentService(db_service)
+        apartment_ids = [apartment_service.create(guesthouse_id, f"Apartment {n}") for n in range(10)]
+
+        counters = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=worker, args=(db_service, apartment_ids, n < writers, deadline, n,
+                                                         counters, lock))
+                   for n in range(readers + writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        db_service.engine.dispose()
+        return counters
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g} s per configuration")
+    for name, options in CONFIGURATIONS.items():
+        counters = run(options, args.readers, args.writers, args.seconds)
+        print(f"  {name:18} reads/s: {counters['reads'] / args.seconds:8.1f}   "
+              f"writes/s: {counters['writes'] / args.seconds:8.1f}   lock errors: {counters['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark: reservation conflict check with and without composite indexes.
+
+Seeds a large reservation history and measures the overlap count() run by
+ReservationService.create and update, first on the reservations table without any
+index, as created by the models before the composite indexes, and then after
+DatabaseService.upgrade_schema (create_missing_indexes) has added them, printing
+the SQLite query plan for each.
+
+Usage: python -m benchmarks.bench_conflict_check [--reservations N] [--apartments N] [--checks N]
+"""
+from core.services.database_service import DatabaseService
+from reservation.models import Apartment, GuestHouse, Reservation
+from sqlalchemy import insert, text
+from datetime import datetime, timedelta
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+
+def seed(db_service, num_apartments, num_reservations, chunk_size=50000):
+    session = db_service.get_session()
+    guesthouse = GuestHouse(name="Benchmark")
+    session.add(guesthouse)
+    apartments = []
+    for n in range(num_apartments):
+        apartment = Apartment(name=f"Apartment {n}")
+        apartment.guesthouse_id = guesthouse.id
+        apartments.append(apartment)
+    session.add_all(apartments)
+    session.commit()
+    apartment_ids = [apartment.id for apartment in apartments]
+
+    rng = random.Random(42)
+    next_check_in = {apartment_id: datetime(2000, 1, 1) for apartment_id in apartment_ids}
+    rows = []
+    for n in range(num_reservations):
+        apartment_id = apartment_ids[n % num_apartments]
+        check_in = next_check_in[apartment_id] + timedelta(days=rng.randint(0, 3))
+        check_out = check_in + timedelta(days=rng.randint(1, 7))
+        next_check_in[apartment_id] = check_out
+        rows.append({
+            'id': str(uuid.uuid4()), 'apartment_id': apartment_id,
+            'check_in_date': check_in, 'check_out_date': check_out, 'num_guests': 2,
+            'contact_name': "Guest", 'contact_number': "000", 'contact_email': "guest@example.com",
+            'booking_mode': "direct", 'notes': ""
+        })
+        if len(rows) == chunk_size:
+            session.execute(insert(Reservation), rows)
+            rows = []
+    if rows:
+        session.execute(insert(Reservation), rows)
+    session.commit()
+    session.close()
+    return apartment_ids, next_check_in
+
+
+def conflict_count(session, apartment_id, check_in_date, check_out_date):
+    # Same predicate as ReservationService.create
+    return session.query(Reservation).filter(
+        Reservation.apartment_id == apartment_id,
+        Reservation.check_out_date > check_in_date,
+        Reservation.check_in_date < check_out_date
+    ).count()
+
+
+def measure(db_service, stays):
+    session = db_service.get_session()
+    latencies = []
+    try:
+        for apartment_id, check_in_date, check_out_date in stays:
+            start = time.perf_counter()
+            conflict_count(session, apartment_id, check_in_date, check_out_date)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        session.close()
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def query_plan(db_service, apartment_id, check_in_date, check_out_date):
+    if db_service.engine.dialect.name != 'sqlite':
+        return []
+    session = db_service.get_session()
+    try:
+        query = session.query(Reservation).filter(
+            Reservation.apartment_id == apartment_id,
+            Reservation.check_out_date > check_in_date,
+            Reservation.check_in_date < check_out_date)
+        compiled = query.statement.compile(db_service.engine, compile_kwargs={"literal_binds": True})
+        return [row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+    finally:
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reservations", type=int, default=1000000)
+    parser.add_argument("--apartments", type=int, default=10)
+    parser.add_argument("--checks", type=int, default=200, help="conflict checks per scenario")
+    parser.add_argument("--db", default="sqlite://", help="SQLAlchemy connection string")
+    args = parser.parse_args()
+
+    db_service = DatabaseService(args.db)
+    start = time.perf_counter()
+    apartment_ids, last_check_out = seed(db_service, args.apartments, args.reservations)
+    print(f"Seeded {args.reservations} reservations in {time.perf_counter() - start:.1f} s")
+
+    rng = random.Random(7)
+    new_bookings = []
+    history = []
+    for _ in range(args.checks):
+        apartment_id = rng.choice(apartment_ids)
+        check_in = last_check_out[apartment_id] + timedelta(days=rng.randint(0, 60))
+        new_bookings.append((apartment_id, check_in, check_in + timedelta(days=3)))
+        history_days = (last_check_out[apartment_id] - datetime(2000, 1, 1)).days
+        check_in = datetime(2000, 1, 1) + timedelta(days=rng.randint(0, history_days))
+        history.append((apartment_id, check_in, check_in + timedelta(days=3)))
+
+    # Back to a database created before the indexes were declared
+    with db_service.engine.begin() as connection:
+        for index in Reservation.__table__.indexes:
+            connection.execute(text(f"DROP INDEX {index.name}"))
+
+    for label in ("without indexes", "with indexes"):
+        if label == "with indexes":
+            start = time.perf_counter()
+            created = db_service.upgrade_schema()
+            print(f"\nCreated {created} in {time.perf_counter() - start:.1f} s")
+        print(f"\n{label}")
+        for step in query_plan(db_service, *new_bookings[0]):
+            print(f"  plan: {step}")
+        for scenario, stays in (("new booking", new_bookings), ("past dates", history)):
+            p50, p99 = measure(db_service, stays)
+            print(f"  {scenario:12} p50: {p50 * 1000:8.3f} ms   p99: {p99 * 1000:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: exporting the whole reservation history.
+
+Compares loading every Reservation and writing json.dumps of their to_dict()
+with ExportService streaming to CSV, JSONL and Parquet (if pyarrow is installed).
+Reports time, rows per second, file size and peak Python memory (tracemalloc).
+
+Usage: python -m benchmarks.bench_export [--reservations N] [--batch-size N]
+"""
+from benchmarks.bench_pagination import peak_memory
+from benchmarks.datagen import generate, load
+from core.services.database_service import DatabaseService
+from reservation.models import Reservation
+from reservation.services.export_service import ExportService
+import argparse
+import importlib.util
+import json
+import os
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reservations", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_service = DatabaseService(f"sqlite:///{os.path.join(directory, 'benchmark.db')}")
+        load(db_service, *generate(args.reservations))
+        export_service = ExportService(db_service)
+
+        def to_dict_json(path):
+            session = db_service.get_session()
+            try:
+                reservations = [reservation.to_dict() for reservation in session.query(Reservation).all()]
+            finally:
+                session.close()
+            with open(path, "w") as file:
+                json.dump(reservations, file)
+
+        runs = [("to_dict + json.dump", "json", to_dict_json)]
+        for format in ExportService.FORMATS:
+            if format != 'parquet' or importlib.util.find_spec('pyarrow'):
+                runs.append((f"ExportService {format}", format,
+                             lambda path, format=format: export_service.export(path, format,
+                                                                               batch_size=args.batch_size)))
+
+        print(f"{args.reservations} reservations, batches of {args.batch_size}")
+        for label, extension, func in runs:
+            path = os.path.join(directory, f"export.{extension}")
+            start = time.perf_counter()
+            func(path)
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(path)
+            memory = peak_memory(lambda: func(path))
+            print(f"  {label:22} {elapsed:7.2f} s   {args.reservations / elapsed:9.0f} rows/s   "
+                  f"file: {size / 2 ** 20:7.1f} MiB   peak memory: {memory / 2 ** 20:7.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
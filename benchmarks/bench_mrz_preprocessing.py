@@ -0,0 +1,94 @@
+"""
+Benchmark: per-stage latency of the MRZ preprocessing, and speedup over
+passporteye's read_mrz on the whole image.
+
+The passport images in registration/tests/resources are upscaled by --scale
+(x6 is about the size of a 12 MP phone photo) and saved as JPEG. With --no-ocr,
+only the MRZ location is timed (passporteye's box detection, before Tesseract),
+so the benchmark runs where Tesseract is not installed.
+
+Usage: python -m benchmarks.bench_mrz_preprocessing [--scale N] [--repeat N] [--no-ocr]
+"""
+from passporteye.mrz.image import MRZPipeline
+from PIL import Image
+from registration.utils.mrz_preprocessing import MrzPreprocessor
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "registration", "tests", "resources")
+
+
+def make_images(tmp_dir: str, scale: int) -> list:
+    images = []
+    for path in sorted(glob.glob(os.path.join(RESOURCES_DIR, "*.jpg"))):
+        image = Image.open(path)
+        image = image.resize((image.width * scale, image.height * scale), Image.BICUBIC)
+        scaled_path = os.path.join(tmp_dir, os.path.basename(path))
+        image.save(scaled_path, quality=90)
+        images.append((scaled_path, image.size))
+    return images
+
+
+def baseline(image_path: str, ocr: bool) -> float:
+    start = time.perf_counter()
+    pipeline = MRZPipeline(image_path)
+    pipeline['boxes']
+    if ocr:
+        pipeline.result
+    return time.perf_counter() - start
+
+
+def preprocessed(preprocessor: MrzPreprocessor, image_path: str, ocr: bool) -> tuple:
+    timings = {}
+    start = time.perf_counter()
+    if ocr:
+        preprocessor.read_mrz(image_path, timings=timings)
+    else:
+        image = preprocessor.decode(image_path)
+        timings['decode'] = time.perf_counter() - start
+        stage_start = time.perf_counter()
+        image = preprocessor.to_grayscale(image)
+        timings['grayscale'] = time.perf_counter() - stage_start
+        stage_start = time.perf_counter()
+        gray = preprocessor.downscale(image)
+        timings['downscale'] = time.perf_counter() - stage_start
+        stage_start = time.perf_counter()
+        top, bottom = preprocessor.find_band(gray)
+        timings['detect'] = time.perf_counter() - stage_start
+        stage_start = time.perf_counter()
+        pipeline = MRZPipeline(None)
+        pipeline.replace_component('loader', lambda: gray[top:bottom], provides=['img'])
+        pipeline['boxes']
+        timings['locate_band'] = time.perf_counter() - stage_start
+    return time.perf_counter() - start, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-ocr", action="store_true")
+    args = parser.parse_args()
+    ocr = not args.no_ocr
+
+    preprocessor = MrzPreprocessor()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        images = make_images(tmp_dir, args.scale)
+        for image_path, (width, height) in images:
+            baseline_time = min(baseline(image_path, ocr) for _ in range(args.repeat))
+            runs = [preprocessed(preprocessor, image_path, ocr) for _ in range(args.repeat)]
+            total, timings = min(runs, key=lambda x: x[0])
+
+            print(f"{os.path.basename(image_path)} {width}x{height} ({width * height / 1e6:.1f} MP)"
+                  f"{'' if ocr else ', MRZ location only'}")
+            print(f"  read_mrz, whole image: {baseline_time * 1000:9.1f} ms")
+            for stage, seconds in timings.items():
+                print(f"    {stage:<12} {seconds * 1000:9.1f} ms")
+            print(f"  preprocessed:          {total * 1000:9.1f} ms   speedup: {baseline_time / total:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: MRZ reading throughput, one image at a time vs the process pool.
+
+Reads the passport images in registration/tests/resources (repeated --copies
+times, to simulate a group check-in) with MrzReader.read_mrz_from_image in a
+loop and with MrzReader.read_mrz_from_images. This requires Tesseract. With
+--no-ocr, only the MRZ location (passporteye's box detection, before Tesseract)
+is timed, in a loop and in a process pool of the same size, so the benchmark
+runs where Tesseract is not installed.
+
+Usage: python -m benchmarks.bench_mrz_reader [--copies N] [--workers N] [--no-ocr]
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from passporteye.mrz.image import MRZPipeline
+from registration.services.mrz_reader import MrzReader
+import argparse
+import glob
+import os
+import time
+
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "registration", "tests", "resources")
+
+
+def locate_mrz(image_path: str) -> int:
+    return len(MRZPipeline(image_path)['boxes'])
+
+
+def read_loop(images: list, ocr: bool) -> list:
+    if ocr:
+        return [MrzReader.read_mrz_from_image(image) for image in images]
+    return [locate_mrz(image) for image in images]
+
+
+def read_pool(images: list, workers: int, ocr: bool):
+    """Yield (result, error) as the images are read."""
+    if ocr:
+        for result in MrzReader.read_mrz_from_images(images, max_workers=workers):
+            yield result.mrz, result.error
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for future in as_completed([executor.submit(locate_mrz, image) for image in images]):
+            yield future.result(), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=None, help="default: number of CPUs")
+    parser.add_argument("--no-ocr", action="store_true")
+    args = parser.parse_args()
+    ocr = not args.no_ocr
+
+    images = sorted(glob.glob(os.path.join(RESOURCES_DIR, "*.jpg"))) * args.copies
+    workers = args.workers or os.cpu_count()
+
+    start = time.perf_counter()
+    sequential = read_loop(images, ocr)
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first = None
+    results = []
+    for result in read_pool(images, workers, ocr):
+        if first is None:
+            first = time.perf_counter() - start
+        results.append(result)
+    batch_time = time.perf_counter() - start
+
+    errors = [error for _, error in results if error is not None]
+    if errors:
+        raise SystemExit(f"{len(errors)} images failed, e.g.: {errors[0]}")
+    assert sum(bool(x) for x in sequential) == sum(bool(x) for x, _ in results)
+
+    print(f"{len(images)} images, {workers} processes, {os.cpu_count()} CPUs{'' if ocr else ', MRZ location only'}")
+    print(f"  one at a time: {sequential_time:7.2f} s   {len(images) / sequential_time:6.2f} images/s")
+    print(f"  process pool:  {batch_time:7.2f} s   {len(images) / batch_time:6.2f} images/s   "
+          f"speedup: {sequential_time / batch_time:.2f}x   first result after {first:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: 12-month occupancy calendar of every apartment.
+
+Compares rebuilding the occupied nights per month in Python from
+ReservationService.get_all_by_apartment with OccupancyCalendar, and times the
+construction of the calendar and its range and free-run queries.
+
+Usage: python -m benchmarks.bench_occupancy_calendar [--apartments N] [--reservations N] [--repeat N]
+"""
+from benchmarks.bench_availability import seed, timed
+from core.services.database_service import DatabaseService
+from reservation.services.reservation_service import ReservationService
+from reservation.utils.occupancy_calendar import OccupancyCalendar
+from datetime import datetime, timedelta
+import argparse
+
+
+def months_by_loop(reservation_service, apartment_ids, start_date, end_date):
+    calendars = {}
+    for apartment_id in apartment_ids:
+        months = {}
+        day = start_date
+        while day < end_date:
+            months[(day.year, day.month)] = 0
+            day += timedelta(days=1)
+        for reservation in reservation_service.get_all_by_apartment(apartment_id):
+            day = max(reservation.check_in_date, start_date)
+            while day < min(reservation.check_out_date, end_date):
+                months[(day.year, day.month)] += 1
+                day += timedelta(days=1)
+        calendars[apartment_id] = months
+    return calendars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apartments", type=int, default=10)
+    parser.add_argument("--reservations", type=int, default=2000, help="reservations per apartment")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", default="sqlite://", help="SQLAlchemy connection string")
+    args = parser.parse_args()
+
+    db_service = DatabaseService(args.db)
+    _, apartment_ids = seed(db_service, args.apartments, args.reservations)
+    reservation_service = ReservationService(db_service)
+    start_date, end_date = datetime(2021, 1, 1), datetime(2022, 1, 1)
+
+    print(f"{args.apartments} apartments x {args.reservations} reservations")
+    loop_time, expected = timed(
+        lambda: months_by_loop(reservation_service, apartment_ids, start_date, end_date), args.repeat)
+    build_time, calendar = timed(
+        lambda: OccupancyCalendar.from_database(db_service, datetime(2020, 1, 1), datetime(2030, 1, 1)), args.repeat)
+    window = OccupancyCalendar.from_database(db_service, start_date, end_date)
+    calendar_time, result = timed(window.occupied_days_per_month, args.repeat)
+    assert result == expected
+    print(f"  12-month calendar  loop: {loop_time * 1000:8.2f} ms   "
+          f"calendar: {calendar_time * 1000:8.2f} ms   speedup: {loop_time / calendar_time:7.1f}x")
+    print(f"  build (10 years): {build_time * 1000:8.2f} ms")
+
+    check_in = datetime(2021, 6, 1)
+    free_time, _ = timed(lambda: [calendar.is_free(apartment_id, check_in, check_in + timedelta(days=3))
+                                  for apartment_id in apartment_ids], args.repeat)
+    runs_time, _ = timed(lambda: [calendar.free_runs(apartment_id, 7) for apartment_id in apartment_ids],
+                         args.repeat)
+    print(f"  is_free, every apartment: {free_time * 1e6:8.1f} us   "
+          f"free runs >= 7 nights over 10 years: {runs_time * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: reading one month of a long reservation history.
+
+Compares get_all_by_apartment (every reservation loaded) with a date-window page
+of get_page_by_apartment, deep keyset pages, and a full scan through
+iter_by_apartment, reporting time and peak Python memory (tracemalloc).
+
+Usage: python -m benchmarks.bench_pagination [--reservations N] [--repeat N]
+"""
+from benchmarks.bench_availability import seed, timed
+from core.services.database_service import DatabaseService
+from reservation.services.reservation_service import ReservationService
+from datetime import timedelta
+import argparse
+import tracemalloc
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reservations", type=int, default=20000, help="reservations of the apartment")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", default="sqlite://", help="SQLAlchemy connection string")
+    args = parser.parse_args()
+
+    db_service = DatabaseService(args.db)
+    _, (apartment_id,) = seed(db_service, 1, args.reservations)
+    service = ReservationService(db_service)
+    last = max(r.check_in_date for r in service.iter_by_apartment(apartment_id))
+    month = (last - timedelta(days=30), last)
+
+    def next_month_from_all():
+        return [r for r in service.get_all_by_apartment(apartment_id)
+                if r.check_out_date > month[0] and r.check_in_date < month[1]]
+
+    def next_month_page():
+        return service.get_page_by_apartment(apartment_id, limit=100, start_date=month[0], end_date=month[1]).items
+
+    def scan():
+        return sum(1 for _ in service.iter_by_apartment(apartment_id, batch_size=1000))
+
+    print(f"1 apartment x {args.reservations} reservations, up to {last:%Y-%m-%d}")
+    for label, func in (("one month, get_all_by_apartment", next_month_from_all),
+                        ("one month, get_page_by_apartment", next_month_page),
+                        ("full scan, get_all_by_apartment", lambda: len(service.get_all_by_apartment(apartment_id))),
+                        ("full scan, iter_by_apartment", scan)):
+        elapsed, _ = timed(func, args.repeat)
+        print(f"  {label:34} {elapsed * 1000:8.2f} ms   peak memory: {peak_memory(func) / 1024:9.0f} KiB")
+
+    # Cost of a page far into the history: keyset skips the earlier rows through the index
+    page = service.get_page_by_apartment(apartment_id, limit=50)
+    first_time, _ = timed(lambda: service.get_page_by_apartment(apartment_id, limit=50), args.repeat)
+    cursor = None
+    for _ in range(args.reservations // 50 - 2):
+        cursor = service.get_page_by_apartment(apartment_id, limit=50, after=cursor).next_cursor
+    deep_time, _ = timed(lambda: service.get_page_by_apartment(apartment_id, limit=50, after=cursor), args.repeat)
+    print(f"  page of 50: first {first_time * 1000:.2f} ms, page {args.reservations // 50 - 1}: "
+          f"{deep_time * 1000:.2f} ms ({len(page.items)} rows each)")
+
+
+if __name__ == '__main__':
+    main()
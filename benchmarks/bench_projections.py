@@ -0,0 +1,61 @@
+"""
+Benchmark: snapshot projections and the guest house tree against the entity paths.
+
+Compares get_all_by_apartment (ORM entities) with get_snapshots_by_apartment
+(namedtuples read from the columns), and a dashboard read of a guest house with
+the upcoming reservations of its apartments: the entity path (lazy loading, one
+query per apartment) against GuestHouseService.get_tree (three queries).
+Reports time, peak Python memory (tracemalloc) and SQL statements.
+
+Usage: python -m benchmarks.bench_projections [--apartments N] [--reservations N] [--repeat N]
+"""
+from benchmarks.bench_availability import seed, timed
+from benchmarks.bench_pagination import peak_memory
+from core.services.database_service import DatabaseService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reservation_service import ReservationService
+from sqlalchemy import event
+from datetime import timedelta
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apartments", type=int, default=10)
+    parser.add_argument("--reservations", type=int, default=2000, help="reservations per apartment")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", default="sqlite://", help="SQLAlchemy connection string")
+    args = parser.parse_args()
+
+    db_service = DatabaseService(args.db)
+    guesthouse_id, apartment_ids = seed(db_service, args.apartments, args.reservations)
+    reservation_service = ReservationService(db_service)
+    guesthouse_service = GuestHouseService(db_service)
+    last = max(r.check_in_date for r in reservation_service.iter_by_apartment(apartment_ids[0]))
+    # "Today" for the dashboard: the last 90 days of the seeded history are upcoming
+    today = last - timedelta(days=90)
+
+    statements = []
+    event.listen(db_service.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def entity_tree():
+        # GuestHouseService.get leaves its session open, so the relationships are lazy loaded
+        guesthouse = guesthouse_service.get(guesthouse_id)
+        return [(apartment, [r for r in apartment.reservations if r.check_out_date > today])
+                for apartment in guesthouse.apartments]
+
+    print(f"{args.apartments} apartments x {args.reservations} reservations")
+    for label, func in (("one apartment, entities", lambda: reservation_service.get_all_by_apartment(apartment_ids[0])),
+                        ("one apartment, snapshots",
+                         lambda: reservation_service.get_snapshots_by_apartment(apartment_ids[0])),
+                        ("guest house tree, entities", entity_tree),
+                        ("guest house tree, get_tree", lambda: guesthouse_service.get_tree(guesthouse_id, today))):
+        elapsed, _ = timed(func, args.repeat)
+        statements.clear()
+        memory = peak_memory(func)
+        print(f"  {label:28} {elapsed * 1000:8.2f} ms   peak memory: {memory / 1024:9.0f} KiB   "
+              f"queries: {len(statements)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: monthly occupancy report of a guest house.
+
+Compares ReportingService.monthly_report (SQL on the monthly_occupancy summary
+table) with pulling every reservation through get_all_by_apartment and to_dict
+and aggregating in Python, and measures what maintaining the summary adds to
+ReservationService.create.
+
+Usage: python -m benchmarks.bench_reporting [--apartments N] [--reservations N] [--repeat N]
+"""
+from benchmarks.bench_availability import timed
+from core.services.database_service import DatabaseService
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reporting_service import ReportingService
+from reservation.services.reservation_service import ReservationService
+from datetime import datetime, timedelta
+import argparse
+import random
+import time
+
+
+def seed(db_service, num_apartments, reservations_per_apartment):
+    guesthouse_id = GuestHouseService(db_service).create("Benchmark")
+    apartment_service = ApartmentService(db_service)
+    apartment_ids = [apartment_service.create(guesthouse_id, f"Apartment {n}") for n in range(num_apartments)]
+    rng = random.Random(42)
+    rows = []
+    for apartment_id in apartment_ids:
+        check_in = datetime(2000, 1, 1)
+        for _ in range(reservations_per_apartment):
+            check_in += timedelta(days=rng.randint(0, 5))
+            check_out = check_in + timedelta(days=rng.randint(1, 10))
+            rows.append({'apartment_id': apartment_id, 'check_in_date': check_in, 'check_out_date': check_out,
+                         'num_guests': rng.randint(1, 4), 'contact_name': "Guest", 'contact_number': "000",
+                         'contact_email': "guest@example.com",
+                         'booking_mode': rng.choice(("direct", "booking.com", "airbnb"))})
+            check_in = check_out
+    ReservationService(db_service).create_many(rows)
+    return guesthouse_id, apartment_ids
+
+
+def report_by_loop(reservation_service, apartment_ids, start_date, end_date):
+    totals = {}
+    for apartment_id in apartment_ids:
+        for reservation in (r.to_dict() for r in reservation_service.get_all_by_apartment(apartment_id)):
+            day = max(datetime.fromisoformat(reservation['check_in_date']), start_date)
+            while day < min(datetime.fromisoformat(reservation['check_out_date']), end_date):
+                key = (apartment_id, day.year, day.month)
+                totals[key] = totals.get(key, 0) + 1
+                day += timedelta(days=1)
+    return totals
+
+
+def time_creates(reservation_service, apartment_id, count):
+    start = time.perf_counter()
+    check_in = datetime(2200, 1, 1)
+    for _ in range(count):
+        reservation_service.create(apartment_id, check_in, check_in + timedelta(days=3), 2,
+                                   "Guest", "000", "guest@example.com", "direct")
+        check_in += timedelta(days=3)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apartments", type=int, default=10)
+    parser.add_argument("--reservations", type=int, default=2000, help="reservations per apartment")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", default="sqlite://", help="SQLAlchemy connection string")
+    args = parser.parse_args()
+
+    db_service = DatabaseService(args.db)
+    guesthouse_id, apartment_ids = seed(db_service, args.apartments, args.reservations)
+    reservation_service = ReservationService(db_service)
+    reporting_service = ReportingService(db_service)
+
+    print(f"{args.apartments} apartments x {args.reservations} reservations")
+    start_date, end_date = datetime(2010, 1, 1), datetime(2011, 1, 1)
+    loop_time, expected = timed(
+        lambda: report_by_loop(reservation_service, apartment_ids, start_date, end_date), args.repeat)
+    sql_time, result = timed(
+        lambda: reporting_service.monthly_report(start_date, end_date, guesthouse_id=guesthouse_id), args.repeat)
+    assert {(row.apartment_id, row.year, row.month): row.nights for row in result if row.nights} == expected
+    print(f"  12-month report  loop: {loop_time * 1000:8.2f} ms   "
+          f"summary table: {sql_time * 1000:8.2f} ms   speedup: {loop_time / sql_time:6.1f}x")
+
+    rebuild_time, _ = timed(reporting_service.rebuild, 1)
+    print(f"  rebuild: {rebuild_time * 1000:8.2f} ms")
+
+    with_summary = time_creates(reservation_service, apartment_ids[0], 200)
+    # Same writes with the summary maintenance skipped, to isolate its cost
+    record = ReportingService.record
+    ReportingService.record = staticmethod(lambda session, reservations, sign=1: None)
+    try:
+        without_summary = time_creates(reservation_service, apartment_ids[1], 200)
+    finally:
+        ReportingService.record = staticmethod(record)
+    print(f"  create  without summary: {without_summary * 1000:6.3f} ms   "
+          f"with summary: {with_summary * 1000:6.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: encoding of schedina records for many guests.
+
+Compares SchedinaCodec.encode_many with the string-appending implementation
+AlloggiatiWebApi._create_record had before the codec (copied below).
+
+Usage: python -m benchmarks.bench_schedina_codec [--guests N] [--repeat N]
+"""
+from registration.models.guest import GuestType, GuestGender, Guest
+from registration.utils.schedina_codec import SchedinaCodec
+from datetime import datetime, timedelta
+import argparse
+import random
+import time
+
+
+def legacy_guest_type_to_int(guest_type: GuestType) -> int:
+    return {
+        GuestType.SINGLE: 16,
+        GuestType.HOUSE_HEAD: 17,
+        GuestType.GROUP_LEADER: 18,
+        GuestType.FAMILY_MEMBER: 19,
+        GuestType.GROUP_MEMBER: 20
+    }[guest_type]
+
+
+def legacy_guest_gender_to_str(gender: GuestGender) -> str:
+    return {
+        GuestGender.MALE: "1",
+        GuestGender.FEMALE: "2",
+        GuestGender.UNKNOWN: "X"
+    }[gender]
+
+
+def legacy_create_record(guest: Guest) -> str:
+    record= f"{legacy_guest_type_to_int(guest.guest_type):02d}"
+    record+= f"{guest.arrival_date.strftime('%d/%m/%Y')}"
+    record+= f"{guest.num_days:02d}"
+    record+= f"{guest.last_name}" + " "*(50-len(guest.last_name))
+    record+= f"{guest.first_name}" + " "*(30-len(guest.first_name))
+    record+= f"{legacy_guest_gender_to_str(guest.gender)}"
+    record+= f"{guest.birth_date}" + "0"*(10-len(guest.birth_date))
+    record+= f"{guest.birth_city}" + " "*(9-len(guest.birth_city))
+    record+= f"{guest.birth_province}" + " "*(2-len(guest.birth_province))
+    record+= f"{guest.birth_country}" + " "*(9-len(guest.birth_country))
+    record+= f"{guest.citizenship}" + " "*(9-len(guest.citizenship))
+    record+= f"{guest.document_type}" + " "*(5-len(guest.document_type))
+    record+= f"{guest.document_number}" + " "*(20-len(guest.document_number))
+    record+= f"{guest.document_issue_place}" + " "*(9-len(guest.document_issue_place))
+    return record
+
+
+def make_guests(count: int) -> list:
+    rng = random.Random(42)
+    guests = []
+    for n in range(count):
+        leader = n % 4 == 0
+        guests.append(Guest(GuestType.GROUP_LEADER if leader else GuestType.GROUP_MEMBER,
+                            datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 365)), rng.randint(1, 30),
+                            f"Surname{n}", f"Name{n}", rng.choice(list(GuestGender)),
+                            f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1940, 2020)}",
+                            "412058091", "RM", "100000100", "100000100",
+                            "IDELE" if leader else "", f"CA{n:07d}" if leader else "", "412058091" if leader else ""))
+    return guests
+
+
+def timed(func, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guests", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    guests = make_guests(args.guests)
+    codec = SchedinaCodec()
+    legacy_time, expected = timed(lambda: [legacy_create_record(guest) for guest in guests], args.repeat)
+    codec_time, records = timed(lambda: codec.encode_many(guests), args.repeat)
+    assert records == expected
+    decode_time, _ = timed(lambda: codec.decode_many(records), args.repeat)
+
+    print(f"{args.guests} guests")
+    print(f"  legacy _create_record: {legacy_time * 1000:8.2f} ms")
+    print(f"  codec encode_many:     {codec_time * 1000:8.2f} ms   speedup: {legacy_time / codec_time:.2f}x")
+    print(f"  codec decode_many:     {decode_time * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
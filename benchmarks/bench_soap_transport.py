@@ -0,0 +1,57 @@
+"""
+Benchmark: per-call latency of SOAP requests with and without connection reuse.
+
+Compares a module-level requests.post per call (a new connection each time, as
+make_request did before SoapTransport) with SoapTransport's pooled session,
+against a local stub HTTP server. Over TLS the gain is larger, since each new
+connection also pays for a handshake.
+
+Usage: python -m benchmarks.bench_soap_transport [--calls N]
+"""
+from registration.tests.stub_server import StubServer
+from registration.utils import soap_utils
+from registration.utils.soap_utils import SoapTransport
+import argparse
+import requests
+import statistics
+import time
+import xml.etree.ElementTree as ET
+
+
+def without_pool(url, body):
+    response = requests.post(url, headers=soap_utils.default_headers, data=body)
+    return ET.fromstring(response.text)
+
+
+def measure(func, url, body, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        func(url, body)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1000)
+    args = parser.parse_args()
+
+    body = soap_utils.new_envelope(soap_utils.new_body(
+        '<Authentication_Test xmlns="AlloggiatiService"><Utente>user</Utente><token>token</token></Authentication_Test>'))
+    transport = SoapTransport()
+    with StubServer() as server:
+        results = {}
+        for label, func in (("requests.post", without_pool), ("SoapTransport", transport.make_request)):
+            connections = server.connections
+            results[label] = measure(func, server.url, body, args.calls)
+            p50, p99 = results[label]
+            print(f"{label:14} p50: {p50 * 1000:7.3f} ms   p99: {p99 * 1000:7.3f} ms   "
+                  f"connections: {server.connections - connections}")
+    transport.close()
+    print(f"speedup (p50): {results['requests.post'][0] / results['SoapTransport'][0]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
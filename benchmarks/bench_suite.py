@@ -0,0 +1,199 @@
+"""
+Benchmark suite: latency of the reservation services on synthetic data.
+
+For each scale (number of reservations) and storage (in-memory or file-backed
+SQLite in WAL mode), loads the data of benchmarks.datagen and times:
+
+  create_conflict        ReservationService.create rejected by the conflict check
+  create                 ReservationService.create of a free stay after the history
+  update                 ReservationService.update of the dates of an existing reservation
+  find_available_dates   90-day window of an apartment
+  get_all_by_apartment   whole history of an apartment
+  apartment_create       ApartmentService.create
+
+Results (mean, p50, p99 in milliseconds and operations per second) are printed
+and written as JSON. With --baseline, operations slower than the baseline by
+more than --threshold are reported and the exit status is 1.
+
+Usage: python -m benchmarks.bench_suite [--scales 10k,100k,1M] [--storage memory,file] [--ops N]
+                                        [--output results.json] [--baseline results.json] [--threshold 0.2]
+"""
+from benchmarks import datagen
+from core.services.database_service import DatabaseService
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reservation_service import ReservationService
+from datetime import datetime, timedelta, timezone
+import argparse
+import json
+import os
+import platform
+import random
+import sqlalchemy
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+SQLITE_OPTIONS = {'sqlite_wal': True, 'sqlite_synchronous': "NORMAL", 'sqlite_busy_timeout': 5000}
+
+
+def parse_scale(value: str) -> int:
+    value = value.strip().lower()
+    for suffix, factor in (("k", 1000), ("m", 1000000)):
+        if value.endswith(suffix):
+            return int(float(value[:-1]) * factor)
+    return int(value)
+
+
+def summarize(scale: int, storage: str, operation: str, latencies: list) -> dict:
+    latencies = sorted(latencies)
+    return {
+        'scale': scale, 'storage': storage, 'operation': operation, 'count': len(latencies),
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'ops_per_s': len(latencies) / sum(latencies)
+    }
+
+
+def measure(func, args_list: list) -> list:
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run(db_service: DatabaseService, data: tuple, num_ops: int, rng: random.Random) -> dict:
+    guesthouses, apartments, reservations = data
+    reservation_service = ReservationService(db_service)
+    apartment_service = ApartmentService(db_service)
+    contact = (2, "Guest", "000", "guest@example.com", "direct")
+
+    last_check_out = {}
+    for row in reservations:
+        last_check_out[row['apartment_id']] = max(last_check_out.get(row['apartment_id'], row['check_out_date']),
+                                                  row['check_out_date'])
+    history_days = (max(last_check_out.values()) - datagen.START_DATE).days
+    apartment_ids = [row['id'] for row in rng.sample(apartments, min(num_ops, len(apartments)))]
+
+    def random_apartment():
+        return rng.choice(apartment_ids)
+
+    def random_day():
+        return datagen.START_DATE + timedelta(days=rng.randint(0, history_days))
+
+    # Stays inside the history of a random reservation's apartment: always a conflict
+    conflicting = [(row['apartment_id'], row['check_in_date'], row['check_in_date'] + timedelta(days=1)) + contact
+                   for row in rng.choices(reservations, k=num_ops)]
+
+    # Free stays after the end of the history, one apartment after the other
+    free = []
+    for n in range(num_ops):
+        apartment_id = apartment_ids[n % len(apartment_ids)]
+        check_in = last_check_out[apartment_id] + timedelta(days=30)
+        last_check_out[apartment_id] = check_in + timedelta(days=3)
+        free.append((apartment_id, check_in, last_check_out[apartment_id]) + contact)
+
+    # Dates moved within the stay itself, so the update passes the conflict check
+    updated = [(row['id'], row['check_in_date'], row['check_out_date'])
+               for row in rng.choices(reservations, k=num_ops)]
+
+    def update(reservation_id, check_in_date, check_out_date):
+        reservation_service.update(reservation_id, check_in_date=check_in_date,
+                                   check_out_date=check_out_date - timedelta(hours=1))
+
+    # One new guest house for every 10 apartments, created outside the timing
+    guesthouse_service = GuestHouseService(db_service)
+    new_guesthouses = [guesthouse_service.create(f"Suite guest house {n}") for n in range((num_ops + 9) // 10)]
+
+    windows = [(random_apartment(), day, day + timedelta(days=90)) for day in (random_day() for _ in range(num_ops))]
+    operations = (
+        ('create_conflict', reservation_service.create, conflicting),
+        ('create', reservation_service.create, free),
+        ('update', update, updated),
+        ('find_available_dates', reservation_service.find_available_dates, windows),
+        ('get_all_by_apartment', reservation_service.get_all_by_apartment,
+         [(random_apartment(),) for _ in range(num_ops)]),
+        ('apartment_create', apartment_service.create,
+         [(new_guesthouses[n // 10], f"Suite apartment {n}") for n in range(num_ops)]),
+    )
+    return {name: measure(func, args_list) for name, func, args_list in operations}
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> list:
+    with open(baseline_path) as file:
+        baseline = {(row['scale'], row['storage'], row['operation']): row for row in json.load(file)['results']}
+    regressions = []
+    for row in results:
+        previous = baseline.get((row['scale'], row['storage'], row['operation']))
+        if previous and row['p50_ms'] > previous['p50_ms'] * (1 + threshold):
+            regressions.append((row, previous))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="10k,100k,1M")
+    parser.add_argument("--storage", default="memory,file")
+    parser.add_argument("--ops", type=int, default=200, help="timed calls per operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="tolerated p50 slowdown, as a fraction")
+    args = parser.parse_args()
+
+    results = []
+    for scale in (parse_scale(x) for x in args.scales.split(",")):
+        start = time.perf_counter()
+        data = datagen.generate(scale, args.seed)
+        print(f"{scale} reservations, {len(data[1])} apartments (generated in {time.perf_counter() - start:.1f} s)")
+        for storage in args.storage.split(","):
+            path = None
+            if storage == "memory":
+                db_service = DatabaseService("sqlite://")
+            else:
+                fd, path = tempfile.mkstemp(suffix=".db")
+                os.close(fd)
+                db_service = DatabaseService(f"sqlite:///{path}", **SQLITE_OPTIONS)
+            try:
+                start = time.perf_counter()
+                datagen.load(db_service, *data)
+                print(f"  {storage:6} loaded in {time.perf_counter() - start:.1f} s")
+                for operation, latencies in run(db_service, data, args.ops, random.Random(args.seed)).items():
+                    row = summarize(scale, storage, operation, latencies)
+                    results.append(row)
+                    print(f"    {operation:22} mean: {row['mean_ms']:7.3f} ms   p50: {row['p50_ms']:7.3f} ms   "
+                          f"p99: {row['p99_ms']:7.3f} ms")
+            finally:
+                db_service.engine.dispose()
+                for suffix in ("", "-wal", "-shm"):
+                    if path and os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+
+    with open(args.output, "w") as file:
+        json.dump({
+            'metadata': {
+                'timestamp': datetime.now(timezone.utc).isoformat(), 'python': platform.python_version(),
+                'sqlalchemy': sqlalchemy.__version__, 'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(), 'cpus': os.cpu_count(), 'ops': args.ops, 'seed': args.seed,
+                'file_options': SQLITE_OPTIONS
+            },
+            'results': results
+        }, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        for row, previous in regressions:
+            print(f"REGRESSION {row['scale']} {row['storage']} {row['operation']}: "
+                  f"p50 {previous['p50_ms']:.3f} -> {row['p50_ms']:.3f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: String(36) text UUID keys against the 16-byte UUIDType keys, on SQLite.
+
+Loads the same synthetic data (benchmarks.datagen) into a database with the old
+text keys, migrates it with reservation.utils.uuid_migration, and compares the
+size of the tables and indexes (dbstat), a join of reservations, apartments and
+guest houses, and lookups of reservations by id.
+
+Usage: python -m benchmarks.bench_uuid_keys [--reservations N] [--lookups N] [--repeat N]
+"""
+from benchmarks.bench_availability import timed
+from benchmarks.datagen import generate
+from core.services.database_service import Base
+from reservation.utils.uuid_migration import legacy_metadata, migrate
+from sqlalchemy import create_engine, func, insert, select, text
+import argparse
+import os
+import random
+import tempfile
+import time
+
+
+def load_legacy(url, guesthouses, apartments, reservations, chunk_size=50000):
+    metadata = legacy_metadata()
+    engine = create_engine(url)
+    metadata.create_all(engine)
+    table = metadata.tables['reservations']
+    with engine.begin() as connection:
+        connection.execute(insert(metadata.tables['guesthouses']), guesthouses)
+        connection.execute(insert(metadata.tables['apartments']), apartments)
+        for start in range(0, len(reservations), chunk_size):
+            connection.execute(insert(table), [{column.name: row[column.name] for column in table.columns}
+                                               for row in reservations[start:start + chunk_size]])
+    engine.dispose()
+
+
+def storage(engine):
+    """Bytes used by each table and index of the reservation tables, from the SQLite dbstat table."""
+    with engine.connect() as connection:
+        return dict(connection.execute(text(
+            "SELECT dbstat.name, SUM(pgsize) FROM dbstat JOIN sqlite_master ON sqlite_master.name = dbstat.name "
+            "WHERE tbl_name IN ('guesthouses', 'apartments', 'reservations') GROUP BY dbstat.name")).all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reservations", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000, help="reservations looked up by id")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    guesthouses, apartments, reservations = generate(args.reservations)
+    ids = [row['id'] for row in random.Random(0).sample(reservations, min(args.lookups, len(reservations)))]
+
+    with tempfile.TemporaryDirectory() as directory:
+        text_url = f"sqlite:///{os.path.join(directory, 'text.db')}"
+        binary_url = f"sqlite:///{os.path.join(directory, 'binary.db')}"
+        load_legacy(text_url, guesthouses, apartments, reservations)
+        start = time.perf_counter()
+        migrate(text_url, binary_url)
+        print(f"{len(reservations)} reservations, {len(apartments)} apartments, {len(guesthouses)} guest houses; "
+              f"migrated in {time.perf_counter() - start:.2f} s")
+
+        results = {}
+        for label, url, metadata in (("String(36)", text_url, legacy_metadata()),
+                                     ("UUIDType", binary_url, Base.metadata)):
+            engine = create_engine(url)
+            guesthouse, apartment, reservation = (metadata.tables[name]
+                                                  for name in ('guesthouses', 'apartments', 'reservations'))
+            join = select(guesthouse.c.name, func.count(), func.sum(reservation.c.num_guests)).select_from(
+                reservation.join(apartment).join(guesthouse)).group_by(guesthouse.c.id)
+
+            def run_join():
+                with engine.connect() as connection:
+                    return connection.execute(join).all()
+
+            def run_lookups():
+                with engine.connect() as connection:
+                    for reservation_id in ids:
+                        connection.execute(select(reservation.c.check_in_date)
+                                           .where(reservation.c.id == reservation_id)).one()
+
+            results[label] = (storage(engine), timed(run_join, args.repeat)[0], timed(run_lookups, args.repeat)[0])
+            engine.dispose()
+
+        names = sorted(results["String(36)"][0])
+        print(f"  {'':36} {'String(36)':>12} {'UUIDType':>12}")
+        for name in names:
+            before, after = results["String(36)"][0][name], results["UUIDType"][0].get(name, 0)
+            print(f"  {name:36} {before / 1024:9.0f} KiB {after / 1024:9.0f} KiB")
+        print(f"  {'total':36} {sum(results['String(36)'][0].values()) / 1024:9.0f} KiB "
+              f"{sum(results['UUIDType'][0].values()) / 1024:9.0f} KiB")
+        print(f"  {'join by guest house':36} {results['String(36)'][1] * 1000:10.1f} ms "
+              f"{results['UUIDType'][1] * 1000:10.1f} ms")
+        print(f"  {f'{len(ids)} lookups by id':36} {results['String(36)'][2] * 1000:10.1f} ms "
+              f"{results['UUIDType'][2] * 1000:10.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
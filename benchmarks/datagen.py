@@ -0,0 +1,118 @@
+"""
+Synthetic guest houses, apartments and reservations for the benchmarks.
+
+Each apartment gets a booking history of consecutive stays separated by idle
+gaps, starting from the same date. Stay lengths follow a log-normal distribution
+(most stays last 2-4 nights, with a tail of week-long and longer stays), the gaps
+give an occupancy of about 70%, and each reservation has a lead time (days
+between booking and check-in) drawn from a mix of last-minute and early
+bookings. The reservations are returned in booking order, which is the order in
+which a live system would have created them.
+
+Usage: python -m benchmarks.datagen --reservations N [--db URL]
+"""
+from core.services.database_service import DatabaseService
+from reservation.models import Apartment, GuestHouse, Reservation
+from reservation.services.reporting_service import ReportingService
+from sqlalchemy import insert
+from datetime import datetime, timedelta
+import argparse
+import math
+import random
+import time
+import uuid
+
+START_DATE = datetime(2015, 1, 1)
+RESERVATIONS_PER_APARTMENT = 200
+BOOKING_MODES = (("booking.com", 45), ("airbnb", 30), ("direct", 20), ("phone", 5))
+NUM_GUESTS = ((1, 15), (2, 50), (3, 15), (4, 20))
+
+
+def stay_length(rng: random.Random) -> int:
+    return min(max(1, round(rng.lognormvariate(math.log(3), 0.6))), 28)
+
+
+def idle_gap(rng: random.Random) -> int:
+    # Mean of about 1.3 days against a mean stay of 3.5 nights: ~70% occupancy
+    return 0 if rng.random() < 0.45 else int(rng.expovariate(1 / 2.4))
+
+
+def lead_time(rng: random.Random) -> int:
+    # A third of the bookings are last-minute, the others are made weeks or months ahead
+    if rng.random() < 0.33:
+        return int(rng.expovariate(1 / 3))
+    return min(int(rng.expovariate(1 / 45)), 365)
+
+
+def weighted(rng: random.Random, choices: tuple):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def generate(num_reservations: int, seed: int = 0) -> tuple:
+    """
+    (guest houses, apartments, reservations) as lists of insert() rows; guest houses
+    have 1 to 10 apartments, reservations are sorted by booking date.
+    """
+    rng = random.Random(seed)
+    num_apartments = max(1, num_reservations // RESERVATIONS_PER_APARTMENT)
+    guesthouses, apartments = [], []
+    while len(apartments) < num_apartments:
+        guesthouse = {'id': str(uuid.uuid4()), 'name': f"Guest house {len(guesthouses)}"}
+        guesthouses.append(guesthouse)
+        for n in range(min(rng.randint(1, 10), num_apartments - len(apartments))):
+            apartments.append({'id': str(uuid.uuid4()), 'name': f"{guesthouse['name']} apartment {n}",
+                               'guesthouse_id': guesthouse['id']})
+
+    reservations = []
+    for index, apartment in enumerate(apartments):
+        count = num_reservations // num_apartments + (index < num_reservations % num_apartments)
+        check_in = START_DATE + timedelta(days=rng.randint(0, 30))
+        for _ in range(count):
+            check_out = check_in + timedelta(days=stay_length(rng))
+            reservations.append({
+                'id': str(uuid.uuid4()), 'apartment_id': apartment['id'],
+                'check_in_date': check_in, 'check_out_date': check_out,
+                'num_guests': weighted(rng, NUM_GUESTS), 'contact_name': "Guest", 'contact_number': "000",
+                'contact_email': "guest@example.com", 'booking_mode': weighted(rng, BOOKING_MODES), 'notes': "",
+                'booked_at': check_in - timedelta(days=lead_time(rng))
+            })
+            check_in = check_out + timedelta(days=idle_gap(rng))
+    reservations.sort(key=lambda row: row['booked_at'])
+    return guesthouses, apartments, reservations
+
+
+def load(db_service: DatabaseService, guesthouses: list, apartments: list, reservations: list,
+         chunk_size: int = 50000):
+    """Bulk insert the generated rows and build the monthly summary."""
+    session = db_service.get_session()
+    try:
+        session.execute(insert(GuestHouse), guesthouses)
+        session.execute(insert(Apartment), apartments)
+        columns = [column.name for column in Reservation.__table__.columns]
+        for start in range(0, len(reservations), chunk_size):
+            session.execute(insert(Reservation), [{name: row[name] for name in columns}
+                                                  for row in reservations[start:start + chunk_size]])
+        session.commit()
+    finally:
+        session.close()
+    ReportingService(db_service).rebuild()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reservations", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", default="sqlite:///benchmark.db", help="SQLAlchemy connection string")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    guesthouses, apartments, reservations = generate(args.reservations, args.seed)
+    load(DatabaseService(args.db), guesthouses, apartments, reservations)
+    nights = [(row['check_out_date'] - row['check_in_date']).days for row in reservations]
+    print(f"{len(guesthouses)} guest houses, {len(apartments)} apartments, {len(reservations)} reservations "
+          f"({sum(nights) / len(nights):.1f} nights on average) in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from core.services.database_service import Base, DatabaseService
+
+class AsyncDatabaseService:
+    """Service for database operations on an asyncio engine."""
+
+    def __init__(self, connection_string, pool_size=None, max_overflow=None, pool_pre_ping=False,
+                 pool_recycle=-1, sqlite_wal=False, sqlite_synchronous=None, sqlite_busy_timeout=None):
+        """
+        Initialize the async database service.
+
+        The options are the ones of DatabaseService. The schema is not created on
+        construction (it needs the event loop): await create_schema() instead.
+
+        Args:
+            connection_string (str): SQLAlchemy connection string with an async driver,
+                                     e.g. sqlite+aiosqlite:///file.db or postgresql+asyncpg://...
+            pool_size (int, optional): Number of connections kept open by the pool
+            max_overflow (int, optional): Connections allowed beyond pool_size under load
+            pool_pre_ping (bool, optional): Test connections for liveness when checked out
+            pool_recycle (int, optional): Seconds after which a connection is replaced, -1 to never recycle
+            sqlite_wal (bool, optional): Use the write-ahead log journal mode on SQLite
+            sqlite_synchronous (str, optional): PRAGMA synchronous level on SQLite (OFF, NORMAL, FULL, EXTRA)
+            sqlite_busy_timeout (int, optional): Milliseconds SQLite waits on a locked database before failing
+        """
+        engine_options = DatabaseService.engine_options(pool_size, max_overflow, pool_pre_ping, pool_recycle,
+                                                        sqlite_synchronous)
+        self.engine = create_async_engine(connection_string, **engine_options)
+
+        if self.engine.dialect.name == 'sqlite':
+            DatabaseService.configure_sqlite(self.engine.sync_engine, sqlite_wal, sqlite_synchronous,
+                                             sqlite_busy_timeout)
+
+        # Entities stay readable after commit: expiring them would need an implicit (blocking) refresh
+        self.session = async_sessionmaker(bind=self.engine, expire_on_commit=False)
+
+    def get_session(self):
+        """Get a new AsyncSession."""
+        return self.session()
+
+    async def create_schema(self):
+        """Create the missing tables and indexes, after checking the key types of the existing ones."""
+        async with self.engine.begin() as connection:
+            await connection.run_sync(DatabaseService.check_key_types)
+            await connection.run_sync(Base.metadata.create_all)
+            await connection.run_sync(DatabaseService.create_missing_indexes)
+
+    async def upgrade_schema(self):
+        """
+        Create the indexes declared by the models that are missing from existing tables.
+
+        Returns:
+            list: Names of the indexes that were created
+        """
+        async with self.engine.begin() as connection:
+            return await connection.run_sync(DatabaseService.create_missing_indexes)
+
+    async def dispose(self):
+        """Close all the connections of the pool."""
+        await self.engine.dispose()
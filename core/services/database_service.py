@@ -1,23 +1,221 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from collections import namedtuple
+from sqlalchemy import BINARY, LargeBinary, String, create_engine, event, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.types import TypeDecorator
+import uuid
 
 Base = declarative_base()
 
+
+class UUIDType(TypeDecorator):
+    """
+    UUID column stored in 16 bytes: native uuid on PostgreSQL, BINARY(16) on MySQL and a blob elsewhere.
+
+    Values are bound from UUID strings or uuid.UUID objects and read back as canonical UUID
+    strings, so the services keep handling the same ids as with a String(36) column. Byte order
+    matches string order, so ORDER BY and keyset pagination on ids are unchanged. Strings that
+    are not UUIDs raise ValueError (wrapped in a StatementError when the statement runs).
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        if dialect.name in ('mysql', 'mariadb'):
+            return dialect.type_descriptor(BINARY(16))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            try:
+                value = uuid.UUID(value)
+            except (TypeError, ValueError, AttributeError):
+                raise ValueError(f"Invalid UUID: {value!r}") from None
+        return str(value) if dialect.name == 'postgresql' else value.bytes
+
+    def literal_processor(self, dialect):
+        # For statements compiled with literal_binds, e.g. EXPLAIN QUERY PLAN
+        def process(value):
+            value = self.process_bind_param(value, dialect)
+            if value is None:
+                return "NULL"
+            return f"'{value}'" if dialect.name == 'postgresql' else f"X'{value.hex()}'"
+        return process
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if dialect.name == 'postgresql':
+            return str(value)
+        return str(uuid.UUID(bytes=bytes(value)))
+
+# One page of a keyset-paginated query: next_cursor is passed as `after` to get the
+# following page, None on the last page
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
 class DatabaseService:
     """Service for database operations."""
 
-    def __init__(self, connection_string):
+    # Accepted values for PRAGMA synchronous
+    SQLITE_SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+    def __init__(self, connection_string, pool_size=None, max_overflow=None, pool_pre_ping=False,
+                 pool_recycle=-1, sqlite_wal=False, sqlite_synchronous=None, sqlite_busy_timeout=None,
+                 scoped=False, create_schema=True):
         """
         Initialize the database service.
 
         Args:
             connection_string (str): SQLAlchemy connection string
+            pool_size (int, optional): Number of connections kept open by the pool
+            max_overflow (int, optional): Connections allowed beyond pool_size under load
+            pool_pre_ping (bool, optional): Test connections for liveness when checked out
+            pool_recycle (int, optional): Seconds after which a connection is replaced, -1 to never recycle
+            sqlite_wal (bool, optional): Use the write-ahead log journal mode on SQLite
+            sqlite_synchronous (str, optional): PRAGMA synchronous level on SQLite (OFF, NORMAL, FULL, EXTRA)
+            sqlite_busy_timeout (int, optional): Milliseconds SQLite waits on a locked database before failing
+            scoped (bool, optional): Give each thread one reusable session instead of a new one per call
+            create_schema (bool, optional): Create the missing tables and indexes on construction
         """
-        self.engine = create_engine(connection_string)
-        Base.metadata.create_all(self.engine)
-        self.session = sessionmaker(bind=self.engine)
+        engine_options = self.engine_options(pool_size, max_overflow, pool_pre_ping, pool_recycle,
+                                             sqlite_synchronous)
+        self.engine = create_engine(connection_string, **engine_options)
+
+        if self.engine.dialect.name == 'sqlite':
+            self.configure_sqlite(self.engine, sqlite_wal, sqlite_synchronous, sqlite_busy_timeout)
+
+        self.check_key_types(self.engine)
+        if create_schema:
+            self.create_schema()
+
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.scoped = scoped
+        self.session = scoped_session(self.session_factory) if scoped else self.session_factory
 
     def get_session(self):
-        """Get a new session."""
-        return self.session()
\ No newline at end of file
+        """Get a new session, or the session of the current thread in scoped mode."""
+        return self.session()
+
+    def new_session(self):
+        """
+        Get a new session, also in scoped mode.
+
+        For sessions kept open across calls of other services, such as those of streaming
+        generators, which must not share the session that the thread's other calls commit and close.
+        """
+        return self.session_factory()
+
+    def remove_session(self):
+        """Close and discard the session of the current thread in scoped mode."""
+        if self.scoped:
+            self.session.remove()
+
+    def create_schema(self):
+        """Create the missing tables and indexes."""
+        Base.metadata.create_all(self.engine)
+        self.upgrade_schema()
+
+    def upgrade_schema(self):
+        """
+        Create the indexes declared by the models that are missing from existing tables.
+
+        create_all only creates indexes together with new tables, so databases created
+        by an older version of the models are brought up to date here.
+
+        Returns:
+            list: Names of the indexes that were created
+        """
+        return self.create_missing_indexes(self.engine)
+
+    @staticmethod
+    def create_missing_indexes(bind):
+        """Create the declared indexes missing from the existing tables, on an engine or connection."""
+        inspector = inspect(bind)
+        existing_tables = set(inspector.get_table_names())
+        created = []
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind)
+                    created.append(index.name)
+        return created
+
+    @staticmethod
+    def check_key_types(bind):
+        """
+        Check that the existing tables store their UUIDType columns in binary form, on an engine or connection.
+
+        Databases created before the binary keys have String(36) columns: their text ids
+        would never match the bound UUIDs, so they are refused until migrated.
+
+        Raises:
+            RuntimeError: If a UUIDType column of an existing table holds text
+        """
+        inspector = inspect(bind)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            uuid_columns = {column.name for column in table.columns if isinstance(column.type, UUIDType)}
+            text_columns = [column['name'] for column in inspector.get_columns(table.name)
+                            if column['name'] in uuid_columns and isinstance(column['type'], String)]
+            # SQLite accepts any value in any column: look at the stored key as well
+            if not text_columns and 'id' in uuid_columns and bind.dialect.name == 'sqlite':
+                query = text(f"SELECT typeof(id) FROM {table.name} LIMIT 1")
+                if isinstance(bind, Connection):
+                    key_type = bind.execute(query).scalar()
+                else:
+                    with bind.connect() as connection:
+                        key_type = connection.execute(query).scalar()
+                if key_type == 'text':
+                    text_columns = ['id']
+            if text_columns:
+                raise RuntimeError(
+                    f"Table {table.name} stores {', '.join(text_columns)} as text UUIDs: migrate the database with "
+                    f"python -m reservation.utils.uuid_migration SOURCE_URL TARGET_URL")
+
+    @classmethod
+    def engine_options(cls, pool_size, max_overflow, pool_pre_ping, pool_recycle, sqlite_synchronous):
+        """Validate the options and build the keyword arguments of create_engine."""
+        if sqlite_synchronous is not None and sqlite_synchronous.upper() not in cls.SQLITE_SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Invalid SQLite synchronous level: {sqlite_synchronous}")
+
+        engine_options = {'pool_pre_ping': pool_pre_ping, 'pool_recycle': pool_recycle}
+        # Only pass the sizes when given: pools such as SQLite's SingletonThreadPool do not accept them
+        if pool_size is not None:
+            engine_options['pool_size'] = pool_size
+        if max_overflow is not None:
+            engine_options['max_overflow'] = max_overflow
+        return engine_options
+
+    @staticmethod
+    def configure_sqlite(engine, wal, synchronous, busy_timeout):
+        """Apply the SQLite pragmas to every new connection of a (synchronous) engine."""
+        pragmas = []
+        if wal:
+            pragmas.append("PRAGMA journal_mode=WAL")
+        if synchronous is not None:
+            pragmas.append(f"PRAGMA synchronous={synchronous.upper()}")
+        if busy_timeout is not None:
+            pragmas.append(f"PRAGMA busy_timeout={int(busy_timeout)}")
+        if not pragmas:
+            return
+
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
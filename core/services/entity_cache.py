@@ -0,0 +1,77 @@
+from collections import OrderedDict
+import threading
+import time
+
+class EntityCache:
+    """Thread-safe read-through cache with LRU eviction and an optional TTL."""
+
+    def __init__(self, max_size=1024, ttl=None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size (int, optional): Maximum number of entries kept
+            ttl (float, optional): Seconds after which an entry expires, None to never expire
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation, so values loaded before it are not stored
+        self._generation = 0
+
+    def get_or_load(self, key, loader):
+        """
+        Get a value, loading and storing it on a miss.
+
+        Args:
+            key (hashable): Cache key
+            loader (callable): Function without arguments returning the value, None included
+
+        Returns:
+            The cached or loaded value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            if generation == self._generation:
+                expires = time.monotonic() + self.ttl if self.ttl is not None else None
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *keys):
+        """
+        Remove entries.
+
+        Args:
+            *keys: Keys of the entries to remove
+        """
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all the entries."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,112 @@
+from core.services.database_service import DatabaseService, UUIDType
+from reservation.models import GuestHouse, Reservation
+from sqlalchemy import inspect, select, text
+from sqlalchemy.dialects import mysql, postgresql
+from sqlalchemy.exc import StatementError
+import os
+import tempfile
+import threading
+import unittest
+import uuid
+
+class TestDatabaseService(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.connection_string = f"sqlite:///{self.db_path}"
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def _index_names(self, db_service, table_name):
+        return {index['name'] for index in inspect(db_service.engine).get_indexes(table_name)}
+
+    def test_indexes_created(self):
+        db_service = DatabaseService(self.connection_string)
+        self.assertIn('ix_reservations_apartment_dates', self._index_names(db_service, 'reservations'))
+        self.assertIn('ix_apartments_guesthouse_name', self._index_names(db_service, 'apartments'))
+        self.assertEqual(db_service.upgrade_schema(), [])
+        db_service.engine.dispose()
+
+    def test_upgrade_schema_adds_missing_indexes(self):
+        db_service = DatabaseService(self.connection_string)
+        with db_service.engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_reservations_apartment_dates"))
+        db_service.engine.dispose()
+
+        db_service = DatabaseService(self.connection_string)
+        self.assertIn('ix_reservations_apartment_dates', self._index_names(db_service, Reservation.__tablename__))
+        db_service.engine.dispose()
+
+    def test_sqlite_pragmas(self):
+        db_service = DatabaseService(self.connection_string, sqlite_wal=True,
+                                     sqlite_synchronous="normal", sqlite_busy_timeout=2500)
+        with db_service.engine.connect() as connection:
+            self.assertEqual(connection.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+            self.assertEqual(connection.execute(text("PRAGMA synchronous")).scalar(), 1)
+            self.assertEqual(connection.execute(text("PRAGMA busy_timeout")).scalar(), 2500)
+        db_service.engine.dispose()
+
+    def test_invalid_synchronous_level(self):
+        with self.assertRaises(ValueError):
+            DatabaseService(self.connection_string, sqlite_synchronous="SOMETIMES")
+
+    def test_pool_options(self):
+        db_service = DatabaseService(self.connection_string, pool_size=3, max_overflow=2, pool_pre_ping=True)
+        self.assertEqual(db_service.engine.pool.size(), 3)
+        db_service.engine.dispose()
+
+    def test_create_schema_disabled(self):
+        db_service = DatabaseService(self.connection_string, create_schema=False)
+        self.assertEqual(inspect(db_service.engine).get_table_names(), [])
+        db_service.engine.dispose()
+
+    def test_scoped_sessions(self):
+        db_service = DatabaseService(self.connection_string, scoped=True)
+        session = db_service.get_session()
+        self.assertIs(db_service.get_session(), session)
+        new_session = db_service.new_session()
+        self.assertIsNot(new_session, session)
+        new_session.close()
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(db_service.get_session()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], session)
+
+        db_service.remove_session()
+        self.assertIsNot(db_service.get_session(), session)
+        db_service.remove_session()
+        db_service.engine.dispose()
+
+    def test_uuid_type(self):
+        db_service = DatabaseService(self.connection_string)
+        ids = sorted(str(uuid.uuid4()) for _ in range(5))
+        session = db_service.get_session()
+        session.add_all(GuestHouse(name="Casa", id=guesthouse_id) for guesthouse_id in reversed(ids))
+        session.commit()
+
+        # Stored in 16 bytes, read back as the same strings and in the same order
+        self.assertEqual(session.execute(text("SELECT DISTINCT typeof(id), length(id) FROM guesthouses")).all(),
+                         [("blob", 16)])
+        self.assertEqual(session.scalars(select(GuestHouse.id).order_by(GuestHouse.id)).all(), ids)
+        self.assertEqual(session.get(GuestHouse, uuid.UUID(ids[0])).id, ids[0])
+        self.assertEqual(session.query(GuestHouse).filter(GuestHouse.id == ids[1].upper()).one().id, ids[1])
+        self.assertIsNone(session.query(GuestHouse).filter(GuestHouse.id == str(uuid.uuid4())).first())
+        # Strings that are not UUIDs are rejected
+        with self.assertRaises(StatementError) as context:
+            session.query(GuestHouse).filter(GuestHouse.id == "missing").first()
+        self.assertIsInstance(context.exception.orig, ValueError)
+        session.close()
+        with self.assertRaises(ValueError):
+            UUIDType().process_bind_param("missing", db_service.engine.dialect)
+        db_service.engine.dispose()
+
+        self.assertEqual(UUIDType().compile(dialect=postgresql.dialect()), "UUID")
+        self.assertEqual(UUIDType().compile(dialect=mysql.dialect()), "BINARY(16)")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+from core.services.entity_cache import EntityCache
+from unittest import mock
+import unittest
+
+class TestEntityCache(unittest.TestCase):
+
+    def test_read_through(self):
+        cache = EntityCache()
+        loader = mock.Mock(return_value="value")
+        self.assertEqual(cache.get_or_load("key", loader), "value")
+        self.assertEqual(cache.get_or_load("key", loader), "value")
+        self.assertEqual(loader.call_count, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_none_is_cached(self):
+        cache = EntityCache()
+        loader = mock.Mock(return_value=None)
+        cache.get_or_load("key", loader)
+        cache.get_or_load("key", loader)
+        self.assertEqual(loader.call_count, 1)
+
+    def test_lru_eviction(self):
+        cache = EntityCache(max_size=2)
+        cache.get_or_load("a", lambda: 1)
+        cache.get_or_load("b", lambda: 2)
+        cache.get_or_load("a", lambda: 1)
+        cache.get_or_load("c", lambda: 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_or_load("b", lambda: "reloaded"), "reloaded")
+        self.assertEqual(cache.get_or_load("c", lambda: "reloaded"), 3)
+
+    def test_ttl(self):
+        cache = EntityCache(ttl=10)
+        with mock.patch("core.services.entity_cache.time.monotonic", return_value=100):
+            cache.get_or_load("key", lambda: "old")
+        with mock.patch("core.services.entity_cache.time.monotonic", return_value=105):
+            self.assertEqual(cache.get_or_load("key", lambda: "new"), "old")
+        with mock.patch("core.services.entity_cache.time.monotonic", return_value=111):
+            self.assertEqual(cache.get_or_load("key", lambda: "new"), "new")
+
+    def test_invalidate(self):
+        cache = EntityCache()
+        cache.get_or_load("key", lambda: "old")
+        cache.invalidate("key", "missing")
+        self.assertEqual(cache.get_or_load("key", lambda: "new"), "new")
+
+    def test_invalidate_during_load(self):
+        cache = EntityCache()
+
+        def loader():
+            cache.invalidate("key")
+            return "stale"
+
+        self.assertEqual(cache.get_or_load("key", loader), "stale")
+        self.assertEqual(cache.get_or_load("key", lambda: "fresh"), "fresh")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,13 @@
-from registration.models.guest import Guest, GuestType, GuestGender
+from registration.models.guest import Guest
+from registration.services import alloggiatiweb_tables, alloggiatiweb_tokens
 from registration.utils import soap_utils
+from registration.utils.schedina_codec import default_codec
 from collections import namedtuple
 from datetime import datetime
 from enum import Enum
 import logging
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
 
 """
 Api for AlloggiatiWeb service
@@ -24,10 +27,10 @@ class AlloggiatiWebApi:
     Result = namedtuple('Result', ['success', 'err_code', 'err_desc', 'err_detail', 'data'])
 
     # Token namedtuple
-    Token = namedtuple('Token', ['issued', 'expires', 'token'])
+    Token = alloggiatiweb_tokens.Token
 
     # Location namedtuple
-    Location= namedtuple('Location', ['id', 'name', 'province', 'timestamp'])
+    Location= alloggiatiweb_tables.Location
 
     # Enum for table types
     class TableType(Enum):
@@ -38,12 +41,22 @@ class AlloggiatiWebApi:
         APARTMENTS_LIST = 'ListaAppartamenti'
 
 
-    def __init__(self, user: str, password: str, ws_key: str):
+    def __init__(self, user: str, password: str, ws_key: str,
+                 table_cache: alloggiatiweb_tables.TableCache = None,
+                 token_manager: alloggiatiweb_tokens.TokenManager = None,
+                 transport: soap_utils.SoapTransport = None):
         self._user = user
         self._password = password
         self._ws_key = ws_key
-        self._token= self._generate_token()
-        self._locations= None
+        self._tables= table_cache if table_cache is not None else alloggiatiweb_tables.default_cache
+        self._tokens= token_manager if token_manager is not None else alloggiatiweb_tokens.default_token_manager
+        self._transport= transport if transport is not None else soap_utils.default_transport
+
+
+    @property
+    def _token(self) -> Token:
+        # Generated on first use and reused until shortly before it expires
+        return self._tokens.get(self._user, self._generate_token)
 
 
     def authentication_test(self) -> Result:
@@ -55,7 +68,7 @@ class AlloggiatiWebApi:
               <token>{self._token.token}</token>
             </Authentication_Test>''')
         )
-        xml_response= soap_utils.make_request(self._url, soap_envelope)
+        xml_response= self._transport.make_request(self._url, soap_envelope)
         result = self._parse_response(xml_response)
         logging.info(f"'Authentication_Test' result: {result}")
         return result
@@ -69,13 +82,13 @@ class AlloggiatiWebApi:
               <Utente>{self._user}</Utente>
               <token>{self._token.token}</token>
               <ElencoSchedine>
-              {"".join([f"<string>{self._create_record(guest)}</string>" for guest in guests])}
+              {self._create_records(guests)}
               </ElencoSchedine>
               <IdAppartamento>{apartment_id}</IdAppartamento>
             </GestioneAppartamenti_Test>''')
         )
-        xml_response= soap_utils.make_request(self._url, soap_envelope)
-        result = self._parse_response(xml_response)
+        xml_response= self._transport.make_request(self._url, soap_envelope)
+        result = self._parse_response(xml_response, details=True)
         logging.info(f"'GestioneAppartamenti_Test' result: {result}")
         return result
 
@@ -88,12 +101,12 @@ class AlloggiatiWebApi:
               <Utente>{self._user}</Utente>
               <token>{self._token.token}</token>
               <ElencoSchedine>
-              {"".join([f"<string>{self._create_record(guest)}</string>" for guest in guests])}
+              {self._create_records(guests)}
               </ElencoSchedine>
             </Test>''')
         )
-        xml_response= soap_utils.make_request(self._url, soap_envelope)
-        result = self._parse_response(xml_response)
+        xml_response= self._transport.make_request(self._url, soap_envelope)
+        result = self._parse_response(xml_response, details=True)
         logging.info(f"'Test' result: {result}")
         return result
 
@@ -106,17 +119,22 @@ class AlloggiatiWebApi:
               <Utente>{self._user}</Utente>
               <token>{self._token.token}</token>
               <ElencoSchedine>
-              {"".join([f"<string>{self._create_record(guest)}</string>" for guest in guests])}
+              {self._create_records(guests)}
               </ElencoSchedine>
             </Send>''')
         )
-        xml_response= soap_utils.make_request(self._url, soap_envelope)
-        result = self._parse_response(xml_response)
+        # Send records the schedine: not retried once it may have reached the service
+        xml_response= self._transport.make_request(self._url, soap_envelope, idempotent=False)
+        result = self._parse_response(xml_response, details=True)
         logging.info(f"'Send' result: {result}")
         return result
 
 
-    def ricevuta(self, datetime: str) -> Result:
+    def ricevuta(self, datetime: str, pdf_file=None) -> Result:
+        """
+        With pdf_file (path or binary file), the receipt is decoded to the file while it
+        is downloaded, instead of being returned base64 encoded in data['PDF'].
+        """
         logging.info(f"Requesting 'Ricevuta' endpoint. datetime: {datetime}")
         soap_envelope = soap_utils.new_envelope(
             soap_utils.new_body(f'''
@@ -126,13 +144,21 @@ class AlloggiatiWebApi:
               <Data>{datetime.isoformat()}</Data>
             </Ricevuta>''')
         )
-        xml_response= soap_utils.make_request(self._url, soap_envelope)
+        if pdf_file is not None:
+            result = self._stream_response(soap_envelope, 'PDF', pdf_file, soap_utils.Base64FileSink)
+            logging.info(f"'Ricevuta' result: {result}")
+            return result
+        xml_response= self._transport.make_request(self._url, soap_envelope)
         result = self._parse_response(xml_response, ['PDF'])
         logging.info(f"'Ricevuta' result: {result}")
         return result
 
 
-    def tabella(self, table_type: TableType) -> Result:
+    def tabella(self, table_type: TableType, csv_file=None) -> Result:
+        """
+        With csv_file (path or binary file), the table is written to the file (UTF-8)
+        while it is downloaded, instead of being returned in data['CSV'].
+        """
         logging.info(f"Requesting 'Tabella' endpoint. Table type: {table_type}")
         soap_envelope = soap_utils.new_envelope(
             soap_utils.new_body(f'''
@@ -142,24 +168,38 @@ class AlloggiatiWebApi:
               <tipo>{table_type.value}</tipo>
             </Tabella>''')
         )
-        xml_response= soap_utils.make_request(self._url, soap_envelope)
+        if csv_file is not None:
+            result = self._stream_response(soap_envelope, 'CSV', csv_file, soap_utils.TextFileSink)
+            logging.info(f"'Tabella' result: {result}")
+            return result
+        xml_response= self._transport.make_request(self._url, soap_envelope)
         result = self._parse_response(xml_response, ['CSV'])
         logging.info(f"'Tabella' result: {result}")
         return result
 
 
-    def get_location(self, location_name: str):
-        if self._locations is None:
-            result= self.tabella(AlloggiatiWebApi.TableType.LOCATIONS)
+    def get_table(self, table_type: TableType) -> alloggiatiweb_tables.LookupTable:
+        # The apartments list depends on the account, the other tables are shared
+        key= table_type.value
+        if table_type == AlloggiatiWebApi.TableType.APARTMENTS_LIST:
+            key= f"{key}_{self._user}"
+
+        def fetch() -> str:
+            result= self.tabella(table_type)
             if not result.success:
                 raise RuntimeError(f"Error: {result.err_code} - {result.err_desc}")
-            csv_records = [x for x in result.data['CSV'].split("\n") if x != ""]
-            self._locations= []
-            for record in csv_records:
-                ss= record.split(";")
-                self._locations.append(AlloggiatiWebApi.Location(ss[0], ss[1], ss[2], ss[3]))
+            return result.data['CSV']
+
+        return self._tables.get(key, fetch)
+
 
-        return next((x for x in self._locations if x[1] == location_name), None)
+    def get_location(self, location_name: str, at: datetime = None):
+        """Location with the given name, preferring one valid at the given date (default: now)."""
+        return self.get_table(AlloggiatiWebApi.TableType.LOCATIONS).get_by_name(location_name, at)
+
+
+    def get_location_by_code(self, location_code: str):
+        return self.get_table(AlloggiatiWebApi.TableType.LOCATIONS).get_by_code(location_code)
 
 
     def _generate_token(self) -> Token:
@@ -171,7 +211,7 @@ class AlloggiatiWebApi:
               <WsKey>{self._ws_key}</WsKey>
             </GenerateToken>''')
         )
-        xml_response= soap_utils.make_request(self._url, soap_envelope)
+        xml_response= self._transport.make_request(self._url, soap_envelope)
         result= self._parse_response(xml_response)
         if not result.success:
             raise RuntimeError(f"Error: {result.err_code} - {result.err_desc}")
@@ -183,7 +223,12 @@ class AlloggiatiWebApi:
         return token
 
 
-    def _parse_response(self, node: ET.Element, data_fields: list = []) -> Result:
+    def _parse_response(self, node: ET.Element, data_fields: list = [], details: bool = False) -> Result:
+        """
+        With details, data['Dettaglio'] is the list of the per-schedina results
+        (one Result for each record sent, in order), empty if the service returned none,
+        and data['SchedineValide'] the number of valid schedine (None if missing).
+        """
         success = node.find('.//ns:esito', self._namespaces).text == "true"
         err_cod = node.find('.//ns:ErroreCod', self._namespaces).text
         err_des = node.find('.//ns:ErroreDes', self._namespaces).text
@@ -194,9 +239,39 @@ class AlloggiatiWebApi:
                 data[field] = node.find(f'.//ns:{field}', self._namespaces).text
         except AttributeError:
             data= None
+        if details:
+            data= data if data is not None else {}
+            data['Dettaglio'] = [self._parse_detail(x) for x in
+                                 node.findall('.//ns:Dettaglio/ns:EsitoOperazioneServizio', self._namespaces)]
+            valid = node.find('.//ns:SchedineValide', self._namespaces)
+            data['SchedineValide'] = int(valid.text) if valid is not None and valid.text else None
         return AlloggiatiWebApi.Result(success, err_cod, err_des, err_det, data)
 
 
+    def _parse_detail(self, node: ET.Element) -> Result:
+        def text(field):
+            child= node.find(f'ns:{field}', self._namespaces)
+            return child.text if child is not None else None
+        return AlloggiatiWebApi.Result(text('esito') == "true", text('ErroreCod'), text('ErroreDes'),
+                                       text('ErroreDettaglio'), None)
+
+
+    def _stream_response(self, soap_envelope: str, data_field: str, file, sink_type) -> Result:
+        # Fields parsed by _parse_response
+        error_fields = ['esito', 'ErroreCod', 'ErroreDes', 'ErroreDettaglio']
+        owns_file = isinstance(file, str)
+        f = open(file, 'wb') if owns_file else file
+        try:
+            fields = self._transport.make_streaming_request(self._url, soap_envelope, error_fields,
+                                                            {data_field: sink_type(f)})
+        finally:
+            if owns_file:
+                f.close()
+        data = {data_field: file} if fields[data_field] else None
+        return AlloggiatiWebApi.Result(fields['esito'] == "true", fields['ErroreCod'], fields['ErroreDes'],
+                                       fields['ErroreDettaglio'], data)
+
+
     def _create_record(self, guest: Guest) -> str:
         """
         Field                       |Length|Mandatory For 16, 17, 18|Mandatory for 19, 20|Notes
@@ -216,41 +291,9 @@ class AlloggiatiWebApi:
         Numero Documento            | 20   | Y                      | N                  |
         Luogo Rilascio Documento    | 9    | Y (Stato o Comune)     | N                  | Codice Tabella Stati o Comuni
         """
-        record= f"{AlloggiatiWebApi._guest_type_to_int(guest.guest_type):02d}"
-        record+= f"{AlloggiatiWebApi._datetime_to_str(guest.arrival_date)}"
-        record+= f"{guest.num_days:02d}"
-        record+= f"{guest.last_name}" + " "*(50-len(guest.last_name))
-        record+= f"{guest.first_name}" + " "*(30-len(guest.first_name))
-        record+= f"{AlloggiatiWebApi._guest_gender_to_str(guest.gender)}"
-        record+= f"{guest.birth_date}" + "0"*(10-len(guest.birth_date))
-        record+= f"{guest.birth_city}" + " "*(9-len(guest.birth_city))
-        record+= f"{guest.birth_province}" + " "*(2-len(guest.birth_province))
-        record+= f"{guest.birth_country}" + " "*(9-len(guest.birth_country))
-        record+= f"{guest.citizenship}" + " "*(9-len(guest.citizenship))
-        record+= f"{guest.document_type}" + " "*(5-len(guest.document_type))
-        record+= f"{guest.document_number}" + " "*(20-len(guest.document_number))
-        record+= f"{guest.document_issue_place}" + " "*(9-len(guest.document_issue_place))
-        return record
-
-
-    @staticmethod
-    def _guest_type_to_int(guest_type: GuestType) -> int:
-        return {
-            GuestType.SINGLE: 16,
-            GuestType.HOUSE_HEAD: 17,
-            GuestType.GROUP_LEADER: 18,
-            GuestType.FAMILY_MEMBER: 19,
-            GuestType.GROUP_MEMBER: 20
-        }[guest_type]
-
-    @staticmethod
-    def _guest_gender_to_str(gender: GuestGender) -> str:
-        return {
-            GuestGender.MALE: "1",
-            GuestGender.FEMALE: "2",
-            GuestGender.UNKNOWN: "X"
-        }[gender]
-
-    @staticmethod
-    def _datetime_to_str(dt: datetime) -> str:
-        return dt.strftime("%d/%m/%Y")
\ No newline at end of file
+        return default_codec.encode(guest)
+
+
+    def _create_records(self, guests: list) -> str:
+        # Records encoded in one pass and escaped, as names may contain XML special characters
+        return "".join([f"<string>{escape(record)}</string>" for record in default_codec.encode_many(guests)])
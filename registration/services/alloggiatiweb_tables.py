@@ -0,0 +1,186 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+import tempfile
+import threading
+
+"""
+Process-wide cache of the AlloggiatiWeb lookup tables ('Tabella' endpoint),
+persisted on disk and indexed by code and by name.
+"""
+
+# Row of the 'Luoghi' table. timestamp is the end of validity (DataFineVal), empty for current locations
+Location = namedtuple('Location', ['id', 'name', 'province', 'timestamp'])
+
+# Row of the other tables
+TableRow = namedtuple('TableRow', ['id', 'name', 'extra'])
+
+LOCATIONS_TABLE = 'Luoghi'
+
+_TIMESTAMP_FORMAT = "%d/%m/%Y %H:%M:%S"
+
+
+def parse_csv(csv_text: str) -> list:
+    """Split the CSV returned by 'Tabella' into lists of fields, skipping the header."""
+    records = []
+    for line in csv_text.split("\n"):
+        line = line.rstrip("\r")
+        if line == "":
+            continue
+        fields = line.split(";")
+        if not records and fields[0] == "Codice":
+            continue
+        records.append(fields)
+    return records
+
+
+def _make_row(table_name: str, fields: list):
+    if table_name.startswith(LOCATIONS_TABLE):
+        fields = fields + [""] * (4 - len(fields))
+        return Location(fields[0], fields[1], fields[2], fields[3])
+    return TableRow(fields[0], fields[1] if len(fields) > 1 else "", tuple(fields[2:]))
+
+
+def _is_valid(row, now: datetime) -> bool:
+    timestamp = getattr(row, 'timestamp', "")
+    if not timestamp:
+        return True
+    try:
+        return datetime.strptime(timestamp, _TIMESTAMP_FORMAT) > now
+    except ValueError:
+        return True
+
+
+class LookupTable:
+    """Parsed table with hash indexes by code and by name."""
+
+    def __init__(self, table_name: str, records: list, fetched_at: datetime):
+        self.table_name = table_name
+        self.records = records
+        self.fetched_at = fetched_at
+        self.rows = [_make_row(table_name, fields) for fields in records]
+        self._by_code = {}
+        self._by_name = {}
+        for row in self.rows:
+            self._by_code.setdefault(row.id, row)
+            self._by_name.setdefault(row.name, []).append(row)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get_by_code(self, code: str):
+        return self._by_code.get(code)
+
+    def get_by_name(self, name: str, at: datetime = None):
+        """
+        Row with the given name. Names are not unique (e.g. municipalities merged over
+        the years), so a row still valid at the given date (default: now) is preferred.
+        """
+        rows = self._by_name.get(name)
+        if not rows:
+            return None
+        if len(rows) > 1:
+            now = at or datetime.now()
+            return next((x for x in rows if _is_valid(x, now)), rows[0])
+        return rows[0]
+
+    def find_all_by_name(self, name: str) -> list:
+        return list(self._by_name.get(name, []))
+
+
+class TableCache:
+    """
+    Keeps the parsed tables in memory and in a local directory, and downloads a
+    table again only when the stored copy is older than max_age.
+
+    The tables carry no modification time (the Luoghi timestamp is an end of validity
+    date), so staleness is decided on the download time stored with each table.
+    """
+
+    def __init__(self, cache_dir: str = None, max_age: timedelta = timedelta(days=7)):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, fetch) -> LookupTable:
+        """
+        Table stored under the given key, refreshed with fetch() (returning the CSV
+        text) when missing or stale. If the refresh fails, a stale copy is used.
+        """
+        with self._lock:
+            table = self._tables.get(key)
+            if table is None:
+                table = self._load(key)
+            if table is not None and not self._is_stale(table):
+                self._tables[key] = table
+                return table
+
+            try:
+                csv_text = fetch()
+            except Exception:
+                if table is None:
+                    raise
+                logging.warning(f"Refresh of table '{key}' failed, using the copy of {table.fetched_at}")
+                self._tables[key] = table
+                return table
+
+            table = LookupTable(key, parse_csv(csv_text), datetime.now())
+            self._tables[key] = table
+            self._store(table)
+            return table
+
+    def invalidate(self, key: str = None):
+        """Forget a table (all the tables loaded by this process when key is None), in memory and on disk."""
+        with self._lock:
+            keys = [key] if key is not None else list(self._tables)
+            for k in keys:
+                self._tables.pop(k, None)
+                path = self._path(k)
+                if path and os.path.exists(path):
+                    os.remove(path)
+
+    def _is_stale(self, table: LookupTable) -> bool:
+        return self.max_age is not None and datetime.now() - table.fetched_at > self.max_age
+
+    def _path(self, key: str):
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, key: str):
+        path = self._path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                content = json.load(f)
+            return LookupTable(key, content['records'], datetime.fromisoformat(content['fetched_at']))
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ignoring unreadable cached table '{path}': {e}")
+            return None
+
+    def _store(self, table: LookupTable):
+        path = self._path(table.table_name)
+        if path is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file first, so other processes never read a partial table
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({'fetched_at': table.fetched_at.isoformat(), 'records': table.records}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Cannot store table '{table.table_name}' in '{self.cache_dir}': {e}")
+
+
+def default_cache_dir() -> str:
+    return os.environ.get("ALLOGGIATIWEB_CACHE_DIR",
+                          os.path.join(os.path.expanduser("~"), ".cache", "myguesthouse", "alloggiatiweb"))
+
+
+# Cache shared by all the AlloggiatiWebApi instances of the process
+default_cache = TableCache(default_cache_dir())
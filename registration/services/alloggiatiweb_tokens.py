@@ -0,0 +1,133 @@
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import os
+import tempfile
+import threading
+
+"""
+Reuse of the AlloggiatiWeb tokens ('GenerateToken' endpoint) until shortly
+before they expire, shared by threads and optionally by processes.
+"""
+
+# Token namedtuple, as returned by 'GenerateToken'
+Token = namedtuple('Token', ['issued', 'expires', 'token'])
+
+
+def parse_timestamp(value: str):
+    """Parse the 'issued'/'expires' timestamps (ISO 8601), None if not parsable."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class TokenManager:
+    """
+    Caches one token per user and generates a new one only when the cached token
+    expires within `margin`. Threads asking for the token of the same user while it
+    is being generated wait for that single request. With `token_file`, the tokens
+    are also stored in a local file and reused by other processes.
+    """
+
+    def __init__(self, margin: timedelta = timedelta(minutes=2), token_file: str = None,
+                 fallback_lifetime: timedelta = timedelta(minutes=30)):
+        self.margin = margin
+        self.token_file = token_file
+        # Lifetime assumed for tokens whose expiry cannot be parsed
+        self.fallback_lifetime = fallback_lifetime
+        self._tokens = {}
+        self._expiries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, user: str, generate) -> Token:
+        """Valid token of the user, calling generate() to get a new one when needed."""
+        with self._lock:
+            user_lock = self._locks.setdefault(user, threading.Lock())
+
+        with user_lock:
+            token = self._tokens.get(user)
+            if token is not None and self._is_valid(user):
+                return token
+
+            token = self._load(user)
+            if token is not None:
+                self._remember(user, token)
+                if self._is_valid(user):
+                    logging.debug(f"Reusing stored token for user {user}")
+                    return token
+
+            token = generate()
+            self._remember(user, token)
+            self._store(user, token)
+            return token
+
+    def invalidate(self, user: str):
+        """Forget the token of the user, e.g. after the service rejected it."""
+        with self._lock:
+            self._tokens.pop(user, None)
+            self._expiries.pop(user, None)
+        if self.token_file is not None:
+            self._update_file(lambda tokens: tokens.pop(user, None))
+
+    def _remember(self, user: str, token: Token):
+        expires = parse_timestamp(token.expires)
+        if expires is None:
+            expires = datetime.now(timezone.utc) + self.fallback_lifetime
+        self._tokens[user] = token
+        self._expiries[user] = expires
+
+    def _is_valid(self, user: str) -> bool:
+        expires = self._expiries.get(user)
+        if expires is None:
+            return False
+        now = datetime.now(expires.tzinfo) if expires.tzinfo else datetime.now()
+        return now + self.margin < expires
+
+    def _load(self, user: str):
+        if self.token_file is None:
+            return None
+        entry = self._read_file().get(user)
+        if not entry:
+            return None
+        try:
+            return Token(entry['issued'], entry['expires'], entry['token'])
+        except (KeyError, TypeError):
+            return None
+
+    def _store(self, user: str, token: Token):
+        if self.token_file is not None:
+            self._update_file(lambda tokens: tokens.__setitem__(user, token._asdict()))
+
+    def _read_file(self) -> dict:
+        try:
+            with open(self.token_file, encoding="utf-8") as f:
+                tokens = json.load(f)
+            return tokens if isinstance(tokens, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable token file '{self.token_file}': {e}")
+            return {}
+
+    def _update_file(self, change):
+        tokens = self._read_file()
+        change(tokens)
+        directory = os.path.dirname(os.path.abspath(self.token_file))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # mkstemp creates the file readable by the owner only
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(tokens, f)
+            os.replace(tmp_path, self.token_file)
+        except OSError as e:
+            logging.warning(f"Cannot store tokens in '{self.token_file}': {e}")
+
+
+# Token manager shared by all the AlloggiatiWebApi instances of the process
+default_token_manager = TokenManager(token_file=os.environ.get("ALLOGGIATIWEB_TOKEN_FILE"))
@@ -0,0 +1,164 @@
+from registration.models.guest import GuestType
+from registration.services.alloggiatiweb_api import AlloggiatiWebApi
+from registration.services.mrz_cache import MrzCache
+from registration.services.mrz_reader import MrzReader
+from registration.services.schedina_validator import SchedinaValidator, STATE_PROVINCE
+from registration.utils import mrz_mapping
+from registration.utils.schedina_codec import SchedinaCodec, default_codec
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+import logging
+import os
+
+"""
+Streaming check-in: document images are turned into schedina records through the
+stages OCR -> Guest -> location codes -> record. Each stage runs in its own thread
+pool and keeps a bounded number of items in flight, so the stages overlap and a
+group is processed at the pace of the slowest stage.
+"""
+
+# One guest to check in. The MRZ has no place of birth: birth_place is the municipality
+# for the guests born in Italy, birth_country defaults to the nationality, and
+# document_issue_place (a place name) to the state that issued the document
+CheckInItem = namedtuple('CheckInItem', ['image_path', 'guest_type', 'birth_place', 'birth_country',
+                                         'document_issue_place'], defaults=(None, None, None))
+
+# Outcome of one item, in input order (index). mrz: MRZ fields, guest: Guest with
+# location codes, record: schedina record; error/stage: exception and stage that failed
+CheckInResult = namedtuple('CheckInResult', ['index', 'item', 'mrz', 'guest', 'record', 'error', 'stage'])
+
+
+class CheckInPipeline:
+    STAGES = ('ocr', 'guest', 'locations', 'record')
+
+    def __init__(self, api: AlloggiatiWebApi, cache: MrzCache = None, ocr_workers: int = None,
+                 queue_size: int = 8, codec: SchedinaCodec = default_codec, validator: SchedinaValidator = None,
+                 read_mrz=None):
+        """
+        ocr_workers: OCR threads (one per CPU by default; Tesseract runs in its own process).
+        queue_size: items in flight in each stage.
+        validator: if given, the guests are validated before encoding.
+        read_mrz: function image path -> MRZ fields, default MrzReader.read_mrz_from_image.
+        """
+        if queue_size <= 0:
+            raise ValueError("queue_size must be positive")
+        self._api = api
+        self.cache = cache
+        self.ocr_workers = ocr_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.codec = codec
+        self.validator = validator
+        self._read_mrz = read_mrz or self._read_mrz_fields
+
+    def run(self, items, arrival_date: datetime, num_days: int):
+        """
+        Process the items (CheckInItem, or image paths of group members) lazily, yielding
+        a CheckInResult for each of them in input order. An item failing in a stage skips
+        the following ones and is reported with its error.
+        """
+        def to_guest(result: CheckInResult) -> CheckInResult:
+            item = result.item
+            return result._replace(guest=mrz_mapping.mrz_to_guest(
+                result.mrz, item.guest_type, arrival_date, num_days,
+                item.birth_place, item.birth_country, item.document_issue_place))
+
+        stages = (
+            (self._ocr, self.ocr_workers),
+            (to_guest, 1),
+            (self._resolve_locations, 1),
+            (self._encode, 1),
+        )
+        executors = [ThreadPoolExecutor(max_workers=workers) for _, workers in stages]
+        try:
+            results = (CheckInResult(index, self._to_item(item), None, None, None, None, None)
+                       for index, item in enumerate(items))
+            for (func, _), name, executor in zip(stages, self.STAGES, executors):
+                results = self._stage(executor, func, name, results)
+            for result in results:
+                if result.error is not None:
+                    logging.warning(f"Check-in of {result.item.image_path} failed in stage "
+                                    f"'{result.stage}': {result.error}")
+                yield result
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def records(self, items, arrival_date: datetime, num_days: int) -> tuple:
+        """Run the pipeline to the end: (records of the guests processed, failed results)."""
+        records, errors = [], []
+        for result in self.run(items, arrival_date, num_days):
+            if result.error is None:
+                records.append(result.record)
+            else:
+                errors.append(result)
+        return records, errors
+
+    def _stage(self, executor: ThreadPoolExecutor, func, name: str, results):
+        # Bounded queue of futures between the previous stage and the next one: at most
+        # queue_size items are in flight, and the results leave in input order
+        pending = deque()
+        for result in results:
+            pending.append(executor.submit(self._apply, func, name, result))
+            if len(pending) >= self.queue_size:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    @staticmethod
+    def _apply(func, name: str, result: CheckInResult) -> CheckInResult:
+        if result.error is not None:
+            return result
+        try:
+            return func(result)
+        except Exception as e:
+            return result._replace(error=e, stage=name)
+
+    @staticmethod
+    def _to_item(item) -> CheckInItem:
+        return item if isinstance(item, CheckInItem) else CheckInItem(item, GuestType.GROUP_MEMBER)
+
+    def _read_mrz_fields(self, image_path: str) -> dict:
+        return MrzReader.read_mrz_from_image(image_path, cache=self.cache)
+
+    def _ocr(self, result: CheckInResult) -> CheckInResult:
+        mrz = self._read_mrz(result.item.image_path)
+        if not mrz:
+            raise ValueError("No MRZ found")
+        return result._replace(mrz=mrz)
+
+    def _resolve_locations(self, result: CheckInResult) -> CheckInResult:
+        guest = result.guest
+        birth_date = datetime.strptime(guest.birth_date, "%d/%m/%Y")
+        birth_country = self._location(guest.birth_country, birth_date)
+        if birth_country.name == mrz_mapping.ITALY:
+            if not guest.birth_city:
+                raise ValueError("The place of birth is mandatory for the guests born in Italy")
+            birth_city = self._location(guest.birth_city, birth_date)
+            if birth_city.province == STATE_PROVINCE:
+                raise ValueError(f"'{guest.birth_city}' is a state, not a municipality")
+            birth_city_code, birth_province = birth_city.id, birth_city.province
+        else:
+            birth_city_code, birth_province = "", ""
+
+        issue_place = guest.document_issue_place
+        if issue_place:
+            issue_place = self._location(issue_place, guest.arrival_date).id
+        return result._replace(guest=replace(
+            guest, birth_city=birth_city_code, birth_province=birth_province, birth_country=birth_country.id,
+            citizenship=self._location(guest.citizenship, guest.arrival_date).id,
+            document_issue_place=issue_place))
+
+    def _location(self, name: str, at: datetime):
+        location = self._api.get_location(name.upper(), at)
+        if location is None:
+            raise ValueError(f"Unknown location: '{name}'")
+        return location
+
+    def _encode(self, result: CheckInResult) -> CheckInResult:
+        if self.validator is not None:
+            errors = self.validator.validate_guest(result.guest)
+            if errors:
+                raise ValueError("; ".join(f"{field}: {message}" for field, message in errors))
+        return result._replace(record=self.codec.encode(result.guest))
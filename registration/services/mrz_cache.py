@@ -0,0 +1,89 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+"""
+Persistent cache of the MRZ read from document images, keyed by the SHA-256 of
+the image bytes, so that rescanning the same image does not run the OCR again.
+"""
+
+
+def image_hash(image_path: str) -> str:
+    """SHA-256 (hex) of the content of an image file."""
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MrzCache:
+    """
+    MRZ fields (the dictionary of passporteye's MRZ.to_dict(), with 'valid_score'),
+    stored in a SQLite file (in memory when path is None). When there are more than
+    max_entries entries, the least recently used ones are evicted.
+    """
+
+    # last_used is a counter rather than a time, so the order of uses is exact (and survives clock changes)
+    _NEXT_USE = "(SELECT COALESCE(MAX(last_used), 0) + 1 FROM mrz)"
+
+    def __init__(self, path: str = None, max_entries: int = 10000):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.path = path
+        self.max_entries = max_entries
+        if path is not None and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path or ":memory:", check_same_thread=False, isolation_level=None)
+        self._connection.execute('''CREATE TABLE IF NOT EXISTS mrz (
+                                        key TEXT PRIMARY KEY,
+                                        fields TEXT NOT NULL,
+                                        valid_score INTEGER,
+                                        last_used INTEGER NOT NULL)''')
+        self._connection.execute("CREATE INDEX IF NOT EXISTS ix_mrz_last_used ON mrz (last_used)")
+
+    def get(self, key: str):
+        """Fields stored under the key (an empty dictionary if the image has no MRZ), None if missing."""
+        with self._lock:
+            row = self._connection.execute("SELECT fields FROM mrz WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(f"UPDATE mrz SET last_used = {self._NEXT_USE} WHERE key = ?", (key,))
+        return json.loads(row[0])
+
+    def put(self, key: str, fields: dict):
+        """Store the fields of an image (None if it has no MRZ), evicting the least recently used entries."""
+        fields = dict(fields or {})
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO mrz (key, fields, valid_score, last_used) "
+                                     f"VALUES (?, ?, ?, {self._NEXT_USE})",
+                                     (key, json.dumps(fields), fields.get('valid_score')))
+            evicted = self._connection.execute("DELETE FROM mrz WHERE key IN "
+                                               "(SELECT key FROM mrz ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                                               (self.max_entries,)).rowcount
+        if evicted:
+            logging.debug(f"Evicted {evicted} entries from the MRZ cache")
+
+    def invalidate(self, key: str = None):
+        """Remove an entry (all the entries when key is None)."""
+        with self._lock:
+            if key is None:
+                self._connection.execute("DELETE FROM mrz")
+            else:
+                self._connection.execute("DELETE FROM mrz WHERE key = ?", (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM mrz").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+def default_cache_path() -> str:
+    return os.environ.get("MRZ_CACHE_PATH",
+                          os.path.join(os.path.expanduser("~"), ".cache", "myguesthouse", "mrz.sqlite"))
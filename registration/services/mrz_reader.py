@@ -1,10 +1,136 @@
 import logging
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from passporteye import read_mrz
+from registration.services.mrz_cache import MrzCache, image_hash
+from registration.utils.mrz_preprocessing import default_preprocessor
+
+# Outcome of reading one image of a batch: mrz holds the MRZ fields, None if no MRZ was
+# found; error is the exception raised while reading the image (or None)
+MrzResult = namedtuple('MrzResult', ['image_path', 'mrz', 'error'])
+
+
+def _read_mrz(image_path: str, save_roi: bool, preprocess: bool) -> dict:
+    # PDF files are left to passporteye, which extracts their first image
+    if preprocess and not image_path.lower().endswith('.pdf'):
+        mrz = default_preprocessor.read_mrz(image_path, save_roi=save_roi)
+    else:
+        mrz = read_mrz(image_path, save_roi=save_roi)
+    return _to_fields(mrz, save_roi)
+
+
+def _read_mrz_worker(image_path: str, save_roi: bool, preprocess: bool):
+    # Run in the worker processes. Some exceptions (e.g. pytesseract's TesseractNotFoundError)
+    # cannot be unpickled and would break the whole pool, so they are sent back as RuntimeError
+    try:
+        return _read_mrz(image_path, save_roi, preprocess)
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def _to_fields(mrz, save_roi: bool = False) -> dict:
+    if mrz is None:
+        return None
+    fields = dict(mrz.to_dict())
+    if save_roi:
+        fields['roi'] = mrz.aux.get('roi')
+    return fields
+
+
+def _check_cache_options(save_roi: bool):
+    if save_roi:
+        raise ValueError("save_roi cannot be used with a cache: the region of interest is not cached")
+
 
 class MrzReader:
     @staticmethod
-    def read_mrz_from_image(image_path: str) -> dict:
+    def read_mrz_from_image(image_path: str, save_roi: bool = False, cache: MrzCache = None,
+                            preprocess: bool = False) -> dict:
+        """
+        Read the MRZ of one image and return its fields (passporteye's MRZ.to_dict()),
+        or None if no MRZ was found. Earlier versions returned passporteye's MRZ object.
+        With save_roi, the region of interest is kept in fields['roi'] (it is a full
+        image array, so it is not kept by default).
+        With preprocess, the MRZ is first searched in a downscaled crop of the image
+        (see MrzPreprocessor), and in the original image only if not found there. It is
+        off by default until its OCR results have been checked on real scans.
+
+        With a cache, an image with the same content as one already read is not read again.
+        """
         logging.info(f"Reading MRZ from image: {image_path}")
-        mrz = read_mrz(image_path, save_roi=True)
-        logging.info(f"MRZ: {mrz}")
-        return mrz
\ No newline at end of file
+        if cache is None:
+            fields = _read_mrz(image_path, save_roi, preprocess)
+            logging.info(f"MRZ: {fields}")
+            return fields
+
+        _check_cache_options(save_roi)
+        key = image_hash(image_path)
+        fields = cache.get(key)
+        if fields is not None:
+            logging.info(f"MRZ (cached): {fields}")
+            return fields or None
+        fields = _read_mrz(image_path, save_roi, preprocess)
+        cache.put(key, fields)
+        logging.info(f"MRZ: {fields}")
+        return fields
+
+    @staticmethod
+    def read_mrz_from_images(image_paths: list, max_workers: int = None, save_roi: bool = False,
+                             cache: MrzCache = None, preprocess: bool = False):
+        """
+        Read the MRZ of several images in a pool of processes (one per CPU by default).
+        Yields a MrzResult for each image as soon as it is read, so not in input order.
+        An error on one image is reported in its result and does not stop the others.
+        The results hold the MRZ fields, as returned by read_mrz_from_image.
+
+        With a cache, the cached images are yielded first, and images with the same
+        content are read once.
+        """
+        # Images to read, each with its cache key and the paths that share its content
+        groups = []
+        if cache is None:
+            groups = [(None, [path]) for path in image_paths]
+        else:
+            _check_cache_options(save_roi)
+            by_key = {}
+            for path in image_paths:
+                try:
+                    key = image_hash(path)
+                except OSError as e:
+                    yield MrzResult(path, None, e)
+                    continue
+                fields = cache.get(key)
+                if fields is not None:
+                    yield MrzResult(path, fields or None, None)
+                elif key in by_key:
+                    by_key[key].append(path)
+                else:
+                    by_key[key] = [path]
+                    groups.append((key, by_key[key]))
+        if not groups:
+            return
+
+        max_workers = min(max_workers or os.cpu_count() or 1, len(groups))
+        logging.info(f"Reading MRZ from {len(groups)} images with {max_workers} processes")
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {executor.submit(_read_mrz_worker, paths[0], save_roi, preprocess): (key, paths)
+                       for key, paths in groups}
+            for future in as_completed(futures):
+                key, paths = futures[future]
+                try:
+                    mrz = future.result()
+                except Exception as e:
+                    logging.warning(f"Cannot read MRZ from image {paths[0]}: {e}")
+                    for path in paths:
+                        yield MrzResult(path, None, e)
+                    continue
+                if cache is not None:
+                    cache.put(key, mrz)
+                logging.info(f"MRZ of {paths[0]}: {mrz}")
+                for path in paths:
+                    yield MrzResult(path, mrz, None)
+        finally:
+            # If the caller stops early, the images not yet started are dropped
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,182 @@
+from registration.models.guest import Guest, GuestType, GuestGender
+from registration.services import alloggiatiweb_tables
+from registration.services.alloggiatiweb_api import AlloggiatiWebApi
+from registration.utils.schedina_codec import SCHEDINA_LAYOUT, GUEST_TYPE_CODES
+from collections import namedtuple
+from datetime import datetime
+import os
+
+"""
+Offline validation of schedine against the AlloggiatiWeb tables, applying the
+rules documented in AlloggiatiWebApi._create_record.
+"""
+
+# Error on one field of one guest; index is the guest position in the validated list
+FieldError = namedtuple('FieldError', ['index', 'field', 'message'])
+
+# Code of Italy in the Luoghi table
+ITALY = "100000100"
+
+# Province of the Luoghi rows that are states ("estero")
+STATE_PROVINCE = "ES"
+
+MAX_DAYS = 30
+
+# Types for which the document fields are mandatory (16, 17, 18)
+_DOCUMENT_HOLDERS = {GuestType.SINGLE, GuestType.HOUSE_HEAD, GuestType.GROUP_LEADER}
+
+_LENGTHS = {x.name: x.length for x in SCHEDINA_LAYOUT}
+
+
+class SchedinaValidator:
+    def __init__(self, locations: alloggiatiweb_tables.LookupTable,
+                 document_types: alloggiatiweb_tables.LookupTable,
+                 guest_types: alloggiatiweb_tables.LookupTable):
+        self._locations = locations
+        self._document_types = document_types
+        self._guest_types = guest_types
+
+
+    @staticmethod
+    def from_api(api: AlloggiatiWebApi) -> 'SchedinaValidator':
+        """Validator on the tables of the API (downloaded once, then cached)."""
+        return SchedinaValidator(api.get_table(AlloggiatiWebApi.TableType.LOCATIONS),
+                                 api.get_table(AlloggiatiWebApi.TableType.DOCUMENT_TYPES),
+                                 api.get_table(AlloggiatiWebApi.TableType.GUEST_TYPES))
+
+
+    @staticmethod
+    def from_csv_dir(tables_dir: str) -> 'SchedinaValidator':
+        """Validator on the tables exported as CSV files (e.g. registration/tables)."""
+        def load(table_type: AlloggiatiWebApi.TableType) -> alloggiatiweb_tables.LookupTable:
+            path = os.path.join(tables_dir, f"{table_type.value}.csv")
+            with open(path, encoding="utf-8") as f:
+                records = alloggiatiweb_tables.parse_csv(f.read())
+            return alloggiatiweb_tables.LookupTable(table_type.value, records,
+                                                    datetime.fromtimestamp(os.path.getmtime(path)))
+        return SchedinaValidator(load(AlloggiatiWebApi.TableType.LOCATIONS),
+                                 load(AlloggiatiWebApi.TableType.DOCUMENT_TYPES),
+                                 load(AlloggiatiWebApi.TableType.GUEST_TYPES))
+
+
+    def validate(self, guests: list) -> list:
+        """All the errors of the guests, in order; an empty list if all of them are valid."""
+        errors = []
+        for index, guest in enumerate(guests):
+            errors.extend(FieldError(index, field, message) for field, message in self.validate_guest(guest))
+        return errors
+
+
+    def validate_guest(self, guest: Guest) -> list:
+        """Errors of one guest, as (field, message) tuples."""
+        errors = []
+
+        def error(field: str, message: str):
+            errors.append((field, message))
+
+        if guest.guest_type not in GUEST_TYPE_CODES or \
+                self._guest_types.get_by_code(GUEST_TYPE_CODES[guest.guest_type]) is None:
+            error('guest_type', f"Unknown guest type: {guest.guest_type}")
+
+        if not isinstance(guest.arrival_date, datetime):
+            error('arrival_date', "Arrival date must be a datetime")
+
+        if not isinstance(guest.num_days, int) or not 1 <= guest.num_days <= MAX_DAYS:
+            error('num_days', f"Number of days must be between 1 and {MAX_DAYS}")
+
+        for field in ('last_name', 'first_name'):
+            self._check_text(guest, field, True, error)
+
+        if not isinstance(guest.gender, GuestGender):
+            error('gender', f"Unknown gender: {guest.gender}")
+
+        birth_date = self._parse_date(guest.birth_date)
+        if birth_date is None:
+            error('birth_date', "Birth date must be in the format gg/mm/aaaa")
+        elif isinstance(guest.arrival_date, datetime) and birth_date > guest.arrival_date:
+            error('birth_date', "Birth date after the arrival date")
+
+        reference_date = guest.arrival_date if isinstance(guest.arrival_date, datetime) else datetime.now()
+
+        self._check_state(guest, 'birth_country', birth_date or reference_date, error)
+        self._check_state(guest, 'citizenship', reference_date, error)
+
+        # note-1: place and province of birth are mandatory for the guests born in Italy
+        if guest.birth_country == ITALY:
+            city = self._check_location(guest, 'birth_city', birth_date or reference_date, error)
+            if city is not None:
+                if city.province == STATE_PROVINCE:
+                    error('birth_city', f"'{guest.birth_city}' is a state, not a municipality")
+                elif guest.birth_province != city.province:
+                    error('birth_province', f"Province of '{city.name}' is '{city.province}'")
+        else:
+            for field in ('birth_city', 'birth_province'):
+                self._check_text(guest, field, False, error)
+
+        mandatory = guest.guest_type in _DOCUMENT_HOLDERS
+        if mandatory or guest.document_type:
+            if self._check_text(guest, 'document_type', mandatory, error) and \
+                    self._document_types.get_by_code(guest.document_type) is None:
+                error('document_type', f"Unknown document type: '{guest.document_type}'")
+        self._check_text(guest, 'document_number', mandatory, error)
+        if mandatory or guest.document_issue_place:
+            self._check_location(guest, 'document_issue_place', reference_date, error)
+
+        return errors
+
+
+    def _check_text(self, guest: Guest, field: str, mandatory: bool, error) -> bool:
+        """True if the field is a non-empty string that fits in the record."""
+        value = getattr(guest, field)
+        if value is None or value == "":
+            if mandatory:
+                error(field, "Mandatory field")
+            return False
+        if not isinstance(value, str):
+            error(field, "Must be a string")
+            return False
+        if len(value) > _LENGTHS[field]:
+            error(field, f"Longer than {_LENGTHS[field]} characters")
+            return False
+        return True
+
+
+    def _check_location(self, guest: Guest, field: str, at: datetime, error):
+        """Location of the field, checking that it exists and was valid at the given date."""
+        if not self._check_text(guest, field, True, error):
+            return None
+        code = getattr(guest, field)
+        location = self._locations.get_by_code(code)
+        if location is None:
+            error(field, f"Unknown location code: '{code}'")
+            return None
+        end = self._parse_timestamp(location.timestamp)
+        if end is not None and end < at:
+            error(field, f"'{location.name}' ({code}) no longer valid since {location.timestamp}")
+        return location
+
+
+    def _check_state(self, guest: Guest, field: str, at: datetime, error):
+        location = self._check_location(guest, field, at, error)
+        if location is not None and location.province != STATE_PROVINCE:
+            error(field, f"'{location.name}' ({location.id}) is not a state")
+
+
+    @staticmethod
+    def _parse_date(value):
+        if not isinstance(value, str) or len(value) != 10:
+            return None
+        try:
+            return datetime.strptime(value, "%d/%m/%Y")
+        except ValueError:
+            return None
+
+
+    @staticmethod
+    def _parse_timestamp(value: str):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%d/%m/%Y %H:%M:%S")
+        except ValueError:
+            return None
@@ -0,0 +1,173 @@
+from registration.services.alloggiatiweb_api import AlloggiatiWebApi
+from registration.services.schedina_validator import SchedinaValidator
+from registration.utils.soap_utils import SoapTransport
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+import logging
+import requests
+
+"""
+Submission pipeline for the AlloggiatiWeb 'Send' endpoint: guests are split into
+batches, optionally validated with the 'Test' endpoint, sent concurrently and
+the results mapped back to each guest.
+"""
+
+class SubmissionStatus(Enum):
+    ACCEPTED = "Accepted"
+    REJECTED = "Rejected"
+    RETRY = "Retry"
+    # The schedina may have been recorded but its outcome cannot be told: check it (e.g. with
+    # Ricevuta) before sending it again
+    UNKNOWN = "Unknown"
+
+# Outcome for one guest; index is its position in the submitted list
+GuestResult = namedtuple('GuestResult', ['index', 'guest', 'status', 'err_code', 'err_desc', 'err_detail'])
+
+
+class SubmissionReport:
+    def __init__(self, results: list):
+        self.results = sorted(results, key=lambda x: x.index)
+
+    @property
+    def accepted(self) -> list:
+        return [x for x in self.results if x.status == SubmissionStatus.ACCEPTED]
+
+    @property
+    def rejected(self) -> list:
+        return [x for x in self.results if x.status == SubmissionStatus.REJECTED]
+
+    @property
+    def retry(self) -> list:
+        return [x for x in self.results if x.status == SubmissionStatus.RETRY]
+
+    @property
+    def unknown(self) -> list:
+        return [x for x in self.results if x.status == SubmissionStatus.UNKNOWN]
+
+    @property
+    def success(self) -> bool:
+        return all(x.status == SubmissionStatus.ACCEPTED for x in self.results)
+
+    def __repr__(self):
+        return (f"SubmissionReport(accepted={len(self.accepted)}, rejected={len(self.rejected)}, "
+                f"retry={len(self.retry)}, unknown={len(self.unknown)})")
+
+
+class SchedineSubmitter:
+    # Maximum number of schedine in one request
+    DEFAULT_BATCH_SIZE = 1000
+
+    def __init__(self, api: AlloggiatiWebApi, batch_size: int = DEFAULT_BATCH_SIZE, max_workers: int = 4,
+                 pre_validate: bool = True, validator: SchedinaValidator = None):
+        """
+        With a validator, the guests are first checked offline and the invalid ones are
+        rejected without any request.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        self._api = api
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.pre_validate = pre_validate
+        self.validator = validator
+
+
+    def submit(self, guests: list) -> SubmissionReport:
+        """
+        Send the guests. With pre_validate, the batches are first checked with the
+        'Test' endpoint and only the valid guests are sent.
+
+        A 'Send' request failing after it may have reached the service leaves its guests
+        UNKNOWN, since sending them again could register them twice. They are RETRY only
+        if the connection could not be established.
+        """
+        indexed, results = self._validate_offline(guests)
+        if self.pre_validate:
+            valid = []
+            for result in self._run(self._api.test_schedine, indexed):
+                if result.status == SubmissionStatus.ACCEPTED:
+                    valid.append((result.index, result.guest))
+                else:
+                    results.append(result)
+            indexed = valid
+        results.extend(self._run(self._api.send_schedine, indexed, idempotent=False))
+        report = SubmissionReport(results)
+        logging.info(f"Schedine submission: {report}")
+        return report
+
+
+    def validate(self, guests: list, apartment_id: int = None) -> SubmissionReport:
+        """Check the guests with the 'Test' endpoint ('GestioneAppartamenti_Test' for an apartment)."""
+        if apartment_id is None:
+            endpoint = self._api.test_schedine
+        else:
+            endpoint = lambda batch: self._api.gestione_appartamenti_test(apartment_id, batch)
+        indexed, results = self._validate_offline(guests)
+        return SubmissionReport(results + self._run(endpoint, indexed))
+
+
+    def _validate_offline(self, guests: list) -> tuple:
+        """Guests passing the offline validation (with their index) and results of the others."""
+        if self.validator is None:
+            return list(enumerate(guests)), []
+        errors = {}
+        for error in self.validator.validate(guests):
+            errors.setdefault(error.index, []).append(f"{error.field}: {error.message}")
+        valid = [(index, guest) for index, guest in enumerate(guests) if index not in errors]
+        results = [GuestResult(index, guests[index], SubmissionStatus.REJECTED, None, "Invalid schedina",
+                               "; ".join(messages))
+                   for index, messages in errors.items()]
+        return valid, results
+
+
+    def _run(self, endpoint, indexed: list, idempotent: bool = True) -> list:
+        batches = [indexed[i:i + self.batch_size] for i in range(0, len(indexed), self.batch_size)]
+        if not batches:
+            return []
+        results = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            for batch_results in executor.map(lambda batch: self._run_batch(endpoint, batch, idempotent), batches):
+                results.extend(batch_results)
+        return results
+
+
+    @staticmethod
+    def _run_batch(endpoint, batch: list, idempotent: bool = True) -> list:
+        try:
+            result = endpoint([guest for _, guest in batch])
+        except Exception as e:
+            # A timeout, a dropped connection or an error status may come after the service
+            # recorded the batch: unless nothing was sent, the guests are not sent again blindly
+            if idempotent or (isinstance(e, requests.ConnectionError) and SoapTransport._connect_failed(e)):
+                status = SubmissionStatus.RETRY
+            else:
+                status = SubmissionStatus.UNKNOWN
+            logging.warning(f"Batch of {len(batch)} schedine failed: {e}, marked {status.value}")
+            return [GuestResult(index, guest, status, None, type(e).__name__, str(e)) for index, guest in batch]
+
+        data = result.data or {}
+        details = data.get('Dettaglio') or []
+        if len(details) == len(batch):
+            return [GuestResult(index, guest,
+                                SubmissionStatus.ACCEPTED if detail.success else SubmissionStatus.REJECTED,
+                                detail.err_code, detail.err_desc, detail.err_detail)
+                    for (index, guest), detail in zip(batch, details)]
+
+        # No per-schedina outcome. A failed batch cannot be attributed to a guest, so it is left
+        # to be retried. A successful one applies to every guest only if SchedineValide says that
+        # all of them, or none, were valid
+        if not result.success:
+            status = SubmissionStatus.RETRY
+        else:
+            valid = data.get('SchedineValide')
+            logging.warning(f"Batch of {len(batch)} schedine: {len(details)} results in Dettaglio, "
+                            f"SchedineValide {valid}")
+            if valid == len(batch):
+                status = SubmissionStatus.ACCEPTED
+            elif valid == 0:
+                status = SubmissionStatus.REJECTED
+            else:
+                status = SubmissionStatus.UNKNOWN
+        return [GuestResult(index, guest, status, result.err_code, result.err_desc, result.err_detail)
+                for index, guest in batch]
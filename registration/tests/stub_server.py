@@ -0,0 +1,191 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import base64
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+
+"""
+Local HTTP server answering SOAP requests with canned responses, for tests and benchmarks.
+"""
+
+SOAP_RESPONSE = '''<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://www.w3.org/2003/05/soap-envelope">
+  <soap:Body>
+    <Authentication_TestResponse xmlns="AlloggiatiService">
+      <Authentication_TestResult>
+        <esito>true</esito>
+        <ErroreCod />
+        <ErroreDes />
+        <ErroreDettaglio />
+      </Authentication_TestResult>
+    </Authentication_TestResponse>
+  </soap:Body>
+</soap:Envelope>'''
+
+# Envelope of the AlloggiatiWebStub responses: operation, result fields and operation-specific elements
+_ENVELOPE = '''<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://www.w3.org/2003/05/soap-envelope">
+  <soap:Body>
+    <{operation}Response xmlns="AlloggiatiService">
+      {result}
+      {content}
+    </{operation}Response>
+  </soap:Body>
+</soap:Envelope>'''
+
+_OPERATION = re.compile(r'<(\w+)\s+xmlns="AlloggiatiService"')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Listen backlog for load tests with many concurrent clients
+    request_queue_size = 128
+
+
+class StubServer:
+    """
+    Serves `responses` in order, each a (status, body) tuple; the last one is repeated.
+    Runs in a background thread, with HTTP/1.1 keep-alive.
+    """
+
+    def __init__(self, responses: list = None):
+        self.responses = list(responses or [(200, SOAP_RESPONSE)])
+        self.requests = []
+        self.connections = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode("utf-8")
+                with stub._lock:
+                    stub.requests.append(body)
+                status, response = stub._respond(body)
+                data = response.encode("utf-8")
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/soap+xml; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/service/service.asmx"
+
+    def _respond(self, body: str) -> tuple:
+        # Called by the handler threads: (status, response body) for a request body
+        with self._lock:
+            return self.responses[0] if len(self.responses) == 1 else self.responses.pop(0)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class AlloggiatiWebStub(StubServer):
+    """
+    Stand-in for the AlloggiatiWeb service.asmx (SOAP 1.2) endpoints used by AlloggiatiWebApi:
+    GenerateToken, Authentication_Test, Test, Send, GestioneAppartamenti_Test, Tabella and Ricevuta.
+
+    latency: seconds added to every response, plus a uniform random delay up to `jitter`;
+        `latencies` overrides it per operation.
+    error_rate: fraction of requests answered with esito false (error code "ERR").
+    http_error_rate: fraction of requests answered with status `http_error_status` (retried by SoapTransport).
+    record_error_rate: fraction of the schedine rejected in the details of Test, Send and GestioneAppartamenti_Test.
+    table_rows: rows of the CSV returned by Tabella (Luoghi format, the first row is ROMA).
+    receipt_size: bytes of the PDF returned by Ricevuta.
+    `operations` counts the requests by operation.
+    """
+
+    def __init__(self, latency: float = 0, jitter: float = 0, latencies: dict = None, error_rate: float = 0,
+                 http_error_rate: float = 0, http_error_status: int = 503, record_error_rate: float = 0,
+                 table_rows: int = 100, receipt_size: int = 10000, seed: int = None):
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.latencies = dict(latencies or {})
+        self.error_rate = error_rate
+        self.http_error_rate = http_error_rate
+        self.http_error_status = http_error_status
+        self.record_error_rate = record_error_rate
+        self.operations = Counter()
+        self._random = random.Random(seed)
+        # Payloads built once: their size, not their generation, is what is being measured
+        self._csv = self._make_csv(table_rows)
+        self._pdf = base64.encodebytes(self._random.randbytes(receipt_size)).decode("ascii")
+
+    def _respond(self, body: str) -> tuple:
+        match = _OPERATION.search(body)
+        operation = match.group(1) if match else None
+        with self._lock:
+            self.operations[operation] += 1
+            delay = self.latencies.get(operation, self.latency) + self._random.uniform(0, self.jitter)
+            http_error = self._random.random() < self.http_error_rate
+            error = self._random.random() < self.error_rate
+            records = body.count("<string>")
+            rejected = [self._random.random() < self.record_error_rate for _ in range(records)]
+        if delay > 0:
+            time.sleep(delay)
+
+        if http_error:
+            return self.http_error_status, "Service unavailable"
+        if operation not in ('GenerateToken', 'Authentication_Test', 'Test', 'Send', 'GestioneAppartamenti_Test',
+                             'Tabella', 'Ricevuta'):
+            return 500, f"Unknown operation: {operation}"
+
+        result = self._result(operation + "Result", not error)
+        content = ""
+        if error:
+            return 200, _ENVELOPE.format(operation=operation, result=result, content=content)
+
+        if operation == 'GenerateToken':
+            issued = datetime.now()
+            result = (f"<GenerateTokenResult><issued>{issued.isoformat()}</issued>"
+                      f"<expires>{(issued + timedelta(minutes=30)).isoformat()}</expires>"
+                      f"<token>{uuid.uuid4()}</token></GenerateTokenResult>" + self._result("result", True))
+        elif operation in ('Test', 'Send', 'GestioneAppartamenti_Test'):
+            details = "".join(self._result("EsitoOperazioneServizio", not x, "13") for x in rejected)
+            content = (f"<result><SchedineValide>{rejected.count(False)}</SchedineValide>"
+                       f"<Dettaglio>{details}</Dettaglio></result>")
+        elif operation == 'Tabella':
+            content = f"<CSV>{self._csv}</CSV>"
+        elif operation == 'Ricevuta':
+            content = f"<PDF>{self._pdf}</PDF>"
+        return 200, _ENVELOPE.format(operation=operation, result=result, content=content)
+
+    @staticmethod
+    def _result(element: str, success: bool, code: str = "ERR") -> str:
+        if success:
+            return f"<{element}><esito>true</esito><ErroreCod /><ErroreDes /><ErroreDettaglio /></{element}>"
+        return (f"<{element}><esito>false</esito><ErroreCod>{code}</ErroreCod><ErroreDes>Errore simulato</ErroreDes>"
+                f"<ErroreDettaglio>Errore simulato dallo stub</ErroreDettaglio></{element}>")
+
+    @staticmethod
+    def _make_csv(rows: int) -> str:
+        lines = ["Codice;Descrizione;Provincia;DataFineVal", "412058091;ROMA;RM;"]
+        lines += [f"{400000000 + n};LUOGO {n};XX;" for n in range(max(rows - 1, 0))]
+        return "\n".join(lines)
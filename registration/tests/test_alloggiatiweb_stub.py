@@ -0,0 +1,81 @@
+from registration.models.guest import Guest, GuestGender, GuestType
+from registration.services.alloggiatiweb_api import AlloggiatiWebApi
+from registration.services.alloggiatiweb_tables import TableCache
+from registration.services.alloggiatiweb_tokens import TokenManager
+from registration.tests.stub_server import AlloggiatiWebStub
+from registration.utils.soap_utils import SoapTransport
+from datetime import datetime
+import base64
+import io
+import time
+import unittest
+
+class TestAlloggiatiWebStub(unittest.TestCase):
+    """AlloggiatiWebApi against the local stand-in of the service."""
+
+    def setUp(self):
+        self.transport = SoapTransport(backoff_factor=0.01)
+        self.guests = [Guest(GuestType.GROUP_LEADER, datetime(2024, 5, 3), 3, "Rossi", "Mario", GuestGender.MALE,
+                             "01/01/1980", "412058091", "RM", "100000100", "100000100", "IDELE", "CA91673EW",
+                             "412058091")] * 4
+
+    def tearDown(self):
+        self.transport.close()
+
+    def _api(self, stub):
+        api = AlloggiatiWebApi("user", "password", "ws_key", table_cache=TableCache(),
+                               token_manager=TokenManager(), transport=self.transport)
+        api._url = stub.url
+        return api
+
+    def test_endpoints(self):
+        with AlloggiatiWebStub(table_rows=50, receipt_size=1000, seed=1) as stub:
+            api = self._api(stub)
+            self.assertTrue(api.authentication_test().success)
+            self.assertTrue(api.authentication_test().success)
+            self.assertEqual(stub.operations['GenerateToken'], 1)
+
+            for result in (api.test_schedine(self.guests), api.send_schedine(self.guests),
+                           api.gestione_appartamenti_test(1, self.guests)):
+                self.assertTrue(result.success)
+                self.assertEqual([x.success for x in result.data['Dettaglio']], [True] * 4)
+
+            self.assertEqual(len(api.get_table(AlloggiatiWebApi.TableType.LOCATIONS)), 50)
+            self.assertEqual(api.get_location("ROMA").id, "412058091")
+
+            pdf = api.ricevuta(datetime.now())
+            self.assertEqual(len(base64.b64decode(pdf.data['PDF'])), 1000)
+            output = io.BytesIO()
+            self.assertTrue(api.ricevuta(datetime.now(), pdf_file=output).success)
+            self.assertEqual(len(output.getvalue()), 1000)
+
+    def test_errors(self):
+        with AlloggiatiWebStub(record_error_rate=1, seed=1) as stub:
+            result = self._api(stub).test_schedine(self.guests)
+            self.assertTrue(result.success)
+            self.assertEqual({(x.success, x.err_code) for x in result.data['Dettaglio']}, {(False, "13")})
+
+        with AlloggiatiWebStub(seed=1) as stub:
+            api = self._api(stub)
+            api.authentication_test()
+            stub.error_rate = 1
+            result = api.authentication_test()
+            self.assertFalse(result.success)
+            self.assertEqual(result.err_code, "ERR")
+
+        # Transient statuses are retried by the transport, until the retries are exhausted
+        with AlloggiatiWebStub(http_error_rate=1, seed=1) as stub:
+            with self.assertRaises(RuntimeError):
+                self._api(stub).authentication_test()
+            self.assertEqual(stub.operations['GenerateToken'], 4)
+
+    def test_latency(self):
+        with AlloggiatiWebStub(latencies={'Authentication_Test': 0.2}) as stub:
+            api = self._api(stub)
+            api.authentication_test()
+            start = time.perf_counter()
+            api.authentication_test()
+            self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+from registration.services.alloggiatiweb_tables import TableCache, Location, TableRow
+from datetime import datetime, timedelta
+from unittest import mock
+import os
+import tempfile
+import unittest
+
+class TestAlloggiatiWebTables(unittest.TestCase):
+
+    def setUp(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        tables_dir = os.path.join(this_dir, "..", "tables")
+        with open(os.path.join(tables_dir, "Luoghi.csv")) as f:
+            self.locations_csv = f.read()
+        with open(os.path.join(tables_dir, "Tipi_Documento.csv")) as f:
+            self.documents_csv = f.read()
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_indexes(self):
+        cache = TableCache(self.cache_dir.name)
+        table = cache.get("Luoghi", lambda: self.locations_csv)
+        self.assertEqual(len(table), 11520)
+        self.assertEqual(table.get_by_name("ROMA"), Location("412058091", "ROMA", "RM", ""))
+        self.assertEqual(table.get_by_code("100000100").name, "ITALIA")
+        self.assertIsNone(table.get_by_name("Codice"))
+
+        documents = cache.get("Tipi_Documento", lambda: self.documents_csv)
+        self.assertEqual(documents.get_by_code("IDELE"), TableRow("IDELE", "CARTA IDENTITA' ELETTRONICA", ()))
+
+    def test_duplicate_names_prefer_valid_row(self):
+        csv = "Codice;Descrizione;Provincia;DataFineVal\n1;PAESE;AA;01/01/1990 00:00:00\n2;PAESE;BB;\n"
+        table = TableCache().get("Luoghi", lambda: csv)
+        self.assertEqual(table.get_by_name("PAESE").id, "2")
+        self.assertEqual(table.get_by_name("PAESE", at=datetime(1980, 1, 1)).id, "1")
+        self.assertEqual(len(table.find_all_by_name("PAESE")), 2)
+
+    def test_persisted_across_caches(self):
+        fetch = mock.Mock(return_value=self.documents_csv)
+        TableCache(self.cache_dir.name).get("Tipi_Documento", fetch)
+        table = TableCache(self.cache_dir.name).get("Tipi_Documento", fetch)
+        self.assertEqual(fetch.call_count, 1)
+        self.assertIsNotNone(table.get_by_code("IDENT"))
+
+    def test_stale_table_refreshed(self):
+        fetch = mock.Mock(return_value=self.documents_csv)
+        cache = TableCache(self.cache_dir.name, max_age=timedelta(days=1))
+        cache.get("Tipi_Documento", fetch)
+        later = datetime.now() + timedelta(days=2)
+        with mock.patch("registration.services.alloggiatiweb_tables.datetime") as mock_datetime:
+            mock_datetime.now.return_value = later
+            table = cache.get("Tipi_Documento", fetch)
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(table.fetched_at, later)
+
+    def test_stale_table_used_when_refresh_fails(self):
+        cache = TableCache(self.cache_dir.name, max_age=timedelta(0))
+        cache.get("Tipi_Documento", lambda: self.documents_csv)
+        table = cache.get("Tipi_Documento", mock.Mock(side_effect=RuntimeError("offline")))
+        self.assertIsNotNone(table.get_by_code("IDENT"))
+
+
+if __name__ == '__main__':
+    unittest.main()
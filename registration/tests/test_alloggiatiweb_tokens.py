@@ -0,0 +1,74 @@
+from registration.services.alloggiatiweb_api import AlloggiatiWebApi
+from registration.services.alloggiatiweb_tokens import TokenManager, Token
+from datetime import datetime, timedelta
+from unittest import mock
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+def new_token(minutes: int, value: str = "token") -> Token:
+    now = datetime.now()
+    return Token(now.isoformat(), (now + timedelta(minutes=minutes)).isoformat(), value)
+
+class TestTokenManager(unittest.TestCase):
+
+    def test_token_reused_until_expiry(self):
+        manager = TokenManager(margin=timedelta(minutes=2))
+        generate = mock.Mock(return_value=new_token(30))
+        self.assertEqual(manager.get("user", generate), manager.get("user", generate))
+        self.assertEqual(generate.call_count, 1)
+
+    def test_token_refreshed_within_margin(self):
+        manager = TokenManager(margin=timedelta(minutes=2))
+        generate = mock.Mock(side_effect=[new_token(1, "old"), new_token(30, "new")])
+        self.assertEqual(manager.get("user", generate).token, "old")
+        self.assertEqual(manager.get("user", generate).token, "new")
+
+    def test_tokens_per_user(self):
+        manager = TokenManager()
+        manager.get("user1", lambda: new_token(30, "one"))
+        self.assertEqual(manager.get("user2", lambda: new_token(30, "two")).token, "two")
+        manager.invalidate("user1")
+        self.assertEqual(manager.get("user1", lambda: new_token(30, "three")).token, "three")
+
+    def test_single_refresh_for_concurrent_threads(self):
+        manager = TokenManager()
+        calls = []
+
+        def generate():
+            calls.append(1)
+            time.sleep(0.05)
+            return new_token(30)
+
+        threads = [threading.Thread(target=manager.get, args=("user", generate)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+
+    def test_token_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            token_file = os.path.join(tmp_dir, "tokens.json")
+            TokenManager(token_file=token_file).get("user", lambda: new_token(30, "stored"))
+            generate = mock.Mock(return_value=new_token(30))
+            self.assertEqual(TokenManager(token_file=token_file).get("user", generate).token, "stored")
+            generate.assert_not_called()
+
+    def test_unparsable_expiry(self):
+        manager = TokenManager(fallback_lifetime=timedelta(minutes=30))
+        generate = mock.Mock(return_value=Token("", "not a date", "token"))
+        manager.get("user", generate)
+        manager.get("user", generate)
+        self.assertEqual(generate.call_count, 1)
+
+    def test_api_generates_token_lazily(self):
+        with mock.patch("registration.services.alloggiatiweb_api.soap_utils.make_request") as make_request:
+            AlloggiatiWebApi("user", "password", "ws_key", token_manager=TokenManager())
+            make_request.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+from registration.models.guest import GuestType, GuestGender
+from registration.services import alloggiatiweb_tables
+from registration.services.checkin_pipeline import CheckInPipeline, CheckInItem
+from registration.services.schedina_validator import SchedinaValidator
+from registration.utils import mrz_mapping
+from datetime import datetime
+from unittest import mock
+import os
+import threading
+import time
+import unittest
+
+ROSSI = {'mrz_type': 'TD1', 'valid_score': 100, 'type': 'CI', 'country': 'ITA', 'number': 'CA00000AA',
+         'date_of_birth': '800101', 'nationality': 'ITA', 'sex': 'M', 'names': 'MARIO', 'surname': 'ROSSI'}
+SMITH = {'mrz_type': 'TD3', 'valid_score': 100, 'type': 'P<', 'country': 'GBR', 'number': '123456789',
+         'date_of_birth': '150202', 'nationality': 'GBR', 'sex': 'F', 'names': 'ANNA MARY', 'surname': 'SMITH'}
+MUELLER = {'mrz_type': 'TD3', 'valid_score': 100, 'type': 'P<', 'country': 'D<<', 'number': 'C01X00T47',
+           'date_of_birth': '640812', 'nationality': 'D<<', 'sex': '<', 'names': 'ERIKA', 'surname': 'MUELLER'}
+
+class TestMrzMapping(unittest.TestCase):
+
+    def test_mrz_to_guest(self):
+        guest = mrz_mapping.mrz_to_guest(SMITH, GuestType.SINGLE, datetime(2024, 5, 3), 2)
+        self.assertEqual((guest.last_name, guest.first_name, guest.gender), ("SMITH", "ANNA MARY", GuestGender.FEMALE))
+        self.assertEqual(guest.birth_date, "02/02/2015")
+        self.assertEqual((guest.citizenship, guest.birth_country), ("REGNO UNITO", "REGNO UNITO"))
+        self.assertEqual((guest.document_type, guest.document_number, guest.document_issue_place),
+                         ("PASOR", "123456789", "REGNO UNITO"))
+
+        guest = mrz_mapping.mrz_to_guest(ROSSI, GuestType.GROUP_LEADER, datetime(2024, 5, 3), 2, birth_place="ROMA")
+        self.assertEqual((guest.birth_date, guest.birth_city, guest.document_type), ("01/01/1980", "ROMA", "IDELE"))
+
+        guest = mrz_mapping.mrz_to_guest(MUELLER, GuestType.GROUP_MEMBER, datetime(2024, 5, 3), 2)
+        self.assertEqual((guest.citizenship, guest.gender, guest.document_type), ("GERMANIA", GuestGender.UNKNOWN, ""))
+
+    def test_invalid_fields(self):
+        with self.assertRaises(ValueError):
+            mrz_mapping.mrz_to_guest(dict(SMITH, nationality='XYZ'), GuestType.SINGLE, datetime(2024, 5, 3), 2)
+        with self.assertRaises(ValueError):
+            mrz_mapping.mrz_to_guest(dict(SMITH, type='V<'), GuestType.SINGLE, datetime(2024, 5, 3), 2)
+        with self.assertRaises(ValueError):
+            mrz_mapping.birth_date("80A101", datetime(2024, 5, 3))
+
+
+class TestCheckInPipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tables_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "tables")
+        with open(os.path.join(tables_dir, "Luoghi.csv"), encoding="utf-8") as f:
+            cls.locations = alloggiatiweb_tables.LookupTable("Luoghi", alloggiatiweb_tables.parse_csv(f.read()),
+                                                             datetime.now())
+        cls.validator = SchedinaValidator.from_csv_dir(tables_dir)
+
+    def setUp(self):
+        self.api = mock.Mock()
+        self.api.get_location.side_effect = self.locations.get_by_name
+        self.mrz = {"rossi.jpg": ROSSI, "smith.jpg": SMITH, "mueller.jpg": MUELLER, "blank.jpg": None}
+
+    def test_records(self):
+        pipeline = CheckInPipeline(self.api, read_mrz=self.mrz.get, validator=self.validator, queue_size=2)
+        items = [CheckInItem("rossi.jpg", GuestType.GROUP_LEADER, "ROMA"), "smith.jpg", "blank.jpg",
+                 CheckInItem("mueller.jpg", GuestType.GROUP_MEMBER, birth_country="Austria"),
+                 CheckInItem("rossi.jpg", GuestType.GROUP_MEMBER)]
+        results = list(pipeline.run(items, datetime(2024, 5, 3), 3))
+
+        self.assertEqual([x.index for x in results], [0, 1, 2, 3, 4])
+        self.assertEqual([x.stage for x in results], [None, None, 'ocr', None, 'locations'])
+        leader = results[0].guest
+        self.assertEqual((leader.birth_city, leader.birth_province, leader.birth_country, leader.citizenship,
+                          leader.document_issue_place), ("412058091", "RM", "100000100", "100000100", "100000100"))
+        self.assertEqual(results[1].guest.citizenship, "100000219")
+        self.assertEqual(results[3].guest.birth_country, "100000203")
+        self.assertEqual(len(results[0].record), 168)
+        self.assertTrue(results[0].record.startswith("1803/05/202403ROSSI"))
+
+        records, errors = pipeline.records(items, datetime(2024, 5, 3), 3)
+        self.assertEqual(records, [results[i].record for i in (0, 1, 3)])
+        self.assertEqual([x.index for x in errors], [2, 4])
+
+    def test_validation_error(self):
+        pipeline = CheckInPipeline(self.api, read_mrz=self.mrz.get, validator=self.validator)
+        result, = pipeline.run([CheckInItem("smith.jpg", GuestType.SINGLE)], datetime(2024, 5, 3), 45)
+        self.assertEqual(result.stage, 'record')
+        self.assertIn("num_days", str(result.error))
+
+    def test_stages_overlap(self):
+        # 8 images, 4 OCR threads taking 0.1 s each, location resolution 0.02 s each:
+        # sequentially 0.96 s, overlapped about 0.2 s of OCR plus the last resolution
+        active = []
+        lock = threading.Lock()
+
+        def slow_ocr(image_path):
+            with lock:
+                active.append(image_path)
+            time.sleep(0.1)
+            return self.mrz[image_path]
+
+        def slow_location(name, at=None):
+            time.sleep(0.02)
+            return self.locations.get_by_name(name, at)
+
+        self.api.get_location.side_effect = slow_location
+        pipeline = CheckInPipeline(self.api, read_mrz=slow_ocr, ocr_workers=4, queue_size=4)
+        start = time.perf_counter()
+        records, errors = pipeline.records(["smith.jpg", "mueller.jpg"] * 4, datetime(2024, 5, 3), 3)
+        elapsed = time.perf_counter() - start
+        self.assertEqual((len(records), errors), (8, []))
+        self.assertLess(elapsed, 0.7)
+
+
+if __name__ == '__main__':
+    unittest.main()
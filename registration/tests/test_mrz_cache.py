@@ -0,0 +1,91 @@
+from registration.services.mrz_cache import MrzCache, image_hash
+from registration.services.mrz_reader import MrzReader
+from passporteye.mrz.text import MRZ
+from unittest import mock
+import os
+import tempfile
+import unittest
+
+FIELDS = {'mrz_type': 'TD3', 'valid_score': 100, 'type': 'P<', 'country': 'ITA', 'number': 'YA0000000',
+          'surname': 'ROSSI', 'names': 'MARIO'}
+
+class TestMrzCache(unittest.TestCase):
+
+    def setUp(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        self.image = os.path.join(this_dir, "resources", "passport1.jpg")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "mrz", "cache.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_put(self):
+        cache = MrzCache()
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", FIELDS)
+        cache.put("b", None)
+        self.assertEqual(cache.get("a"), FIELDS)
+        self.assertEqual(cache.get("b"), {})
+        self.assertEqual(len(cache), 2)
+        cache.invalidate("a")
+        self.assertIsNone(cache.get("a"))
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = MrzCache(max_entries=2)
+        cache.put("a", FIELDS)
+        cache.put("b", FIELDS)
+        cache.get("a")
+        cache.put("c", FIELDS)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        with self.assertRaises(ValueError):
+            MrzCache(max_entries=0)
+
+    def test_persistence(self):
+        cache = MrzCache(self.path)
+        cache.put("a", FIELDS)
+        cache.close()
+        cache = MrzCache(self.path)
+        self.assertEqual(cache.get("a"), FIELDS)
+        cache.close()
+
+    def test_image_hash(self):
+        copy = os.path.join(self.tmp_dir.name, "copy.jpg")
+        with open(self.image, "rb") as src, open(copy, "wb") as dst:
+            dst.write(src.read())
+        self.assertEqual(image_hash(copy), image_hash(self.image))
+        self.assertEqual(len(image_hash(self.image)), 64)
+
+    def test_reader_uses_cache(self):
+        # The cached fields are returned without running the OCR
+        cache = MrzCache()
+        cache.put(image_hash(self.image), FIELDS)
+        self.assertEqual(MrzReader.read_mrz_from_image(self.image, cache=cache), FIELDS)
+        results = list(MrzReader.read_mrz_from_images([self.image, self.image], cache=cache))
+        self.assertEqual([x.mrz for x in results], [FIELDS, FIELDS])
+        with self.assertRaises(ValueError):
+            MrzReader.read_mrz_from_image(self.image, save_roi=True, cache=cache)
+
+    def test_same_result_without_cache(self):
+        mrz = MRZ(['IDAUT10000999<6<<<<<<<<<<<<<<<', '7109094F1112315AUT<<<<<<<<<<<6', 'MUSTERFRAU<<ISOLDE<<<<<<<<<<<<'])
+        mrz.aux['roi'] = "roi"
+        with mock.patch('registration.services.mrz_reader.read_mrz', return_value=mrz):
+            fields = MrzReader.read_mrz_from_image(self.image, preprocess=False)
+            self.assertEqual(fields, dict(mrz.to_dict()))
+            self.assertEqual(MrzReader.read_mrz_from_image(self.image, cache=MrzCache(), preprocess=False), fields)
+            self.assertEqual(MrzReader.read_mrz_from_image(self.image, save_roi=True, preprocess=False)['roi'], "roi")
+        with mock.patch('registration.services.mrz_reader.read_mrz', return_value=None):
+            self.assertIsNone(MrzReader.read_mrz_from_image(self.image, preprocess=False))
+
+    def test_reader_no_mrz_cached(self):
+        cache = MrzCache()
+        cache.put(image_hash(self.image), None)
+        self.assertIsNone(MrzReader.read_mrz_from_image(self.image, cache=cache))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+from passporteye.mrz.image import MRZPipeline
+from registration.utils.mrz_preprocessing import MrzPreprocessor
+from PIL import Image
+import numpy as np
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+class TestMrzPreprocessing(unittest.TestCase):
+
+    def setUp(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        self.images = [os.path.join(this_dir, "resources", f"passport{i}.jpg") for i in (1, 2, 3)]
+        self.preprocessor = MrzPreprocessor()
+
+    def load(self, image_path: str) -> np.ndarray:
+        p = self.preprocessor
+        return p.downscale(p.to_grayscale(p.decode(image_path)))
+
+    def test_find_band(self):
+        # MRZ band of the test passports (rows, without margin)
+        mrz_rows = [(381, 417), (345, 385), (307, 340)]
+        for image_path, (mrz_top, mrz_bottom) in zip(self.images, mrz_rows):
+            gray = self.load(image_path)
+            self.assertEqual(gray.dtype, np.float32)
+            top, bottom = self.preprocessor.find_band(gray)
+            self.assertLessEqual(top, mrz_top)
+            self.assertGreaterEqual(bottom, mrz_bottom)
+            self.assertGreater(top, gray.shape[0] // 2)
+
+    def test_no_band(self):
+        self.assertIsNone(self.preprocessor.find_band(np.ones((400, 600), dtype=np.float32)))
+        # Text in the top half only
+        gray = self.load(self.images[0])
+        gray[gray.shape[0] // 2:] = 1
+        self.assertIsNone(self.preprocessor.find_band(gray))
+
+    def test_band_boxes_match_whole_image(self):
+        # passporteye finds the same MRZ box in the band as in the whole image
+        for image_path in self.images:
+            gray = self.load(image_path)
+            top, bottom = self.preprocessor.find_band(gray)
+            pipeline = MRZPipeline(None)
+            pipeline.replace_component('loader', lambda: gray[top:bottom], provides=['img'])
+            band_box = max(pipeline['boxes'], key=lambda box: box.width)
+            full_box = max(MRZPipeline(image_path)['boxes'], key=lambda box: box.width)
+            self.assertAlmostEqual(band_box.width, full_box.width, delta=2)
+            self.assertAlmostEqual(band_box.height, full_box.height, delta=2)
+            self.assertAlmostEqual(band_box.center[1], full_box.center[1], delta=2)
+
+    def test_downscale_large_image(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            image = Image.open(self.images[0])
+            large_path = os.path.join(tmp_dir, "large.jpg")
+            image.resize((image.width * 8, image.height * 8)).save(large_path)
+            gray = self.load(large_path)
+        self.assertGreaterEqual(gray.shape[1], self.preprocessor.target_width)
+        self.assertLess(gray.shape[1], 2 * self.preprocessor.target_width)
+        self.assertIsNotNone(self.preprocessor.find_band(gray))
+
+    def test_fallback_reads_original_image(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            blank_path = os.path.join(tmp_dir, "blank.jpg")
+            Image.new("RGB", (1200, 800), "white").save(blank_path)
+            with mock.patch('registration.utils.mrz_preprocessing.read_mrz', return_value=None) as read_mrz:
+                timings = {}
+                self.assertIsNone(self.preprocessor.read_mrz(blank_path, timings=timings))
+        # No band found: the original file is read by passporteye, not the downscaled image
+        read_mrz.assert_called_once_with(blank_path, save_roi=False, extra_cmdline_params='')
+        self.assertIn('full', timings)
+        self.assertNotIn('ocr_band', timings)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,4 +15,17 @@ class TestMrzReader(unittest.TestCase):
               os.path.join(self.images_dir, "passport3.jpg")]
     for image_path in images:
       mrz = MrzReader.read_mrz_from_image(image_path)
-      assert mrz is not None
\ No newline at end of file
+      assert mrz is not None
+
+  def test_read_mrz_from_images(self):
+    images = [os.path.join(self.images_dir, "passport1.jpg"),
+              os.path.join(self.images_dir, "passport2.jpg"),
+              os.path.join(self.images_dir, "passport3.jpg"),
+              os.path.join(self.images_dir, "missing.jpg")]
+    results = {x.image_path: x for x in MrzReader.read_mrz_from_images(images, max_workers=2)}
+    self.assertEqual(set(results), set(images))
+    for image_path in images[:3]:
+      self.assertIsNone(results[image_path].error)
+      self.assertIsNotNone(results[image_path].mrz)
+      self.assertNotIn('roi', results[image_path].mrz)
+    self.assertIsNotNone(results[images[3]].error)
@@ -0,0 +1,49 @@
+from registration.models.guest import GuestType, GuestGender, Guest
+from registration.utils.schedina_codec import SchedinaCodec
+from datetime import datetime
+import unittest
+
+class TestSchedinaCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.guest = Guest(GuestType.GROUP_LEADER, datetime(2024, 5, 3), 3, "Rossi", "Mario", GuestGender.MALE,
+                           "01/01/1980", "412058091", "RM", "100000100", "100000100", "IDELE", "CA91673EW",
+                           "412058091")
+
+    def test_encode(self):
+        record = SchedinaCodec().encode(self.guest)
+        self.assertEqual(len(record), 168)
+        self.assertEqual(record,
+                         "18" + "03/05/2024" + "03" + "Rossi".ljust(50) + "Mario".ljust(30) + "1" + "01/01/1980"
+                         + "412058091" + "RM" + "100000100" + "100000100" + "IDELE" + "CA91673EW".ljust(20)
+                         + "412058091")
+
+    def test_round_trip(self):
+        member = Guest(GuestType.GROUP_MEMBER, datetime(2024, 5, 3), 12, "Rossi", "Maria", GuestGender.FEMALE,
+                       "02/02/1982", "412058091", "RM", "100000100", "100000100", "", "", "")
+        codec = SchedinaCodec()
+        self.assertEqual(codec.decode_many(codec.encode_many([self.guest, member])), [self.guest, member])
+
+    def test_field_too_long(self):
+        self.guest.last_name = "X" * 51
+        with self.assertRaises(ValueError):
+            SchedinaCodec().encode(self.guest)
+        record = SchedinaCodec(truncate=True).encode(self.guest)
+        self.assertEqual(len(record), 168)
+        self.assertEqual(record[14:64], "X" * 50)
+
+    def test_num_days_too_large(self):
+        self.guest.num_days = 100
+        with self.assertRaises(ValueError):
+            SchedinaCodec().encode(self.guest)
+
+    def test_decode_invalid(self):
+        codec = SchedinaCodec()
+        with self.assertRaises(ValueError):
+            codec.decode("18")
+        with self.assertRaises(ValueError):
+            codec.decode("99" + codec.encode(self.guest)[2:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+from registration.models.guest import GuestType, GuestGender, Guest
+from registration.services.schedina_validator import SchedinaValidator, FieldError
+from registration.services.schedine_submitter import SchedineSubmitter, SubmissionStatus
+from registration.services.alloggiatiweb_api import AlloggiatiWebApi
+from datetime import datetime
+from unittest import mock
+import os
+import unittest
+
+class TestSchedinaValidator(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        cls.validator = SchedinaValidator.from_csv_dir(os.path.join(this_dir, "..", "tables"))
+
+    def leader(self, **kwargs) -> Guest:
+        guest = Guest(GuestType.GROUP_LEADER, datetime(2024, 5, 3), 3, "Rossi", "Mario", GuestGender.MALE,
+                      "01/01/1980", "412058091", "RM", "100000100", "100000100", "IDELE", "CA91673EW", "412058091")
+        for key, value in kwargs.items():
+            setattr(guest, key, value)
+        return guest
+
+    def member(self, **kwargs) -> Guest:
+        guest = Guest(GuestType.GROUP_MEMBER, datetime(2024, 5, 3), 3, "Smith", "Anna", GuestGender.FEMALE,
+                      "02/02/1985", "", "", "100000201", "100000201", "", "", "")
+        for key, value in kwargs.items():
+            setattr(guest, key, value)
+        return guest
+
+    def fields(self, guest: Guest) -> list:
+        return [field for field, _ in self.validator.validate_guest(guest)]
+
+    def test_valid_guests(self):
+        self.assertEqual(self.validator.validate([self.leader(), self.member()]), [])
+
+    def test_num_days(self):
+        self.assertEqual(self.fields(self.leader(num_days=31)), ['num_days'])
+        self.assertEqual(self.fields(self.leader(num_days=0)), ['num_days'])
+
+    def test_dates(self):
+        self.assertEqual(self.fields(self.leader(birth_date="1980-01-01")), ['birth_date'])
+        self.assertEqual(self.fields(self.leader(birth_date="31/02/1980")), ['birth_date'])
+        self.assertEqual(self.fields(self.leader(birth_date="01/01/2025")), ['birth_date'])
+        self.assertEqual(self.fields(self.leader(arrival_date="03/05/2024")), ['arrival_date'])
+
+    def test_mandatory_documents(self):
+        self.assertEqual(self.fields(self.leader(document_type="", document_number="", document_issue_place="")),
+                         ['document_type', 'document_number', 'document_issue_place'])
+        self.assertEqual(self.fields(self.leader(document_type="XXXXX")), ['document_type'])
+
+    def test_codes(self):
+        self.assertEqual(self.fields(self.leader(birth_city="999999999")), ['birth_city'])
+        self.assertEqual(self.fields(self.leader(birth_province="MI")), ['birth_province'])
+        self.assertEqual(self.fields(self.member(citizenship="412058091")), ['citizenship'])
+        self.assertEqual(self.fields(self.leader(birth_city="", birth_province="")), ['birth_city'])
+
+    def test_location_validity(self):
+        # ABBADIA ALPINA (TO), valid until 31/12/1983
+        self.assertEqual(self.fields(self.leader(birth_city="401001501", birth_province="TO", birth_date="01/01/1970")), [])
+        self.assertEqual(self.fields(self.leader(birth_city="401001501", birth_province="TO", birth_date="01/01/1990")), ['birth_city'])
+
+    def test_field_length(self):
+        self.assertEqual(self.fields(self.leader(first_name="X" * 31)), ['first_name'])
+
+    def test_batch_errors(self):
+        errors = self.validator.validate([self.leader(), self.member(num_days=40), self.leader(last_name="")])
+        self.assertEqual([(x.index, x.field) for x in errors], [(1, 'num_days'), (2, 'last_name')])
+        self.assertIsInstance(errors[0], FieldError)
+
+    def test_submitter_rejects_offline(self):
+        api = mock.Mock()
+        api.send_schedine.side_effect = lambda batch: AlloggiatiWebApi.Result(
+            True, None, None, None, {'Dettaglio': [AlloggiatiWebApi.Result(True, None, None, None, None)] * len(batch)})
+        submitter = SchedineSubmitter(api, pre_validate=False, validator=self.validator)
+        report = submitter.submit([self.leader(), self.member(num_days=40)])
+        self.assertEqual(len(report.accepted), 1)
+        self.assertEqual(report.rejected[0].index, 1)
+        self.assertEqual(report.rejected[0].status, SubmissionStatus.REJECTED)
+        self.assertIn("num_days", report.rejected[0].err_detail)
+        self.assertEqual(len(api.send_schedine.call_args.args[0]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
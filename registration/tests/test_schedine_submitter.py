@@ -0,0 +1,133 @@
+from registration.services.alloggiatiweb_api import AlloggiatiWebApi
+from registration.services.schedine_submitter import SchedineSubmitter, SubmissionStatus
+from unittest import mock
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+import requests
+import threading
+import time
+import unittest
+import xml.etree.ElementTree as ET
+
+def detail(success: bool, code: str = None) -> AlloggiatiWebApi.Result:
+    return AlloggiatiWebApi.Result(success, code, None, None, None)
+
+def batch_result(guests: list, invalid: set = ()) -> AlloggiatiWebApi.Result:
+    details = [detail(guest not in invalid, "13" if guest in invalid else None) for guest in guests]
+    return AlloggiatiWebApi.Result(True, None, None, None, {"Dettaglio": details})
+
+class TestSchedineSubmitter(unittest.TestCase):
+
+    def setUp(self):
+        self.api = mock.Mock()
+        self.guests = [f"guest{n}" for n in range(10)]
+
+    def test_submit_in_batches(self):
+        self.api.test_schedine.side_effect = lambda batch: batch_result(batch, {"guest3"})
+        self.api.send_schedine.side_effect = lambda batch: batch_result(batch)
+        report = SchedineSubmitter(self.api, batch_size=4).submit(self.guests)
+
+        self.assertEqual([len(call.args[0]) for call in self.api.test_schedine.call_args_list], [4, 4, 2])
+        sent = [guest for call in self.api.send_schedine.call_args_list for guest in call.args[0]]
+        self.assertEqual(sorted(sent), sorted(set(self.guests) - {"guest3"}))
+        self.assertEqual([x.guest for x in report.rejected], ["guest3"])
+        self.assertEqual(report.rejected[0].err_code, "13")
+        self.assertEqual(len(report.accepted), 9)
+        self.assertEqual([x.index for x in report.results], list(range(10)))
+        self.assertFalse(report.success)
+
+    def test_failed_send_unknown(self):
+        # The Send may have been recorded before the failure: not retried blindly
+        for error in (RuntimeError("SOAP request error: 503"), requests.ReadTimeout("read timed out"),
+                      requests.ConnectionError("Connection reset by peer")):
+            def send(batch):
+                if "guest0" in batch:
+                    raise error
+                return batch_result(batch)
+
+            self.api.send_schedine.side_effect = send
+            with self.assertLogs(level='WARNING'):
+                report = SchedineSubmitter(self.api, batch_size=5, pre_validate=False).submit(self.guests)
+            self.assertEqual([x.guest for x in report.unknown], self.guests[:5])
+            self.assertEqual(report.unknown[0].err_desc, type(error).__name__)
+            self.assertEqual([x.guest for x in report.accepted], self.guests[5:])
+
+    def test_failed_batch_to_retry(self):
+        # Nothing reached the service
+        self.api.send_schedine.side_effect = requests.ConnectTimeout("connect timed out")
+        report = SchedineSubmitter(self.api, batch_size=5, pre_validate=False).submit(self.guests)
+        self.assertEqual(len(report.retry), 10)
+
+        refused = requests.ConnectionError(MaxRetryError(None, "/", NewConnectionError(None, "Connection refused")))
+        self.api.send_schedine.side_effect = refused
+        report = SchedineSubmitter(self.api, batch_size=5, pre_validate=False).submit(self.guests)
+        self.assertEqual(len(report.retry), 10)
+
+        # The Test call records nothing, so its failures are retried
+        self.api.test_schedine.side_effect = RuntimeError("SOAP request error: 504")
+        report = SchedineSubmitter(self.api, batch_size=5).submit(self.guests)
+        self.assertEqual(len(report.retry), 10)
+        self.assertEqual(self.api.send_schedine.call_count, 4)
+
+    def test_batch_result_without_details(self):
+        self.api.send_schedine.return_value = AlloggiatiWebApi.Result(False, "5", "TOKEN_NON_VALIDO", None, {'Dettaglio': []})
+        report = SchedineSubmitter(self.api, pre_validate=False).submit(self.guests)
+        self.assertEqual(len(report.retry), 10)
+        self.assertEqual(report.retry[0].err_desc, "TOKEN_NON_VALIDO")
+
+    def test_details_mismatch(self):
+        submitter = SchedineSubmitter(self.api, pre_validate=False)
+        for data, status in (({'Dettaglio': [], 'SchedineValide': 10}, SubmissionStatus.ACCEPTED),
+                             ({'Dettaglio': [], 'SchedineValide': 0}, SubmissionStatus.REJECTED),
+                             ({'Dettaglio': [detail(True)] * 3, 'SchedineValide': 3}, SubmissionStatus.UNKNOWN),
+                             ({'Dettaglio': []}, SubmissionStatus.UNKNOWN)):
+            self.api.send_schedine.return_value = AlloggiatiWebApi.Result(True, None, None, None, data)
+            with self.assertLogs(level='WARNING'):
+                report = submitter.submit(self.guests)
+            self.assertEqual({x.status for x in report.results}, {status})
+        self.assertEqual(len(report.unknown), 10)
+        self.assertFalse(report.success)
+
+    def test_bounded_concurrency(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def send(batch):
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+            return batch_result(batch)
+
+        self.api.send_schedine.side_effect = send
+        report = SchedineSubmitter(self.api, batch_size=1, max_workers=3, pre_validate=False).submit(self.guests)
+        self.assertTrue(report.success)
+        self.assertLessEqual(max(peak), 3)
+
+    def test_validate_apartment(self):
+        self.api.gestione_appartamenti_test.side_effect = lambda apartment_id, batch: batch_result(batch)
+        report = SchedineSubmitter(self.api).validate(self.guests, apartment_id=7)
+        self.assertTrue(report.success)
+        self.assertEqual(self.api.gestione_appartamenti_test.call_args.args[0], 7)
+
+    def test_parse_details(self):
+        response = ET.fromstring('''<soap:Envelope xmlns:soap="http://www.w3.org/2003/05/soap-envelope"><soap:Body>
+            <SendResponse xmlns="AlloggiatiService">
+              <SendResult><esito>true</esito><ErroreCod /><ErroreDes /><ErroreDettaglio /></SendResult>
+              <result><SchedineValide>1</SchedineValide><Dettaglio>
+                <EsitoOperazioneServizio><esito>true</esito><ErroreCod /><ErroreDes /><ErroreDettaglio /></EsitoOperazioneServizio>
+                <EsitoOperazioneServizio><esito>false</esito><ErroreCod>13</ErroreCod><ErroreDes>SCHEDINA_ERRATA</ErroreDes><ErroreDettaglio>Data</ErroreDettaglio></EsitoOperazioneServizio>
+              </Dettaglio></result>
+            </SendResponse></soap:Body></soap:Envelope>''')
+        api = AlloggiatiWebApi("user", "password", "ws_key")
+        result = api._parse_response(response, details=True)
+        self.assertTrue(result.success)
+        self.assertEqual(result.data['Dettaglio'], [AlloggiatiWebApi.Result(True, None, None, None, None),
+                                                    AlloggiatiWebApi.Result(False, "13", "SCHEDINA_ERRATA", "Data", None)])
+        self.assertEqual(result.data['SchedineValide'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+from registration.tests.stub_server import StubServer, SOAP_RESPONSE
+from registration.services.alloggiatiweb_api import AlloggiatiWebApi
+from registration.services.alloggiatiweb_tokens import Token
+from registration.utils.soap_utils import SoapTransport, SoapStreamParser, Base64FileSink
+from datetime import datetime
+from unittest import mock
+import base64
+import io
+import logging
+import os
+import requests
+import socket
+import threading
+import unittest
+
+class TestSoapTransport(unittest.TestCase):
+
+    def test_connection_reused(self):
+        transport = SoapTransport()
+        with StubServer() as server:
+            for _ in range(5):
+                result = transport.make_request(server.url, "<a/>")
+                self.assertEqual(result.find('.//{AlloggiatiService}esito').text, "true")
+            self.assertEqual(server.connections, 1)
+        transport.close()
+
+    def test_retry_transient_status(self):
+        transport = SoapTransport(backoff_factor=0)
+        with StubServer([(503, "busy"), (502, "bad gateway"), (200, SOAP_RESPONSE)]) as server:
+            transport.make_request(server.url, "<a/>")
+            self.assertEqual(len(server.requests), 3)
+        transport.close()
+
+    def test_no_retry_on_soap_fault(self):
+        transport = SoapTransport(backoff_factor=0)
+        with StubServer([(500, "fault")]) as server:
+            with self.assertRaises(RuntimeError):
+                transport.make_request(server.url, "<a/>")
+            self.assertEqual(len(server.requests), 1)
+        transport.close()
+
+    def test_retries_exhausted(self):
+        transport = SoapTransport(max_retries=2, backoff_factor=0)
+        with StubServer([(503, "busy")]) as server:
+            with self.assertRaises(RuntimeError):
+                transport.make_request(server.url, "<a/>")
+            self.assertEqual(len(server.requests), 3)
+        transport.close()
+
+    def test_retry_connection_error(self):
+        # Nothing listens on this port
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        transport = SoapTransport(max_retries=2, backoff_factor=0.01)
+        with mock.patch.object(transport, "_backoff", wraps=transport._backoff) as backoff:
+            with self.assertRaises(requests.ConnectionError):
+                transport.make_request(f"http://127.0.0.1:{port}/", "<a/>")
+            self.assertEqual(backoff.call_count, 2)
+        transport.close()
+
+    def test_non_idempotent_retries(self):
+        transport = SoapTransport(backoff_factor=0)
+        # A 504 may come after the service processed the request
+        with StubServer([(504, "gateway timeout"), (200, SOAP_RESPONSE)]) as server:
+            with self.assertRaises(RuntimeError):
+                transport.make_request(server.url, "<a/>", idempotent=False)
+            self.assertEqual(len(server.requests), 1)
+        with StubServer([(503, "busy"), (502, "bad gateway"), (200, SOAP_RESPONSE)]) as server:
+            transport.make_request(server.url, "<a/>", idempotent=False)
+            self.assertEqual(len(server.requests), 3)
+        transport.close()
+
+    def test_non_idempotent_connection_errors(self):
+        # The connection is dropped after the request was sent
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        accepted = []
+
+        def drop():
+            while True:
+                try:
+                    connection, _ = listener.accept()
+                except OSError:
+                    return
+                accepted.append(connection.recv(65536))
+                connection.close()
+
+        thread = threading.Thread(target=drop, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{listener.getsockname()[1]}/"
+        transport = SoapTransport(max_retries=2, backoff_factor=0)
+        with self.assertRaises(requests.ConnectionError):
+            transport.make_request(url, "<a/>", idempotent=False)
+        self.assertEqual(len(accepted), 1)
+        with self.assertRaises(requests.ConnectionError):
+            transport.make_request(url, "<a/>")
+        self.assertEqual(len(accepted), 4)
+        listener.close()
+        transport.close()
+
+        # Nothing was sent when the connection could not be established: nothing listens on this port
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            url = f"http://127.0.0.1:{s.getsockname()[1]}/"
+        transport = SoapTransport(max_retries=2, backoff_factor=0.01)
+        with mock.patch.object(transport, "_backoff", wraps=transport._backoff) as backoff:
+            with self.assertRaises(requests.ConnectionError):
+                transport.make_request(url, "<a/>", idempotent=False)
+            self.assertEqual(backoff.call_count, 2)
+        transport.close()
+
+    def test_send_not_idempotent(self):
+        transport = mock.Mock()
+        api = AlloggiatiWebApi("user", "password", "ws_key", transport=transport)
+        with mock.patch.object(AlloggiatiWebApi, "_token", new_callable=mock.PropertyMock) as token, \
+                mock.patch.object(api, "_parse_response"):
+            token.return_value = Token(datetime.now(), datetime.max, "token")
+            api.send_schedine([])
+        self.assertEqual(transport.make_request.call_args.kwargs, {'idempotent': False})
+
+    def test_backoff_with_jitter(self):
+        transport = SoapTransport(backoff_factor=1, backoff_max=5)
+        for attempt in range(6):
+            delay = transport._backoff(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(5, 2 ** attempt))
+
+
+RICEVUTA_RESPONSE = '''<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://www.w3.org/2003/05/soap-envelope">
+  <soap:Body>
+    <RicevutaResponse xmlns="AlloggiatiService">
+      <RicevutaResult>
+        <esito>true</esito>
+        <ErroreCod />
+        <ErroreDes />
+        <ErroreDettaglio />
+      </RicevutaResult>
+      <PDF>{pdf}</PDF>
+    </RicevutaResponse>
+  </soap:Body>
+</soap:Envelope>'''
+
+class TestSoapStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.pdf = os.urandom(100000)
+        encoded = base64.encodebytes(self.pdf).decode("ascii")
+        self.response = RICEVUTA_RESPONSE.format(pdf=encoded)
+
+    def test_stream_parser_any_chunking(self):
+        for chunk_size in (1, 7, 4096):
+            output = io.BytesIO()
+            parser = SoapStreamParser(['esito', 'ErroreCod'], {'PDF': Base64FileSink(output)})
+            data = self.response.encode("utf-8")
+            for i in range(0, len(data), chunk_size):
+                parser.feed(data[i:i + chunk_size])
+            self.assertEqual(parser.close(), {'esito': "true", 'ErroreCod': None, 'PDF': True})
+            self.assertEqual(output.getvalue(), self.pdf)
+
+    def test_missing_field(self):
+        parser = SoapStreamParser(['esito', 'Other'], {'CSV': Base64FileSink(io.BytesIO())})
+        parser.feed(self.response.encode("utf-8"))
+        self.assertEqual(parser.close(), {'esito': "true", 'Other': None, 'CSV': None})
+
+    def test_ricevuta_streamed_to_file(self):
+        transport = SoapTransport()
+        token_manager = mock.Mock()
+        token_manager.get.return_value = Token("", "", "token")
+        with StubServer([(200, self.response)]) as server:
+            api = AlloggiatiWebApi("user", "password", "ws_key", token_manager=token_manager, transport=transport)
+            api._url = server.url
+            output = io.BytesIO()
+            result = api.ricevuta(datetime.now(), pdf_file=output)
+            self.assertTrue(result.success)
+            self.assertIsNone(result.err_code)
+            self.assertIs(result.data['PDF'], output)
+            self.assertEqual(output.getvalue(), self.pdf)
+        transport.close()
+
+    def test_no_serialization_without_debug(self):
+        transport = SoapTransport()
+        with StubServer() as server, mock.patch("registration.utils.soap_utils.ET.tostring") as tostring:
+            level = logging.root.level
+            logging.root.setLevel(logging.INFO)
+            try:
+                transport.make_request(server.url, "<a/>")
+                tostring.assert_not_called()
+                logging.root.setLevel(logging.DEBUG)
+                transport.make_request(server.url, "<a/>")
+                self.assertEqual(tostring.call_count, 2)
+            finally:
+                logging.root.setLevel(level)
+        transport.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
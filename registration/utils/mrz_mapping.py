@@ -0,0 +1,135 @@
+from registration.models.guest import Guest, GuestType, GuestGender
+from datetime import datetime
+
+"""
+Mapping of the MRZ fields (passporteye's MRZ.to_dict()) to the AlloggiatiWeb
+guest data. Countries are mapped to the names of the states in the Luoghi table;
+they are resolved to codes with AlloggiatiWebApi.get_location.
+"""
+
+# ICAO 9303 nationality/issuing state codes -> state name in the Luoghi table
+MRZ_COUNTRIES = {
+    'AFG': "AFGHANISTAN", 'ALB': "ALBANIA", 'DZA': "ALGERIA", 'AND': "ANDORRA", 'AGO': "ANGOLA",
+    'AIA': "ANGUILLA (ISOLA)", 'ATG': "ANTIGUA E BARBUDA", 'XXA': "APOLIDE", 'SAU': "ARABIA SAUDITA",
+    'ARG': "ARGENTINA", 'ARM': "ARMENIA", 'AUS': "AUSTRALIA", 'AUT': "AUSTRIA", 'AZE': "AZERBAIGIAN",
+    'BHS': "BAHAMAS", 'BHR': "BAHREIN", 'BGD': "BANGLADESH", 'BRB': "BARBADOS", 'BEL': "BELGIO",
+    'BLZ': "BELIZE", 'BEN': "BENIN", 'BMU': "BERMUDE", 'BTN': "BHUTAN", 'BLR': "BIELORUSSIA",
+    'BOL': "BOLIVIA", 'BIH': "BOSNIA ED ERZEGOVINA", 'BWA': "BOTSWANA", 'BRA': "BRASILE",
+    'BRN': "BRUNEI DARUSSALAM", 'BGR': "BULGARIA", 'BFA': "BURKINA FASO", 'BDI': "BURUNDI",
+    'KHM': "CAMBOGIA", 'CMR': "CAMERUN", 'CAN': "CANADA", 'CPV': "CAPO VERDE", 'CYM': "CAYMAN (ISOLE)",
+    'CXR': "CHRISTMAS", 'TCD': "CIAD", 'CHL': "CILE", 'CHN': "CINA", 'CYP': "CIPRO", 'CCK': "COCOS",
+    'COL': "COLOMBIA", 'COM': "COMORE", 'COG': "CONGO", 'PRK': "COREA DEL NORD", 'KOR': "COREA DEL SUD",
+    'CIV': "COSTA D'AVORIO", 'CRI': "COSTA RICA", 'HRV': "CROAZIA", 'CUB': "CUBA", 'DNK': "DANIMARCA",
+    'DMA': "DOMINICA", 'ECU': "ECUADOR", 'EGY': "EGITTO", 'SLV': "EL SALVADOR",
+    'ARE': "EMIRATI ARABI UNITI", 'ERI': "ERITREA", 'EST': "ESTONIA", 'ETH': "ETIOPIA", 'FRO': "FAER OER",
+    'RUS': "FEDERAZIONE RUSSA", 'FJI': "FIGI", 'PHL': "FILIPPINE", 'FIN': "FINLANDIA", 'FRA': "FRANCIA",
+    'GAB': "GABON", 'GMB': "GAMBIA", 'GEO': "GEORGIA", 'SGS': "GEORGIA SUD E ISOLE SANDWICH AUSTRALI",
+    'D': "GERMANIA", 'DEU': "GERMANIA", 'GHA': "GHANA", 'JAM': "GIAMAICA", 'JPN': "GIAPPONE",
+    'DJI': "GIBUTI", 'JOR': "GIORDANIA", 'GRC': "GRECIA", 'GRD': "GRENADA", 'GRL': "GROENLANDIA",
+    'GLP': "GUADALUPA", 'GUM': "GUAM", 'GTM': "GUATEMALA", 'GUF': "GUAYANA FRANCESE", 'GGY': "GUERNSEY",
+    'GIN': "GUINEA", 'GNB': "GUINEA BISSAU", 'GNQ': "GUINEA EQUATORIALE", 'GUY': "GUYANA", 'HTI': "HAITI",
+    'HND': "HONDURAS", 'HKG': "HONG KONG", 'IND': "INDIA", 'IDN': "INDONESIA", 'IRN': "IRAN",
+    'IRQ': "IRAQ", 'IRL': "IRLANDA", 'ISL': "ISLANDA", 'VIR': "ISOLE VERGINI", 'ISR': "ISRAELE",
+    'ITA': "ITALIA", 'KAZ': "KAZAKISTAN", 'KEN': "KENYA", 'KGZ': "KIRGHIZISTAN", 'KIR': "KIRIBATI",
+    'RKS': "KOSOVO", 'KWT': "KUWAIT", 'REU': "LA REUNION", 'LAO': "LAOS", 'LSO': "LESOTHO",
+    'LVA': "LETTONIA", 'LBN': "LIBANO", 'LBR': "LIBERIA", 'LBY': "LIBIA", 'LIE': "LIECHTENSTEIN",
+    'LTU': "LITUANIA", 'LUX': "LUSSEMBURGO", 'MAC': "MACAO", 'MKD': "MACEDONIA DEL NORD",
+    'MDG': "MADAGASCAR", 'MWI': "MALAWI", 'MYS': "MALAYSIA", 'MDV': "MALDIVE", 'MLI': "MALI",
+    'MLT': "MALTA", 'FLK': "MALVINE", 'IMN': "MAN", 'MAR': "MAROCCO", 'MHL': "MARSHALL",
+    'MTQ': "MARTINICA", 'MRT': "MAURITANIA", 'MUS': "MAURIZIO", 'MYT': "MAYOTTE", 'MEX': "MESSICO",
+    'FSM': "MICRONESIA STATI FEDERALI", 'MDA': "MOLDAVIA", 'MCO': "MONACO", 'MNG': "MONGOLIA",
+    'MNE': "MONTENEGRO", 'MSR': "MONTSERRAT", 'MOZ': "MOZAMBICO", 'MMR': "MYANMAR-BIRMANIA",
+    'NAM': "NAMIBIA", 'NRU': "NAURU", 'NPL': "NEPAL", 'NIC': "NICARAGUA", 'NER': "NIGER",
+    'NGA': "NIGERIA", 'NFK': "NORFOLK", 'NOR': "NORVEGIA", 'NCL': "NUOVA CALEDONIA",
+    'NZL': "NUOVA ZELANDA", 'OMN': "OMAN", 'NLD': "PAESI BASSI", 'PAK': "PAKISTAN",
+    'PLW': "PALAU REPUBBLICA", 'PSE': "PALESTINA", 'PAN': "PANAMA", 'PNG': "PAPUASIA-N.GUINEA",
+    'PRY': "PARAGUAY", 'PER': "PERU'", 'PCN': "PITCAIRN", 'PYF': "POLINESIA", 'POL': "POLONIA",
+    'PRT': "PORTOGALLO", 'PRI': "PUERTO RICO", 'QAT': "QATAR", 'GBR': "REGNO UNITO", 'GBD': "REGNO UNITO",
+    'GBN': "REGNO UNITO", 'GBO': "REGNO UNITO", 'GBP': "REGNO UNITO", 'GBS': "REGNO UNITO",
+    'CZE': "REPUBBLICA CECA", 'CAF': "REPUBBLICA CENTRAFRICANA", 'COD': "REPUBBLICA DEMOCRATICA DEL CONGO",
+    'DOM': "REPUBBLICA DOMINICANA", 'SVK': "REPUBBLICA SLOVACCA", 'ROU': "ROMANIA", 'RWA': "RUANDA",
+    'KNA': "S. CHRISTOPHER E NEVIS", 'ESH': "SAHARA SPAGNOLO", 'LCA': "SAINT LUCIA",
+    'SPM': "SAINT PIERRE ET MIQUELON", 'VCT': "SAINT VINCENT E GRENADINE", 'SLB': "SALOMONE",
+    'WSM': "SAMOA", 'ASM': "SAMOA AMERICANE", 'SMR': "SAN MARINO", 'SHN': "SANT ELENA",
+    'STP': "SAO TOME' E PRINCIPE", 'SEN': "SENEGAL", 'SRB': "SERBIA", 'SYC': "SEYCHELLES",
+    'SLE': "SIERRA LEONE", 'SGP': "SINGAPORE", 'SYR': "SIRIA", 'SVN': "SLOVENIA", 'SOM': "SOMALIA",
+    'ESP': "SPAGNA", 'LKA': "SRI LANKA (CEYLON)", 'USA': "STATI UNITI D'AMERICA",
+    'VAT': "STATO DELLA CITTA' DEL VATICANO", 'SSD': "SUD SUDAN", 'ZAF': "SUDAFRICA", 'SDN': "SUDAN",
+    'SUR': "SURINAME", 'SWE': "SVEZIA", 'CHE': "SVIZZERA", 'SWZ': "SWAZILAND", 'TJK': "TAGIKISTAN",
+    'TWN': "TAIWAN", 'TZA': "TANZANIA", 'THA': "THAILANDIA", 'TLS': "TIMOR", 'TGO': "TOGO",
+    'TKL': "TOKELAU", 'TON': "TONGA", 'TTO': "TRINIDAD E TOBAGO", 'TUN': "TUNISIA", 'TUR': "TURCHIA",
+    'TKM': "TURKMENISTAN", 'TCA': "TURKS", 'TUV': "TUVALU", 'UKR': "UCRAINA", 'UGA': "UGANDA",
+    'HUN': "UNGHERIA", 'URY': "URUGUAY", 'UZB': "UZBEKISTAN", 'VUT': "VANUATU", 'VEN': "VENEZUELA",
+    'VGB': "VERGINI BRITANNICHE (ISOLE)", 'VNM': "VIETNAM", 'WLF': "WALLIS", 'YEM': "YEMEN",
+    'ZMB': "ZAMBIA", 'ZWE': "ZIMBABWE",
+}
+
+ITALY = "ITALIA"
+
+_GENDERS = {
+    'M': GuestGender.MALE,
+    'F': GuestGender.FEMALE,
+}
+
+
+def country_name(mrz_code: str) -> str:
+    """Luoghi name of an MRZ country code ('<' fillers are ignored), None if unknown."""
+    return MRZ_COUNTRIES.get((mrz_code or "").replace("<", ""))
+
+
+def document_type(fields: dict) -> str:
+    """Tipi_Documento code of the document, from the MRZ document code; None if not an identity document."""
+    code = (fields.get('type') or "").replace("<", "")
+    if code.startswith("P"):
+        return {"PD": "PASDI", "PS": "PASSE"}.get(code, "PASOR")
+    if code[:1] in ("I", "A", "C"):
+        # The Italian electronic identity card (CIE) has document code 'CI'
+        return "IDELE" if code == "CI" and country_name(fields.get('country')) == ITALY else "IDENT"
+    return None
+
+
+def birth_date(mrz_date: str, at: datetime) -> str:
+    """Birth date gg/mm/aaaa from the MRZ date AAMMGG; the century is the last one not after `at`."""
+    if not mrz_date or len(mrz_date) != 6 or not mrz_date.isdigit():
+        raise ValueError(f"Invalid MRZ date: '{mrz_date}'")
+    year = 2000 + int(mrz_date[0:2])
+    if year > at.year:
+        year -= 100
+    date = datetime(year, int(mrz_date[2:4]), int(mrz_date[4:6]))
+    return f"{date.day:02d}/{date.month:02d}/{date.year:04d}"
+
+
+def mrz_to_guest(fields: dict, guest_type: GuestType, arrival_date: datetime, num_days: int,
+                 birth_place: str = None, birth_country: str = None, document_issue_place: str = None) -> Guest:
+    """
+    Guest from the MRZ fields. The location fields hold the names of the places
+    (birth_province is empty), to be replaced with their codes.
+
+    The MRZ has no place of birth: birth_place (a municipality, for the guests born
+    in Italy) and birth_country default to none and to the nationality. The document
+    fields are only set for the types that require them; document_issue_place
+    defaults to the issuing state.
+    """
+    nationality = country_name(fields.get('nationality'))
+    if nationality is None:
+        raise ValueError(f"Unknown nationality: '{fields.get('nationality')}'")
+    birth_country = birth_country or nationality
+
+    has_document = guest_type in (GuestType.SINGLE, GuestType.HOUSE_HEAD, GuestType.GROUP_LEADER)
+    doc_type = doc_number = issue_place = ""
+    if has_document:
+        doc_type = document_type(fields)
+        if doc_type is None:
+            raise ValueError(f"Not an identity document: '{fields.get('type')}'")
+        doc_number = (fields.get('number') or "").replace("<", "")
+        issue_place = document_issue_place or country_name(fields.get('country'))
+        if issue_place is None:
+            raise ValueError(f"Unknown issuing state: '{fields.get('country')}'")
+
+    return Guest(guest_type, arrival_date, num_days,
+                 " ".join((fields.get('surname') or "").replace("<", " ").split()),
+                 " ".join((fields.get('names') or "").replace("<", " ").split()),
+                 _GENDERS.get(fields.get('sex'), GuestGender.UNKNOWN),
+                 birth_date(fields.get('date_of_birth'), arrival_date),
+                 birth_place or "", "", birth_country, nationality,
+                 doc_type, doc_number, issue_place)
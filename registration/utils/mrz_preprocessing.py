@@ -0,0 +1,150 @@
+import numpy as np
+import time
+from passporteye import read_mrz
+from passporteye.mrz.image import MRZPipeline
+from PIL import Image
+
+"""
+Preprocessing of document images before the MRZ OCR. The image is decoded once,
+converted to grayscale and downscaled to the resolution the OCR needs, and the MRZ
+band is searched in the bottom third of the page, so that passporteye only works
+on a small crop. When the crop gives no valid MRZ, the original image is read by
+passporteye's read_mrz, as without preprocessing.
+"""
+
+# Width of a passport data page (ID-3 format), used to estimate the image resolution
+PAGE_WIDTH_MM = 125
+
+# Part of the page where the MRZ band is searched (from this fraction of the height to the bottom)
+BAND_SEARCH_START = 2 / 3
+
+
+class MrzPreprocessor:
+    """
+    target_dpi: resolution the images are downscaled to, assuming the image is as wide as the page.
+    band_margin: margin added above and below the band, as a fraction of its height.
+    min_valid_score: MRZ from the band with a lower valid_score (0-100, from the check digits)
+    are read again from the original image at full resolution, and the best one is returned.
+    """
+
+    def __init__(self, target_dpi: int = 300, band_margin: float = 0.75, min_valid_score: int = 60):
+        self.target_width = int(target_dpi * PAGE_WIDTH_MM / 25.4)
+        self.band_margin = band_margin
+        self.min_valid_score = min_valid_score
+
+    def read_mrz(self, image_path: str, save_roi: bool = False, extra_cmdline_params: str = '',
+                 timings: dict = None):
+        """
+        Read the MRZ of an image, as passporteye's read_mrz. If given, timings is
+        filled with the seconds spent in each stage: decode, grayscale, downscale,
+        detect, locate_band and ocr_band, and full for the fallback read of the original image.
+        """
+        timings = {} if timings is None else timings
+        image = _timed(timings, 'decode', self.decode, image_path)
+        image = _timed(timings, 'grayscale', self.to_grayscale, image)
+        gray = _timed(timings, 'downscale', self.downscale, image)
+        band = _timed(timings, 'detect', self.find_band, gray)
+
+        mrz = None
+        if band is not None:
+            top, bottom = band
+            mrz = self._read(gray[top:bottom], 'band', save_roi, extra_cmdline_params, timings)
+            if mrz is not None and mrz.valid_score >= self.min_valid_score:
+                return mrz
+
+        # Fallback: passporteye on the original file, so no image readable without preprocessing is lost
+        full_mrz = _timed(timings, 'full', lambda: read_mrz(image_path, save_roi=save_roi,
+                                                            extra_cmdline_params=extra_cmdline_params))
+        if full_mrz is not None:
+            full_mrz.aux['method'] = f"{full_mrz.aux.get('method', '')}|full"
+        if mrz is None or (full_mrz is not None and full_mrz.valid_score > mrz.valid_score):
+            return full_mrz
+        return mrz
+
+    def decode(self, image_path: str) -> Image.Image:
+        image = Image.open(image_path)
+        # JPEG images are decoded directly in grayscale and at a reduced scale (1/2, 1/4, 1/8),
+        # never below the target width: a 12 MP photo is never decoded at full size
+        width, height = image.size
+        if width > self.target_width:
+            scale = self.target_width / width
+            image.draft('L', (int(width * scale), int(height * scale)))
+        image.load()
+        return image
+
+    @staticmethod
+    def to_grayscale(image: Image.Image) -> Image.Image:
+        return image if image.mode == 'L' else image.convert('L')
+
+    def downscale(self, image: Image.Image) -> np.ndarray:
+        """Reduce the image by an integer factor (box filter) towards the target width, as a float array in [0, 1]."""
+        factor = image.size[0] // self.target_width
+        if factor >= 2:
+            image = image.reduce(factor)
+        return np.asarray(image, dtype=np.float32) / 255
+
+    def find_band(self, gray: np.ndarray):
+        """
+        Rows (top, bottom) of the MRZ band, with margin, or None if not found.
+
+        The MRZ lines are the rows of the bottom third with the most dark/light
+        transitions across the page: rows above the threshold are grouped in runs,
+        runs closer than three times their height (the lines of the MRZ) are
+        merged, and the run with the most transitions is the band.
+        """
+        height, width = gray.shape
+        start = int(height * BAND_SEARCH_START)
+        region = gray[start:, width // 20:width - width // 20]
+        if region.shape[0] < 3 or region.shape[1] < 3:
+            return None
+        energy = np.abs(np.diff(region, axis=1)).mean(axis=1)
+        window = max(1, height // 100)
+        energy = np.convolve(energy, np.ones(window) / window, mode='same')
+        threshold = energy.mean() + 0.4 * (energy.max() - energy.mean())
+        rows = np.flatnonzero(energy > threshold)
+        if len(rows) == 0:
+            return None
+
+        # Runs of consecutive rows above the threshold, as [first, last]
+        breaks = np.flatnonzero(np.diff(rows) > 1)
+        runs = [[first, last] for first, last in zip(np.r_[rows[0], rows[breaks + 1]], np.r_[rows[breaks], rows[-1]])]
+        merged = [runs[0]]
+        for first, last in runs[1:]:
+            # The gap between the MRZ lines is about twice the height of a line
+            if first - merged[-1][1] <= 3 * max(last - first + 1, merged[-1][1] - merged[-1][0] + 1):
+                merged[-1][1] = last
+            else:
+                merged.append([first, last])
+        first, last = max(merged, key=lambda x: energy[x[0]:x[1] + 1].sum())
+
+        band_height = last - first + 1
+        # Two lines of text are at least 2% and at most 20% of the page height
+        if not 0.02 * height <= band_height <= 0.2 * height:
+            return None
+        margin = int(band_height * self.band_margin)
+        return max(0, start + first - margin), min(height, start + last + 1 + margin)
+
+    @staticmethod
+    def _read(gray: np.ndarray, name: str, save_roi: bool, extra_cmdline_params: str, timings: dict):
+        # passporteye's pipeline, with the already decoded image instead of its loader
+        pipeline = MRZPipeline(None, extra_cmdline_params)
+        pipeline.replace_component('loader', lambda: gray, provides=['img'])
+        _timed(timings, f'locate_{name}', lambda: pipeline['boxes'])
+        mrz = _timed(timings, f'ocr_{name}', lambda: pipeline.result)
+        if mrz is not None:
+            mrz.aux['method'] = f"{mrz.aux.get('method', '')}|{name}"
+            if save_roi:
+                mrz.aux['roi'] = pipeline['roi']
+        return mrz
+
+
+def _timed(timings: dict, stage: str, func, *args):
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
+# Preprocessor used by MrzReader
+default_preprocessor = MrzPreprocessor()
@@ -0,0 +1,124 @@
+from registration.models.guest import Guest, GuestType, GuestGender
+from collections import namedtuple
+from datetime import datetime
+from operator import attrgetter, gt
+
+"""
+Fixed-width codec of the AlloggiatiWeb schedina records (168 characters).
+The layout is the one documented in AlloggiatiWebApi._create_record.
+"""
+
+# name: Guest attribute, length: width in the record, align: '<' (left) or '>' (right),
+# fill: padding character, to_str/from_str: conversion of the attribute (None for plain text)
+Field = namedtuple('Field', ['name', 'length', 'align', 'fill', 'to_str', 'from_str'])
+
+GUEST_TYPE_CODES = {
+    GuestType.SINGLE: "16",
+    GuestType.HOUSE_HEAD: "17",
+    GuestType.GROUP_LEADER: "18",
+    GuestType.FAMILY_MEMBER: "19",
+    GuestType.GROUP_MEMBER: "20"
+}
+
+_GENDERS = {
+    GuestGender.MALE: "1",
+    GuestGender.FEMALE: "2",
+    GuestGender.UNKNOWN: "X"
+}
+
+def _date_to_str(value: datetime) -> str:
+    # gg/mm/aaaa, several times faster than strftime
+    return f"{value.day:02d}/{value.month:02d}/{value.year:04d}"
+
+def _str_to_date(value: str) -> datetime:
+    if len(value) != 10 or value[2] != "/" or value[5] != "/":
+        raise ValueError(value)
+    return datetime(int(value[6:10]), int(value[3:5]), int(value[0:2]))
+
+SCHEDINA_LAYOUT = (
+    Field('guest_type',           2,  '<', ' ', GUEST_TYPE_CODES.__getitem__,
+          {v: k for k, v in GUEST_TYPE_CODES.items()}.__getitem__),
+    Field('arrival_date',         10, '<', ' ', _date_to_str, _str_to_date),
+    Field('num_days',             2,  '>', '0', str, int),
+    Field('last_name',            50, '<', ' ', None, None),
+    Field('first_name',           30, '<', ' ', None, None),
+    Field('gender',               1,  '<', ' ', _GENDERS.__getitem__,
+          {v: k for k, v in _GENDERS.items()}.__getitem__),
+    Field('birth_date',           10, '<', '0', None, None),
+    Field('birth_city',           9,  '<', ' ', None, None),
+    Field('birth_province',       2,  '<', ' ', None, None),
+    Field('birth_country',        9,  '<', ' ', None, None),
+    Field('citizenship',          9,  '<', ' ', None, None),
+    Field('document_type',        5,  '<', ' ', None, None),
+    Field('document_number',      20, '<', ' ', None, None),
+    Field('document_issue_place', 9,  '<', ' ', None, None),
+)
+
+
+class SchedinaCodec:
+    """
+    Encodes Guest objects to fixed-width records and back, following `layout`.
+    The layout is compiled once into a format string and per-field slices.
+    Values longer than their field raise ValueError, or are truncated with truncate=True.
+    """
+
+    def __init__(self, layout: tuple = SCHEDINA_LAYOUT, truncate: bool = False):
+        self.layout = layout
+        self.truncate = truncate
+        self.record_length = sum(x.length for x in layout)
+        self._template = "".join(f"{{{i}:{x.fill}{x.align}{x.length}}}" for i, x in enumerate(layout))
+        self._names = [x.name for x in layout]
+        self._lengths = [x.length for x in layout]
+        # All the attributes of a guest are read with a single call
+        self._get_values = attrgetter(*self._names)
+        self._to_str = [(i, x.to_str) for i, x in enumerate(layout) if x.to_str is not None]
+        self._from_str = [(x.name, x.from_str) for x in layout if x.from_str is not None]
+        self._slices = []
+        offset = 0
+        for field in layout:
+            self._slices.append((offset, offset + field.length))
+            offset += field.length
+
+
+    def encode(self, guest: Guest) -> str:
+        values = list(self._get_values(guest))
+        for i, to_str in self._to_str:
+            values[i] = to_str(values[i])
+        if any(map(gt, map(len, values), self._lengths)):
+            values = self._fit(values)
+        return self._template.format(*values)
+
+
+    def encode_many(self, guests: list) -> list:
+        encode = self.encode
+        return [encode(guest) for guest in guests]
+
+
+    def decode(self, record: str) -> Guest:
+        if len(record) != self.record_length:
+            raise ValueError(f"Record of {len(record)} characters, expected {self.record_length}")
+        values = dict(zip(self._names, [record[start:end].rstrip(" ") for start, end in self._slices]))
+        for name, from_str in self._from_str:
+            try:
+                values[name] = from_str(values[name])
+            except (KeyError, ValueError):
+                raise ValueError(f"Invalid value for field '{name}': '{values[name]}'") from None
+        return Guest(**values)
+
+
+    def decode_many(self, records: list) -> list:
+        decode = self.decode
+        return [decode(record) for record in records]
+
+
+    def _fit(self, values: list) -> list:
+        for i, (value, length) in enumerate(zip(values, self._lengths)):
+            if len(value) > length:
+                if not self.truncate:
+                    raise ValueError(f"Field '{self._names[i]}' longer than {length} characters: '{value}'")
+                values[i] = value[:length]
+        return values
+
+
+# Codec with the default layout
+default_codec = SchedinaCodec()
@@ -1,6 +1,12 @@
+import base64
 import logging
+import random
+import time
 import requests
 import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from xml.parsers import expat
 
 default_headers = {
     'Content-Type': 'application/soap+xml; charset=utf-8'
@@ -19,12 +25,213 @@ def new_body(soap_body: str) -> str:
                 {soap_body}
                 </soap12:Body>'''
 
-def make_request(url: str, body: str, headers: dict = default_headers) -> ET.Element:
-    response = requests.post(url, headers=headers, data=body)
-    logging.debug(f"Request: {ET.tostring(ET.fromstring(body), encoding='unicode', method='xml')}")
-    if response.status_code != 200:
-        raise RuntimeError(f"SOAP request error: {response.status_code} - {response.text}")
-    xml_result= ET.fromstring(response.text)
-    logging.debug(f"Response: {ET.tostring(xml_result, encoding='unicode', method='xml')}")
-    return xml_result
 
+class SoapTransport:
+    """
+    Sends SOAP requests over a pooled keep-alive session, with connect and read
+    timeouts and retries with exponential backoff and jitter.
+
+    Only connection errors and the statuses in retry_statuses are retried: SOAP 1.2
+    faults are returned with status 500, and a read timeout may hit a request the
+    service already processed.
+
+    Requests sent with idempotent=False (e.g. Send, which records the schedine) may
+    have been processed after a 504 or a connection dropped once the body was sent,
+    so for them only the failures to connect and the statuses 502 and 503 are retried.
+    """
+
+    # Statuses retried for non-idempotent requests: the request did not reach the service
+    NON_IDEMPOTENT_RETRY_STATUSES = frozenset((502, 503))
+
+    def __init__(self, connect_timeout: float = 5, read_timeout: float = 60, max_retries: int = 3,
+                 backoff_factor: float = 0.5, backoff_max: float = 10, retry_statuses: tuple = (502, 503, 504),
+                 pool_maxsize: int = 10, session: requests.Session = None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+
+    def make_request(self, url: str, body: str, headers: dict = default_headers,
+                     idempotent: bool = True) -> ET.Element:
+        response = self.post(url, body, headers, idempotent=idempotent)
+        # Serializing the XML for the log is expensive, so only do it when it is actually logged
+        debug = logging.root.isEnabledFor(logging.DEBUG)
+        if debug:
+            logging.debug(f"Request: {ET.tostring(ET.fromstring(body), encoding='unicode', method='xml')}")
+        if response.status_code != 200:
+            raise RuntimeError(f"SOAP request error: {response.status_code} - {response.text}")
+        xml_result= ET.fromstring(response.content)
+        if debug:
+            logging.debug(f"Response: {ET.tostring(xml_result, encoding='unicode', method='xml')}")
+        return xml_result
+
+    def make_streaming_request(self, url: str, body: str, fields: list, sinks: dict = None,
+                               headers: dict = default_headers, chunk_size: int = 65536) -> dict:
+        """
+        Send a request and parse the response incrementally while it is downloaded.
+        The text of `fields` is returned, the text of the fields in `sinks` is passed
+        to the sinks, so large payloads are never held in memory.
+        See SoapStreamParser.
+        """
+        response = self.post(url, body, headers, stream=True)
+        try:
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"Request: {ET.tostring(ET.fromstring(body), encoding='unicode', method='xml')}")
+            if response.status_code != 200:
+                raise RuntimeError(f"SOAP request error: {response.status_code} - {response.text}")
+            parser = SoapStreamParser(fields, sinks)
+            for chunk in response.iter_content(chunk_size):
+                parser.feed(chunk)
+            result = parser.close()
+            logging.debug(f"Response fields: {result}")
+            return result
+        finally:
+            response.close()
+
+    def post(self, url: str, body: str, headers: dict = default_headers, idempotent: bool = True,
+             **kwargs) -> requests.Response:
+        """
+        POST with retries. The last response (or error) is returned (raised) once the retries are exhausted.
+        With idempotent=False, only the failures that happened before the request reached the service are retried.
+        """
+        # Encoded as declared in the Content-Type header (a str body would be sent as latin-1)
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        retry_statuses = self.retry_statuses if idempotent else self.retry_statuses & self.NON_IDEMPOTENT_RETRY_STATUSES
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(url, headers=headers, data=data, timeout=self.timeout, **kwargs)
+                if response.status_code not in retry_statuses or attempt >= self.max_retries:
+                    return response
+                logging.warning(f"SOAP request to {url} returned {response.status_code}, retrying")
+                response.close()
+            except requests.ConnectionError as e:
+                if attempt >= self.max_retries or not (idempotent or self._connect_failed(e)):
+                    raise
+                logging.warning(f"SOAP request to {url} failed: {e}, retrying")
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    @staticmethod
+    def _connect_failed(error: requests.ConnectionError) -> bool:
+        # True if the connection could not be established, so nothing was sent
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": random delay up to the exponential backoff
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * (2 ** attempt)))
+
+    def close(self):
+        self.session.close()
+
+
+class SoapStreamParser:
+    """
+    Incremental (expat) parser of SOAP responses.
+
+    Elements are matched by local name, and only their first occurrence is used.
+    The text of `fields` is collected and returned by close() (None for missing
+    elements). The text of the elements in `sinks` (local name -> sink with write(str)
+    and close()) is streamed to the sink in chunks as it is parsed.
+    """
+
+    def __init__(self, fields: list, sinks: dict = None):
+        self._fields = set(fields)
+        self._sinks = dict(sinks or {})
+        self._values = {}
+        self._found = set()
+        self._current = None
+        self._parser = expat.ParserCreate(namespace_separator=" ")
+        self._parser.buffer_text = True
+        self._parser.buffer_size = 65536
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._text
+
+    def feed(self, data: bytes):
+        self._parser.Parse(data, False)
+
+    def close(self) -> dict:
+        """Finish parsing and return the text of the fields, and of the sink fields found, True."""
+        self._parser.Parse(b"", True)
+        for sink in self._sinks.values():
+            sink.close()
+        # Empty elements give None, as their text in ElementTree
+        result = {field: self._values.get(field) or None for field in self._fields}
+        for name in self._sinks:
+            result[name] = True if name in self._found else None
+        return result
+
+    def _start(self, name, attributes):
+        local_name = name.rsplit(" ", 1)[-1]
+        if local_name not in self._found and (local_name in self._fields or local_name in self._sinks):
+            self._current = local_name
+            self._values[local_name] = ""
+        else:
+            self._current = None
+
+    def _end(self, name):
+        local_name = name.rsplit(" ", 1)[-1]
+        if local_name == self._current:
+            self._found.add(local_name)
+            self._current = None
+
+    def _text(self, text):
+        if self._current is None:
+            return
+        sink = self._sinks.get(self._current)
+        if sink is not None:
+            sink.write(text)
+        else:
+            self._values[self._current] += text
+
+
+class TextFileSink:
+    """Writes the text of a field to a binary file, UTF-8 encoded."""
+
+    def __init__(self, file):
+        self._file = file
+
+    def write(self, text: str):
+        self._file.write(text.encode("utf-8"))
+
+    def close(self):
+        self._file.flush()
+
+
+class Base64FileSink:
+    """Decodes the base64 text of a field to a binary file, a chunk at a time."""
+
+    def __init__(self, file):
+        self._file = file
+        self._pending = ""
+
+    def write(self, text: str):
+        data = self._pending + "".join(text.split())
+        complete = len(data) - len(data) % 4
+        if complete:
+            self._file.write(base64.b64decode(data[:complete]))
+        self._pending = data[complete:]
+
+    def close(self):
+        if self._pending:
+            self._file.write(base64.b64decode(self._pending + "=" * (-len(self._pending) % 4)))
+            self._pending = ""
+        self._file.flush()
+
+
+# Transport used by make_request
+default_transport = SoapTransport()
+
+def make_request(url: str, body: str, headers: dict = default_headers) -> ET.Element:
+    return default_transport.make_request(url, body, headers)
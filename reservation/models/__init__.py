@@ -0,0 +1,4 @@
+from reservation.models.guest_house import GuestHouse, GuestHouseSnapshot, GuestHouseTree
+from reservation.models.apartment import Apartment, ApartmentSnapshot, ApartmentTree
+from reservation.models.reservation import Reservation, ReservationSnapshot
+from reservation.models.monthly_occupancy import MonthlyOccupancy, MonthlyReport, BookingModeReport
@@ -1,19 +1,28 @@
 import uuid
-from sqlalchemy import Column, String, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
+from collections import namedtuple
+from sqlalchemy import Column, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
+from core.services.database_service import Base, UUIDType
 
-Base = declarative_base()
+# Immutable, detached copy of an apartment's columns
+ApartmentSnapshot = namedtuple('ApartmentSnapshot', ['id', 'name', 'guesthouse_id'])
+
+# Apartment of a GuestHouseTree, with a tuple of ReservationSnapshot in check-in order
+ApartmentTree = namedtuple('ApartmentTree', ['id', 'name', 'guesthouse_id', 'reservations'])
 
 class Apartment(Base):
     """Entity class representing an apartment in the guest house."""
     __tablename__ = 'apartments'
+    __table_args__ = (
+        Index('ix_apartments_guesthouse_name', 'guesthouse_id', 'name'),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDType, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(100), nullable=False, unique=True)
-    guesthouse_id = Column(String(36), ForeignKey('guesthouses.id'), nullable=False)
+    guesthouse_id = Column(UUIDType, ForeignKey('guesthouses.id'), nullable=False)
 
     reservations = relationship("Reservation", back_populates="apartment", cascade="all, delete-orphan")
+    monthly_occupancy = relationship("MonthlyOccupancy", back_populates="apartment", cascade="all, delete-orphan")
     guesthouse = relationship("GuestHouse", back_populates="apartments")
 
     def __init__(self, name, id=None):
@@ -26,4 +35,13 @@ class Apartment(Base):
             'id': self.id,
             'name': self.name,
             'guesthouse_id': self.guesthouse_id
-        }
\ No newline at end of file
+        }
+
+    def to_snapshot(self):
+        """Convert apartment to an immutable snapshot."""
+        return ApartmentSnapshot(self.id, self.name, self.guesthouse_id)
+
+    @classmethod
+    def snapshot_columns(cls):
+        """Columns to query to build an ApartmentSnapshot from each row, without loading entities."""
+        return [getattr(cls, field) for field in ApartmentSnapshot._fields]
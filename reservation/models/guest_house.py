@@ -1,15 +1,24 @@
 import uuid
-from sqlalchemy import Column, String
-from sqlalchemy.ext.declarative import declarative_base
+from collections import namedtuple
+from sqlalchemy import Column, String, Index
 from sqlalchemy.orm import relationship
+from core.services.database_service import Base, UUIDType
 
-Base = declarative_base()
+# Immutable, detached copy of a guest house's columns
+GuestHouseSnapshot = namedtuple('GuestHouseSnapshot', ['id', 'name'])
+
+# Guest house with a tuple of ApartmentTree in name order, see GuestHouseService.get_tree
+GuestHouseTree = namedtuple('GuestHouseTree', ['id', 'name', 'apartments'])
 
 class GuestHouse(Base):
     """Entity class representing the guest house with multiple apartments."""
     __tablename__ = 'guesthouses'
+    __table_args__ = (
+        # Keyset pagination of GuestHouseService.get_page
+        Index('ix_guesthouses_name', 'name', 'id'),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDType, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(100), nullable=False)
 
     apartments = relationship("Apartment", back_populates="guesthouse", cascade="all, delete-orphan")
@@ -23,4 +32,13 @@ class GuestHouse(Base):
         return {
             'id': self.id,
             'name': self.name
-        }
\ No newline at end of file
+        }
+
+    def to_snapshot(self):
+        """Convert guest house to an immutable snapshot."""
+        return GuestHouseSnapshot(self.id, self.name)
+
+    @classmethod
+    def snapshot_columns(cls):
+        """Columns to query to build a GuestHouseSnapshot from each row, without loading entities."""
+        return [getattr(cls, field) for field in GuestHouseSnapshot._fields]
@@ -0,0 +1,44 @@
+from collections import namedtuple
+from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy.orm import relationship
+from core.services.database_service import Base, UUIDType
+
+# One row of a monthly report: totals of an apartment in a month
+MonthlyReport = namedtuple('MonthlyReport', ['apartment_id', 'year', 'month', 'nights', 'bookings',
+                                             'guest_nights', 'occupancy_rate'])
+
+# Bookings and nights of an apartment in a month for one booking mode
+BookingModeReport = namedtuple('BookingModeReport', ['apartment_id', 'year', 'month', 'booking_mode',
+                                                     'bookings', 'nights'])
+
+class MonthlyOccupancy(Base):
+    """
+    Summary of the reservations of an apartment in a month, for one booking mode.
+
+    Maintained by the reservation services in the transaction of each write. A stay
+    crossing a month boundary adds its nights to each month it covers; the booking
+    is counted in the month of check-in.
+    """
+    __tablename__ = 'monthly_occupancy'
+
+    apartment_id = Column(UUIDType, ForeignKey('apartments.id'), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    booking_mode = Column(String(20), primary_key=True)
+    nights = Column(Integer, nullable=False, default=0)
+    bookings = Column(Integer, nullable=False, default=0)
+    guest_nights = Column(Integer, nullable=False, default=0)
+
+    apartment = relationship("Apartment", back_populates="monthly_occupancy")
+
+    def to_dict(self):
+        """Convert the summary row to dictionary."""
+        return {
+            'apartment_id': self.apartment_id,
+            'year': self.year,
+            'month': self.month,
+            'booking_mode': self.booking_mode,
+            'nights': self.nights,
+            'bookings': self.bookings,
+            'guest_nights': self.guest_nights
+        }
@@ -1,15 +1,25 @@
 import uuid
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text
-from sqlalchemy.ext.declarative import declarative_base
+from collections import namedtuple
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
+from core.services.database_service import Base, UUIDType
 
-Base = declarative_base()
+# Immutable, detached copy of a reservation's columns
+ReservationSnapshot = namedtuple('ReservationSnapshot', ['id', 'apartment_id', 'check_in_date', 'check_out_date',
+                                                         'num_guests', 'contact_name', 'contact_number',
+                                                         'contact_email', 'booking_mode', 'notes'])
 
 class Reservation(Base):
     """Entity class representing a reservation for an apartment."""
     __tablename__ = 'reservations'
+    __table_args__ = (
+        # Covers the overlap check run by ReservationService.create and update
+        Index('ix_reservations_apartment_dates', 'apartment_id', 'check_out_date', 'check_in_date'),
+        # Keyset pagination and streaming of an apartment's reservations in check-in order
+        Index('ix_reservations_apartment_checkin', 'apartment_id', 'check_in_date', 'id'),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDType, primary_key=True, default=lambda: str(uuid.uuid4()))
     check_in_date = Column(DateTime, nullable=False)
     check_out_date = Column(DateTime, nullable=False)
     num_guests = Column(Integer, nullable=False)
@@ -18,7 +28,7 @@ class Reservation(Base):
     contact_email = Column(String(100), nullable=False)
     booking_mode = Column(String(20), nullable=False)
     notes = Column(Text)
-    apartment_id = Column(String(36), ForeignKey('apartments.id'), nullable=False)
+    apartment_id = Column(UUIDType, ForeignKey('apartments.id'), nullable=False)
 
     apartment = relationship("Apartment", back_populates="reservations")
 
@@ -47,4 +57,15 @@ class Reservation(Base):
             'booking_mode': self.booking_mode,
             'notes': self.notes,
             'apartment_id': self.apartment_id
-        }
\ No newline at end of file
+        }
+
+    def to_snapshot(self):
+        """Convert reservation to an immutable snapshot."""
+        return ReservationSnapshot(self.id, self.apartment_id, self.check_in_date, self.check_out_date,
+                                   self.num_guests, self.contact_name, self.contact_number, self.contact_email,
+                                   self.booking_mode, self.notes)
+
+    @classmethod
+    def snapshot_columns(cls):
+        """Columns to query to build a ReservationSnapshot from each row, without loading entities."""
+        return [getattr(cls, field) for field in ReservationSnapshot._fields]
\ No newline at end of file
@@ -1,16 +1,20 @@
-from reservation.models import Apartment, GuestHouse
+from reservation.models import Apartment, ApartmentSnapshot, GuestHouse
 
 class ApartmentService:
     """Service for apartment operations."""
 
-    def __init__(self, db_service):
+    def __init__(self, db_service, cache=None, calendar=None):
         """
         Initialize the apartment service.
 
         Args:
             db_service (DatabaseService): Database service
+            cache (EntityCache, optional): Cache for get_snapshot and get_snapshot_by_name, shared with GuestHouseService
+            calendar (OccupancyCalendar, optional): Occupancy calendar from which deleted apartments are removed
         """
         self.db_service = db_service
+        self.cache = cache
+        self.calendar = calendar
 
     def create(self, guesthouse_id, name):
         """
@@ -54,6 +58,10 @@ class ApartmentService:
             session.add(apartment)
             session.commit()
 
+            if self.cache is not None:
+                # Drop the cached "not found" results for this apartment
+                self.cache.invalidate(*ApartmentService._cache_keys(apartment.id, guesthouse_id, name))
+
             return apartment.id
         except Exception as e:
             session.rollback()
@@ -99,6 +107,57 @@ class ApartmentService:
         finally:
             session.close()
 
+    def get_snapshot(self, apartment_id):
+        """
+        Get an apartment by ID as a snapshot, through the cache if the service has one.
+
+        Args:
+            apartment_id (str): ID of the apartment
+
+        Returns:
+            ApartmentSnapshot or None: The apartment if found, None otherwise
+        """
+        if self.cache is None:
+            return self._load_snapshot(Apartment.id == apartment_id)
+        return self.cache.get_or_load(('apartment', apartment_id),
+                                      lambda: self._load_snapshot(Apartment.id == apartment_id))
+
+    def get_snapshot_by_name(self, guesthouse_id, name):
+        """
+        Get an apartment by name as a snapshot, through the cache if the service has one.
+
+        Args:
+            guesthouse_id (str): ID of the guest house
+            name (str): Name of the apartment
+
+        Returns:
+            ApartmentSnapshot or None: The apartment if found, None otherwise
+        """
+        criteria = (Apartment.guesthouse_id == guesthouse_id, Apartment.name == name)
+        if self.cache is None:
+            return self._load_snapshot(*criteria)
+        return self.cache.get_or_load(('apartment_name', guesthouse_id, name),
+                                      lambda: self._load_snapshot(*criteria))
+
+    def get_snapshots_by_guesthouse(self, guesthouse_id):
+        """
+        Get the apartments of a guest house as snapshots, in name order.
+
+        Args:
+            guesthouse_id (str): ID of the guest house
+
+        Returns:
+            list: List of ApartmentSnapshot
+        """
+        session = self.db_service.get_session()
+        try:
+            query = session.query(*Apartment.snapshot_columns()).filter(
+                Apartment.guesthouse_id == guesthouse_id
+            ).order_by(Apartment.name)
+            return [ApartmentSnapshot._make(row) for row in query]
+        finally:
+            session.close()
+
     def update(self, apartment_id, name):
         """
         Update an apartment.
@@ -126,8 +185,13 @@ class ApartmentService:
             if existing:
                 return False
 
+            old_name = apartment.name
             apartment.name = name
             session.commit()
+
+            if self.cache is not None:
+                self.cache.invalidate(*ApartmentService._cache_keys(apartment_id, apartment.guesthouse_id, old_name),
+                                      ('apartment_name', apartment.guesthouse_id, name))
             return True
         except Exception as e:
             session.rollback()
@@ -151,11 +215,32 @@ class ApartmentService:
             if not apartment:
                 return False
 
+            keys = ApartmentService._cache_keys(apartment.id, apartment.guesthouse_id, apartment.name)
             session.delete(apartment)
             session.commit()
+
+            if self.cache is not None:
+                self.cache.invalidate(*keys)
+            # The reservations are deleted in cascade, without going through ReservationService
+            if self.calendar is not None:
+                self.calendar.remove_apartment(apartment_id)
             return True
         except Exception as e:
             session.rollback()
             raise e
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+    def _load_snapshot(self, *criteria):
+        """Load the snapshot of the first apartment matching the criteria."""
+        session = self.db_service.get_session()
+        try:
+            row = session.query(*Apartment.snapshot_columns()).filter(*criteria).first()
+            return ApartmentSnapshot._make(row) if row else None
+        finally:
+            session.close()
+
+    @staticmethod
+    def _cache_keys(apartment_id, guesthouse_id, name):
+        """Cache keys under which an apartment can be stored."""
+        return [('apartment', apartment_id), ('apartment_name', guesthouse_id, name)]
@@ -0,0 +1,165 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+from reservation.models import Apartment, GuestHouse
+
+class AsyncApartmentService:
+    """Service for apartment operations on an AsyncDatabaseService, with the semantics of ApartmentService."""
+
+    def __init__(self, db_service):
+        """
+        Initialize the async apartment service.
+
+        Args:
+            db_service (AsyncDatabaseService): Async database service
+        """
+        self.db_service = db_service
+
+    async def create(self, guesthouse_id, name):
+        """
+        Create a new apartment.
+
+        Args:
+            guesthouse_id (str): ID of the guest house
+            name (str): Name of the apartment
+
+        Returns:
+            str or None: ID of the created apartment, or None if the name is already taken
+        """
+        session = self.db_service.get_session()
+        try:
+            # Check if apartment with the same name already exists
+            existing = await session.scalar(select(Apartment.id).where(
+                Apartment.guesthouse_id == guesthouse_id,
+                Apartment.name == name
+            ).limit(1))
+
+            if existing:
+                return None
+
+            # Check if the guest house exists
+            guesthouse = await session.get(GuestHouse, guesthouse_id)
+            if not guesthouse:
+                return None
+
+            # Count existing apartments to enforce the limit
+            apartment_count = await session.scalar(select(func.count()).select_from(Apartment).where(
+                Apartment.guesthouse_id == guesthouse_id
+            ))
+
+            if apartment_count >= 10:
+                return None
+
+            # Create new apartment
+            apartment = Apartment(name=name)
+            apartment.guesthouse_id = guesthouse_id
+
+            session.add(apartment)
+            await session.commit()
+
+            return apartment.id
+        except Exception as e:
+            await session.rollback()
+            raise e
+        finally:
+            await session.close()
+
+    async def get(self, apartment_id):
+        """
+        Get an apartment by ID.
+
+        Args:
+            apartment_id (str): ID of the apartment
+
+        Returns:
+            Apartment or None: The apartment if found, None otherwise
+        """
+        session = self.db_service.get_session()
+        try:
+            return await session.get(Apartment, apartment_id)
+        finally:
+            await session.close()
+
+    async def get_by_name(self, guesthouse_id, name):
+        """
+        Get an apartment by name.
+
+        Args:
+            guesthouse_id (str): ID of the guest house
+            name (str): Name of the apartment
+
+        Returns:
+            Apartment or None: The apartment if found, None otherwise
+        """
+        session = self.db_service.get_session()
+        try:
+            return await session.scalar(select(Apartment).where(
+                Apartment.guesthouse_id == guesthouse_id,
+                Apartment.name == name
+            ).limit(1))
+        finally:
+            await session.close()
+
+    async def update(self, apartment_id, name):
+        """
+        Update an apartment.
+
+        Args:
+            apartment_id (str): ID of the apartment to update
+            name (str): New name for the apartment
+
+        Returns:
+            bool: True if updated successfully, False otherwise
+        """
+        session = self.db_service.get_session()
+        try:
+            apartment = await session.get(Apartment, apartment_id)
+            if not apartment:
+                return False
+
+            # Check if the new name is already taken by another apartment
+            existing = await session.scalar(select(Apartment.id).where(
+                Apartment.guesthouse_id == apartment.guesthouse_id,
+                Apartment.name == name,
+                Apartment.id != apartment_id
+            ).limit(1))
+
+            if existing:
+                return False
+
+            apartment.name = name
+            await session.commit()
+            return True
+        except Exception as e:
+            await session.rollback()
+            raise e
+        finally:
+            await session.close()
+
+    async def delete(self, apartment_id):
+        """
+        Delete an apartment.
+
+        Args:
+            apartment_id (str): ID of the apartment to delete
+
+        Returns:
+            bool: True if deleted successfully, False otherwise
+        """
+        session = self.db_service.get_session()
+        try:
+            # The reservations and the monthly summary are deleted in cascade, so they are loaded
+            # upfront (no lazy loading in asyncio)
+            apartment = await session.scalar(select(Apartment).options(
+                selectinload(Apartment.reservations), selectinload(Apartment.monthly_occupancy)
+            ).where(Apartment.id == apartment_id))
+            if not apartment:
+                return False
+
+            await session.delete(apartment)
+            await session.commit()
+            return True
+        except Exception as e:
+            await session.rollback()
+            raise e
+        finally:
+            await session.close()
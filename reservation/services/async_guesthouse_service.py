@@ -0,0 +1,96 @@
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from reservation.models import Apartment, GuestHouse
+
+class AsyncGuestHouseService:
+    """Service for guest house operations on an AsyncDatabaseService, with the semantics of GuestHouseService."""
+
+    def __init__(self, db_service):
+        """
+        Initialize the async GuestHouse service.
+
+        Args:
+            db_service (AsyncDatabaseService): Async database service
+        """
+        self.db_service = db_service
+
+    async def create(self, name):
+        """
+        Create a new guest house.
+
+        Args:
+            name (str): Name of the guest house
+
+        Returns:
+            str: ID of the created guest house
+        """
+        session = self.db_service.get_session()
+        try:
+            guesthouse = GuestHouse(name=name)
+            session.add(guesthouse)
+            await session.commit()
+            return guesthouse.id
+        except Exception as e:
+            await session.rollback()
+            raise e
+        finally:
+            await session.close()
+
+    async def get(self, guesthouse_id):
+        """
+        Get a guest house by ID.
+
+        Args:
+            guesthouse_id (str): ID of the guest house
+
+        Returns:
+            GuestHouse: Guest house entity
+        """
+        session = self.db_service.get_session()
+        try:
+            return await session.get(GuestHouse, guesthouse_id)
+        finally:
+            await session.close()
+
+    async def get_all(self):
+        """
+        Get all guest houses.
+
+        Returns:
+            list: List of guest houses
+        """
+        session = self.db_service.get_session()
+        try:
+            result = await session.scalars(select(GuestHouse))
+            return result.all()
+        finally:
+            await session.close()
+
+    async def delete(self, guesthouse_id):
+        """
+        Delete a guest house.
+
+        Args:
+            guesthouse_id (str): ID of the guest house to delete
+
+        Returns:
+            bool: True if deleted, False if not found
+        """
+        session = self.db_service.get_session()
+        try:
+            # The apartments, their reservations and monthly summary are deleted in cascade, so they are loaded upfront
+            guesthouse = await session.scalar(select(GuestHouse).options(
+                selectinload(GuestHouse.apartments).selectinload(Apartment.reservations),
+                selectinload(GuestHouse.apartments).selectinload(Apartment.monthly_occupancy)
+            ).where(GuestHouse.id == guesthouse_id))
+            if not guesthouse:
+                return False
+
+            await session.delete(guesthouse)
+            await session.commit()
+            return True
+        except Exception as e:
+            await session.rollback()
+            raise e
+        finally:
+            await session.close()
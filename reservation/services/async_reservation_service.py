@@ -0,0 +1,206 @@
+from sqlalchemy import func, select
+from reservation.models import Reservation
+from reservation.services.reporting_service import ReportingService
+from reservation.services.reservation_service import ReservationService
+
+class AsyncReservationService:
+    """Service for reservation operations on an AsyncDatabaseService, with the semantics of ReservationService."""
+
+    def __init__(self, db_service):
+        """
+        Initialize the async reservation service.
+
+        Args:
+            db_service (AsyncDatabaseService): Async database service
+        """
+        self.db_service = db_service
+
+    async def create(self, apartment_id, check_in_date, check_out_date, num_guests,
+                     contact_name, contact_number, contact_email, booking_mode, notes=""):
+        """
+        Create a new reservation.
+
+        Args:
+            apartment_id (str): ID of the apartment
+            check_in_date (datetime): Date of check-in
+            check_out_date (datetime): Date of check-out
+            num_guests (int): Number of guests
+            contact_name (str): Name of the contact person
+            contact_number (str): Contact phone number
+            contact_email (str): Contact email address
+            booking_mode (str): How the booking was made
+            notes (str, optional): Additional notes
+
+        Returns:
+            str or None: ID of the created reservation, or None if there was a conflict
+        """
+        session = self.db_service.get_session()
+        try:
+            # Check for date conflicts
+            conflicts = await session.scalar(select(func.count()).select_from(Reservation).where(
+                Reservation.apartment_id == apartment_id,
+                Reservation.check_out_date > check_in_date,
+                Reservation.check_in_date < check_out_date
+            ))
+
+            if conflicts > 0:
+                return None
+
+            # Create new reservation
+            reservation = Reservation(
+                check_in_date=check_in_date,
+                check_out_date=check_out_date,
+                num_guests=num_guests,
+                contact_name=contact_name,
+                contact_number=contact_number,
+                contact_email=contact_email,
+                booking_mode=booking_mode,
+                notes=notes
+            )
+            reservation.apartment_id = apartment_id
+
+            session.add(reservation)
+            await session.run_sync(ReportingService.record, [(apartment_id, check_in_date, check_out_date,
+                                                              booking_mode, num_guests)])
+            await session.commit()
+
+            return reservation.id
+        except Exception as e:
+            await session.rollback()
+            raise e
+        finally:
+            await session.close()
+
+    async def get(self, reservation_id):
+        """
+        Get a reservation by ID.
+
+        Args:
+            reservation_id (str): ID of the reservation
+
+        Returns:
+            Reservation or None: The reservation if found, None otherwise
+        """
+        session = self.db_service.get_session()
+        try:
+            return await session.get(Reservation, reservation_id)
+        finally:
+            await session.close()
+
+    async def update(self, reservation_id, **kwargs):
+        """
+        Update a reservation.
+
+        Args:
+            reservation_id (str): ID of the reservation to update
+            **kwargs: Fields to update
+
+        Returns:
+            bool: True if updated successfully, False otherwise
+        """
+        session = self.db_service.get_session()
+        try:
+            reservation = await session.get(Reservation, reservation_id)
+            if not reservation:
+                return False
+
+            # Check for date conflicts if dates are being updated
+            if 'check_in_date' in kwargs or 'check_out_date' in kwargs:
+                check_in_date = kwargs.get('check_in_date', reservation.check_in_date)
+                check_out_date = kwargs.get('check_out_date', reservation.check_out_date)
+
+                conflicts = await session.scalar(select(func.count()).select_from(Reservation).where(
+                    Reservation.apartment_id == reservation.apartment_id,
+                    Reservation.id != reservation_id,
+                    Reservation.check_out_date > check_in_date,
+                    Reservation.check_in_date < check_out_date
+                ))
+
+                if conflicts > 0:
+                    return False
+
+            previous = ReservationService._summary_key(reservation)
+
+            # Update fields
+            for key, value in kwargs.items():
+                if hasattr(reservation, key):
+                    setattr(reservation, key, value)
+
+            current = ReservationService._summary_key(reservation)
+            if current != previous:
+                await session.run_sync(ReportingService.record, [previous], -1)
+                await session.run_sync(ReportingService.record, [current])
+            await session.commit()
+            return True
+        except Exception as e:
+            await session.rollback()
+            raise e
+        finally:
+            await session.close()
+
+    async def delete(self, reservation_id):
+        """
+        Delete a reservation.
+
+        Args:
+            reservation_id (str): ID of the reservation to delete
+
+        Returns:
+            bool: True if deleted, False if not found
+        """
+        session = self.db_service.get_session()
+        try:
+            reservation = await session.get(Reservation, reservation_id)
+            if not reservation:
+                return False
+
+            await session.delete(reservation)
+            await session.run_sync(ReportingService.record, [ReservationService._summary_key(reservation)], -1)
+            await session.commit()
+            return True
+        except Exception as e:
+            await session.rollback()
+            raise e
+        finally:
+            await session.close()
+
+    async def get_all_by_apartment(self, apartment_id):
+        """
+        Get all reservations for an apartment.
+
+        Args:
+            apartment_id (str): ID of the apartment
+
+        Returns:
+            list: List of reservations
+        """
+        session = self.db_service.get_session()
+        try:
+            result = await session.scalars(select(Reservation).where(Reservation.apartment_id == apartment_id))
+            return result.all()
+        finally:
+            await session.close()
+
+    async def find_available_dates(self, apartment_id, start_date, end_date):
+        """
+        Find available date ranges for an apartment.
+
+        Args:
+            apartment_id (str): ID of the apartment
+            start_date (datetime): Start of the date range to check
+            end_date (datetime): End of the date range to check
+
+        Returns:
+            list: List of (start_date, end_date) tuples representing available periods
+        """
+        session = self.db_service.get_session()
+        try:
+            # Only the dates are needed, not the entities
+            result = await session.execute(select(Reservation.check_in_date, Reservation.check_out_date).where(
+                Reservation.apartment_id == apartment_id,
+                Reservation.check_out_date > start_date,
+                Reservation.check_in_date < end_date
+            ).order_by(Reservation.check_in_date))
+            return ReservationService._available_periods(result.all(), start_date, end_date)
+        finally:
+            await session.close()
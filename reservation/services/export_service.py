@@ -0,0 +1,124 @@
+from datetime import datetime
+from sqlalchemy import select
+from reservation.models import Apartment, Reservation
+import csv
+import json
+import os
+
+class ExportService:
+    """Service for bulk exports of reservations to CSV, JSONL and Parquet files."""
+
+    FORMATS = ('csv', 'jsonl', 'parquet')
+
+    # Exported columns, in file order
+    COLUMNS = ('id', 'guesthouse_id', 'apartment_id', 'check_in_date', 'check_out_date', 'num_guests',
+               'contact_name', 'contact_number', 'contact_email', 'booking_mode', 'notes')
+
+    def __init__(self, db_service):
+        """
+        Initialize the export service.
+
+        Args:
+            db_service (DatabaseService): Database service
+        """
+        self.db_service = db_service
+
+    def export(self, output, format='csv', guesthouse_id=None, apartment_id=None, start_date=None, end_date=None,
+               batch_size=10000):
+        """
+        Export reservations to a file, streaming them from the database batch_size rows at a time.
+
+        Rows are read with a server-side cursor where the driver supports it and written one
+        batch at a time (one row group per batch in Parquet), so memory does not depend on the
+        number of reservations. Dates are written in ISO 8601 format, as Reservation.to_dict.
+
+        Args:
+            output (str or file): Path of the file, or a file object: text for CSV and JSONL, binary for Parquet
+            format (str, optional): 'csv', 'jsonl' or 'parquet'; Parquet requires pyarrow
+            guesthouse_id (str, optional): Only the reservations of this guest house
+            apartment_id (str, optional): Only the reservations of this apartment
+            start_date (datetime, optional): Only reservations ending after this date
+            end_date (datetime, optional): Only reservations starting before this date
+            batch_size (int, optional): Rows fetched from the database and written at a time
+
+        Returns:
+            int: Number of exported reservations
+        """
+        if format not in self.FORMATS:
+            raise ValueError(f"Unsupported export format: {format}")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        # Checked before opening the file, so a missing pyarrow does not leave an empty file behind
+        writer = ExportService._parquet_writer() if format == 'parquet' else getattr(ExportService, f"_write_{format}")
+
+        statement = select(*(Apartment.guesthouse_id if column == 'guesthouse_id' else getattr(Reservation, column)
+                             for column in self.COLUMNS)).join(Apartment)
+        if guesthouse_id is not None:
+            statement = statement.where(Apartment.guesthouse_id == guesthouse_id)
+        if apartment_id is not None:
+            statement = statement.where(Reservation.apartment_id == apartment_id)
+        if start_date is not None:
+            statement = statement.where(Reservation.check_out_date > start_date)
+        if end_date is not None:
+            statement = statement.where(Reservation.check_in_date < end_date)
+        statement = statement.order_by(Reservation.apartment_id, Reservation.check_in_date, Reservation.id)
+
+        file = output
+        if isinstance(output, (str, os.PathLike)):
+            file = open(output, 'wb') if format == 'parquet' else open(output, 'w', newline='', encoding='utf-8')
+        session = self.db_service.get_session()
+        try:
+            result = session.execute(statement.execution_options(yield_per=batch_size))
+            return writer(file, result.partitions())
+        finally:
+            session.close()
+            if file is not output:
+                file.close()
+
+    @staticmethod
+    def _write_csv(file, batches):
+        """Write the batches as CSV with a header row."""
+        writer = csv.writer(file)
+        writer.writerow(ExportService.COLUMNS)
+        count = 0
+        for rows in batches:
+            writer.writerows((row[0], row[1], row[2], row[3].isoformat(), row[4].isoformat(), *row[5:])
+                             for row in rows)
+            count += len(rows)
+        return count
+
+    @staticmethod
+    def _write_jsonl(file, batches):
+        """Write the batches as one JSON object per line."""
+        count = 0
+        for rows in batches:
+            file.write("".join(json.dumps(dict(zip(ExportService.COLUMNS, row)), default=datetime.isoformat) + "\n"
+                               for row in rows))
+            count += len(rows)
+        return count
+
+    @staticmethod
+    def _parquet_writer():
+        """Writer of the batches as Parquet row groups, imported on demand since pyarrow is optional."""
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow") from None
+
+        schema = pyarrow.schema([(column, pyarrow.string()) for column in ExportService.COLUMNS[:3]] +
+                                [('check_in_date', pyarrow.timestamp('us')),
+                                 ('check_out_date', pyarrow.timestamp('us')),
+                                 ('num_guests', pyarrow.int32())] +
+                                [(column, pyarrow.string()) for column in ExportService.COLUMNS[6:]])
+
+        def write(file, batches):
+            count = 0
+            with pyarrow.parquet.ParquetWriter(file, schema) as writer:
+                for rows in batches:
+                    writer.write_table(pyarrow.Table.from_arrays(
+                        [pyarrow.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+                        schema=schema))
+                    count += len(rows)
+            return count
+        return write
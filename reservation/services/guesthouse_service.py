@@ -1,16 +1,24 @@
-from reservation.models import GuestHouse
+from sqlalchemy import tuple_
+from sqlalchemy.orm import selectinload
+from core.services.database_service import Page
+from reservation.models import Apartment, ApartmentTree, GuestHouse, GuestHouseSnapshot, GuestHouseTree, Reservation
+from reservation.services.apartment_service import ApartmentService
 
 class GuestHouseService:
     """Service for guest house operations."""
 
-    def __init__(self, db_service):
+    def __init__(self, db_service, cache=None, calendar=None):
         """
         Initialize the GuestHouse service.
 
         Args:
             db_service (DatabaseService): Database service
+            cache (EntityCache, optional): Cache for get_snapshot, shared with ApartmentService
+            calendar (OccupancyCalendar, optional): Occupancy calendar from which deleted apartments are removed
         """
         self.db_service = db_service
+        self.cache = cache
+        self.calendar = calendar
 
     def create(self, name):
         """
@@ -50,6 +58,20 @@ class GuestHouseService:
             session.rollback()
             raise e
 
+    def get_snapshot(self, guesthouse_id):
+        """
+        Get a guest house by ID as a snapshot, through the cache if the service has one.
+
+        Args:
+            guesthouse_id (str): ID of the guest house
+
+        Returns:
+            GuestHouseSnapshot or None: The guest house if found, None otherwise
+        """
+        if self.cache is None:
+            return self._load_snapshot(guesthouse_id)
+        return self.cache.get_or_load(('guesthouse', guesthouse_id), lambda: self._load_snapshot(guesthouse_id))
+
     def get_all(self):
         """
         Get all guest houses.
@@ -65,6 +87,103 @@ class GuestHouseService:
             session.rollback()
             raise e
 
+    def get_all_snapshots(self):
+        """
+        Get all guest houses as snapshots, in name order, read from the columns without loading the entities.
+
+        Returns:
+            list: List of GuestHouseSnapshot
+        """
+        session = self.db_service.get_session()
+        try:
+            query = session.query(*GuestHouse.snapshot_columns()).order_by(GuestHouse.name, GuestHouse.id)
+            return [GuestHouseSnapshot._make(row) for row in query]
+        finally:
+            session.close()
+
+    def get_tree(self, guesthouse_id, from_date=None):
+        """
+        Get a guest house with its apartments and their reservations, for dashboards.
+
+        Always three queries, whatever the number of apartments: the guest house, then
+        the apartments and the reservations, each loaded with one SELECT ... IN.
+
+        Args:
+            guesthouse_id (str): ID of the guest house
+            from_date (datetime, optional): Only reservations ending after this date, e.g. today for the
+                                            current and upcoming stays
+
+        Returns:
+            GuestHouseTree or None: The guest house if found, None otherwise
+        """
+        reservations = Apartment.reservations
+        if from_date is not None:
+            reservations = reservations.and_(Reservation.check_out_date > from_date)
+
+        session = self.db_service.get_session()
+        try:
+            guesthouse = session.query(GuestHouse).options(
+                selectinload(GuestHouse.apartments).selectinload(reservations)
+            ).filter(GuestHouse.id == guesthouse_id).first()
+            if guesthouse is None:
+                return None
+
+            apartments = tuple(
+                ApartmentTree(apartment.id, apartment.name, apartment.guesthouse_id, tuple(
+                    reservation.to_snapshot()
+                    for reservation in sorted(apartment.reservations, key=lambda r: (r.check_in_date, r.id))))
+                for apartment in sorted(guesthouse.apartments, key=lambda a: a.name))
+            return GuestHouseTree(guesthouse.id, guesthouse.name, apartments)
+        finally:
+            session.close()
+
+    def get_page(self, limit=50, after=None):
+        """
+        Get one page of the guest houses, in name order.
+
+        Args:
+            limit (int, optional): Maximum number of guest houses in the page
+            after (tuple, optional): next_cursor of the previous page
+
+        Returns:
+            Page: The guest houses and the cursor of the next page
+        """
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+
+        session = self.db_service.get_session()
+        try:
+            query = session.query(GuestHouse).order_by(GuestHouse.name, GuestHouse.id)
+            if after is not None:
+                query = query.filter(tuple_(GuestHouse.name, GuestHouse.id) >
+                                     tuple_(*after, types=(GuestHouse.name.type, GuestHouse.id.type)))
+            guesthouses = query.limit(limit + 1).all()
+            if len(guesthouses) <= limit:
+                return Page(guesthouses, None)
+            guesthouses = guesthouses[:limit]
+            return Page(guesthouses, (guesthouses[-1].name, guesthouses[-1].id))
+        finally:
+            session.close()
+
+    def iter_all(self, batch_size=1000):
+        """
+        Stream all guest houses, in name order, batch_size rows at a time.
+
+        The rows come from a dedicated session, which stays open until the generator is
+        exhausted or closed.
+
+        Args:
+            batch_size (int, optional): Rows fetched from the database at a time
+
+        Yields:
+            GuestHouse: The guest houses
+        """
+        session = self.db_service.new_session()
+        try:
+            yield from session.query(GuestHouse).order_by(GuestHouse.name, GuestHouse.id).yield_per(batch_size)
+        finally:
+            session.close()
+
     def delete(self, guesthouse_id):
         """
         Delete a guest house.
@@ -81,11 +200,33 @@ class GuestHouseService:
             if not guesthouse:
                 return False
 
+            # The apartments are deleted in cascade, with their reservations
+            keys = [('guesthouse', guesthouse_id)]
+            apartment_ids = []
+            for apartment in guesthouse.apartments:
+                keys.extend(ApartmentService._cache_keys(apartment.id, guesthouse_id, apartment.name))
+                apartment_ids.append(apartment.id)
+
             session.delete(guesthouse)
             session.commit()
+
+            if self.cache is not None:
+                self.cache.invalidate(*keys)
+            if self.calendar is not None:
+                for apartment_id in apartment_ids:
+                    self.calendar.remove_apartment(apartment_id)
             return True
         except Exception as e:
             session.rollback()
             raise e
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+    def _load_snapshot(self, guesthouse_id):
+        """Load the snapshot of a guest house."""
+        session = self.db_service.get_session()
+        try:
+            row = session.query(*GuestHouse.snapshot_columns()).filter(GuestHouse.id == guesthouse_id).first()
+            return GuestHouseSnapshot._make(row) if row else None
+        finally:
+            session.close()
@@ -0,0 +1,184 @@
+from calendar import monthrange
+from datetime import date, timedelta
+from sqlalchemy import and_, delete, func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from reservation.models import Apartment, BookingModeReport, MonthlyOccupancy, MonthlyReport, Reservation
+
+class ReportingService:
+    """Service for occupancy reports, computed in SQL on the monthly_occupancy summary table."""
+
+    COUNTERS = ('nights', 'bookings', 'guest_nights')
+
+    def __init__(self, db_service):
+        """
+        Initialize the reporting service.
+
+        Args:
+            db_service (DatabaseService): Database service
+        """
+        self.db_service = db_service
+
+    def monthly_report(self, start_date, end_date, guesthouse_id=None, apartment_id=None):
+        """
+        Nights sold, bookings and occupancy rate per apartment per month.
+
+        Args:
+            start_date (datetime): Start of the period, the report covers the months overlapping it
+            end_date (datetime): End of the period
+            guesthouse_id (str, optional): Only the apartments of this guest house
+            apartment_id (str, optional): Only this apartment
+
+        Returns:
+            list: MonthlyReport rows sorted by apartment and month; months without reservations are omitted
+        """
+        session = self.db_service.get_session()
+        try:
+            query = session.query(
+                MonthlyOccupancy.apartment_id, MonthlyOccupancy.year, MonthlyOccupancy.month,
+                func.sum(MonthlyOccupancy.nights), func.sum(MonthlyOccupancy.bookings),
+                func.sum(MonthlyOccupancy.guest_nights)
+            )
+            query = self._filter(query, start_date, end_date, guesthouse_id, apartment_id).group_by(
+                MonthlyOccupancy.apartment_id, MonthlyOccupancy.year, MonthlyOccupancy.month
+            ).order_by(MonthlyOccupancy.apartment_id, MonthlyOccupancy.year, MonthlyOccupancy.month)
+
+            return [MonthlyReport(apartment, year, month, nights, bookings, guest_nights,
+                                  nights / monthrange(year, month)[1])
+                    for apartment, year, month, nights, bookings, guest_nights in query.all()
+                    if nights or bookings]
+        finally:
+            session.close()
+
+    def bookings_by_mode(self, start_date, end_date, guesthouse_id=None, apartment_id=None):
+        """
+        Bookings and nights per booking mode per apartment per month.
+
+        Args:
+            start_date (datetime): Start of the period, the report covers the months overlapping it
+            end_date (datetime): End of the period
+            guesthouse_id (str, optional): Only the apartments of this guest house
+            apartment_id (str, optional): Only this apartment
+
+        Returns:
+            list: BookingModeReport rows sorted by apartment, month and booking mode
+        """
+        session = self.db_service.get_session()
+        try:
+            query = session.query(
+                MonthlyOccupancy.apartment_id, MonthlyOccupancy.year, MonthlyOccupancy.month,
+                MonthlyOccupancy.booking_mode, MonthlyOccupancy.bookings, MonthlyOccupancy.nights
+            )
+            query = self._filter(query, start_date, end_date, guesthouse_id, apartment_id).filter(
+                (MonthlyOccupancy.bookings != 0) | (MonthlyOccupancy.nights != 0)
+            ).order_by(MonthlyOccupancy.apartment_id, MonthlyOccupancy.year, MonthlyOccupancy.month,
+                       MonthlyOccupancy.booking_mode)
+            return [BookingModeReport(*row) for row in query.all()]
+        finally:
+            session.close()
+
+    def rebuild(self):
+        """
+        Recompute the summary table from the reservations table.
+
+        Needed once for the reservations written before the summary table existed,
+        or by means other than the reservation services.
+
+        Returns:
+            int: Number of summary rows written
+        """
+        session = self.db_service.get_session()
+        try:
+            totals = {}
+            rows = session.query(
+                Reservation.apartment_id, Reservation.check_in_date, Reservation.check_out_date,
+                Reservation.booking_mode, Reservation.num_guests
+            ).yield_per(10000)
+            for apartment_id, check_in_date, check_out_date, booking_mode, num_guests in rows:
+                ReportingService._add_contributions(totals, apartment_id, check_in_date, check_out_date,
+                                                    booking_mode, num_guests, 1)
+
+            session.execute(delete(MonthlyOccupancy))
+            if totals:
+                session.execute(insert(MonthlyOccupancy), ReportingService._to_rows(totals))
+            session.commit()
+            return len(totals)
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
+    @staticmethod
+    def record(session, reservations, sign=1):
+        """
+        Add (or, with sign=-1, subtract) reservations to the summary table, in the caller's transaction.
+
+        Args:
+            session (Session): Session of the reservation write
+            reservations (list): (apartment_id, check_in_date, check_out_date, booking_mode, num_guests) tuples
+            sign (int, optional): 1 for reservations written, -1 for reservations removed
+        """
+        totals = {}
+        for apartment_id, check_in_date, check_out_date, booking_mode, num_guests in reservations:
+            ReportingService._add_contributions(totals, apartment_id, check_in_date, check_out_date,
+                                                booking_mode, num_guests, sign)
+        if not totals:
+            return
+
+        rows = ReportingService._to_rows(totals)
+        table = MonthlyOccupancy.__table__
+        dialect = session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            # Atomic increment: no read, and no race between writers creating the same row
+            statement = (sqlite if dialect == 'sqlite' else postgresql).insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=[column.name for column in table.primary_key],
+                set_={name: table.c[name] + statement.excluded[name] for name in ReportingService.COUNTERS}
+            )
+            session.execute(statement, rows)
+        else:
+            for row in rows:
+                result = session.execute(update(table).where(
+                    table.c.apartment_id == row['apartment_id'], table.c.year == row['year'],
+                    table.c.month == row['month'], table.c.booking_mode == row['booking_mode']
+                ).values({name: table.c[name] + row[name] for name in ReportingService.COUNTERS}))
+                if result.rowcount == 0:
+                    session.execute(insert(table), [row])
+
+    @staticmethod
+    def _filter(query, start_date, end_date, guesthouse_id, apartment_id):
+        # Months as year * 12 + month, to compare (year, month) pairs in one expression; the
+        # condition on the year alone lets the primary key (apartment_id, year, ...) narrow the scan
+        last_day = end_date - timedelta(microseconds=1)
+        period = MonthlyOccupancy.year * 12 + MonthlyOccupancy.month
+        query = query.filter(MonthlyOccupancy.year.between(start_date.year, last_day.year),
+                             period.between(start_date.year * 12 + start_date.month,
+                                            last_day.year * 12 + last_day.month))
+        if apartment_id is not None:
+            query = query.filter(MonthlyOccupancy.apartment_id == apartment_id)
+        if guesthouse_id is not None:
+            query = query.join(Apartment, and_(Apartment.id == MonthlyOccupancy.apartment_id,
+                                               Apartment.guesthouse_id == guesthouse_id))
+        return query
+
+    @staticmethod
+    def _add_contributions(totals, apartment_id, check_in_date, check_out_date, booking_mode, num_guests, sign):
+        # Split the nights of a stay across the months it covers; the booking counts in the check-in month
+        day = check_in_date.date()
+        last = check_out_date.date()
+        first = True
+        while first or day < last:
+            month_end = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+            nights = max((min(month_end, last) - day).days, 0)
+            counters = totals.setdefault((apartment_id, day.year, day.month, booking_mode), [0, 0, 0])
+            counters[0] += sign * nights
+            counters[1] += sign if first else 0
+            counters[2] += sign * nights * num_guests
+            day = month_end
+            first = False
+
+    @staticmethod
+    def _to_rows(totals):
+        return [{'apartment_id': apartment_id, 'year': year, 'month': month, 'booking_mode': booking_mode,
+                 'nights': nights, 'bookings': bookings, 'guest_nights': guest_nights}
+                for (apartment_id, year, month, booking_mode), (nights, bookings, guest_nights) in totals.items()]
@@ -1,16 +1,31 @@
-from reservation.models import Reservation
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from sqlalchemy import and_, insert, or_, tuple_
+from core.services.database_service import Page
+from reservation.models import Reservation, ReservationSnapshot
+from reservation.services.reporting_service import ReportingService
+import uuid
 
 class ReservationService:
     """Service for reservation operations."""
 
-    def __init__(self, db_service):
+    # Outcome of one row of create_many: exactly one of the two fields is set
+    BulkResult = namedtuple('BulkResult', ['reservation_id', 'conflict_id'])
+
+    # Apartments per conflict query of create_many: three parameters each, below SQLite's
+    # limit of 999 bound parameters and its expression depth limit of 1000
+    BULK_QUERY_APARTMENTS = 100
+
+    def __init__(self, db_service, calendar=None):
         """
         Initialize the reservation service.
 
         Args:
             db_service (DatabaseService): Database service
+            calendar (OccupancyCalendar, optional): Occupancy calendar kept up to date with the writes
         """
         self.db_service = db_service
+        self.calendar = calendar
 
     def create(self, apartment_id, check_in_date, check_out_date, num_guests,
                contact_name, contact_number, contact_email, booking_mode, notes=""):
@@ -58,8 +73,12 @@ class ReservationService:
             reservation.apartment_id = apartment_id
 
             session.add(reservation)
+            ReportingService.record(session, [(apartment_id, check_in_date, check_out_date, booking_mode, num_guests)])
             session.commit()
 
+            if self.calendar is not None:
+                self.calendar.add(apartment_id, check_in_date, check_out_date)
+
             return reservation.id
         except Exception as e:
             session.rollback()
@@ -67,6 +86,128 @@ class ReservationService:
         finally:
             session.close()
 
+    def create_many(self, reservations):
+        """
+        Create many reservations in a single transaction.
+
+        Conflicts are detected with one query for the existing reservations of every
+        BULK_QUERY_APARTMENTS apartments involved, followed by an in-memory sweep per apartment. Rows are
+        accepted in input order, as if create had been called for each of them, so a
+        row conflicting with an earlier row of the same batch is rejected.
+
+        Args:
+            reservations (iterable): Dicts with the arguments of create
+
+        Returns:
+            list: One BulkResult per input row, with the ID of the created reservation
+                  or the ID of the reservation (existing or earlier in the batch) it conflicts with
+        """
+        # Read twice: once for the windows, once for the sweep
+        reservations = list(reservations)
+
+        # Window of interest of each apartment
+        windows = {}
+        for row in reservations:
+            window = windows.get(row['apartment_id'])
+            if window is None:
+                windows[row['apartment_id']] = [row['check_in_date'], row['check_out_date']]
+            else:
+                window[0] = min(window[0], row['check_in_date'])
+                window[1] = max(window[1], row['check_out_date'])
+
+        session = self.db_service.get_session()
+        try:
+            existing = {}
+            items = list(windows.items())
+            for start in range(0, len(items), self.BULK_QUERY_APARTMENTS):
+                rows = session.query(
+                    Reservation.apartment_id, Reservation.check_in_date,
+                    Reservation.check_out_date, Reservation.id
+                ).filter(or_(*[
+                    and_(Reservation.apartment_id == apartment_id,
+                         Reservation.check_out_date > window[0],
+                         Reservation.check_in_date < window[1])
+                    for apartment_id, window in items[start:start + self.BULK_QUERY_APARTMENTS]
+                ])).order_by(Reservation.apartment_id, Reservation.check_in_date).all()
+                for apartment_id, check_in_date, check_out_date, reservation_id in rows:
+                    existing.setdefault(apartment_id, []).append((check_in_date, check_out_date, reservation_id))
+
+            # Existing reservations: sorted starts with the running maximum of the ends, so the
+            # reservations starting before a check-out are a prefix whose latest end is known
+            existing_index = {}
+            for apartment_id, intervals in existing.items():
+                starts, max_ends, max_ids = [], [], []
+                for check_in_date, check_out_date, reservation_id in intervals:
+                    starts.append(check_in_date)
+                    if not max_ends or check_out_date > max_ends[-1]:
+                        max_ends.append(check_out_date)
+                        max_ids.append(reservation_id)
+                    else:
+                        max_ends.append(max_ends[-1])
+                        max_ids.append(max_ids[-1])
+                existing_index[apartment_id] = (starts, max_ends, max_ids)
+
+            # Accepted rows of the batch: disjoint, so both bounds stay sorted
+            accepted = {apartment_id: ([], [], []) for apartment_id in windows}
+
+            results = []
+            new_rows = []
+            for row in reservations:
+                apartment_id = row['apartment_id']
+                check_in_date = row['check_in_date']
+                check_out_date = row['check_out_date']
+
+                conflict_id = None
+                if apartment_id in existing_index:
+                    starts, max_ends, max_ids = existing_index[apartment_id]
+                    k = bisect_left(starts, check_out_date)
+                    if k > 0 and max_ends[k - 1] > check_in_date:
+                        conflict_id = max_ids[k - 1]
+
+                starts, ends, ids = accepted[apartment_id]
+                i = bisect_right(ends, check_in_date)
+                if conflict_id is None and i < len(starts) and starts[i] < check_out_date:
+                    conflict_id = ids[i]
+
+                if conflict_id is not None:
+                    results.append(ReservationService.BulkResult(None, conflict_id))
+                    continue
+
+                reservation_id = str(uuid.uuid4())
+                starts.insert(i, check_in_date)
+                ends.insert(i, check_out_date)
+                ids.insert(i, reservation_id)
+                new_rows.append({
+                    'id': reservation_id,
+                    'apartment_id': apartment_id,
+                    'check_in_date': check_in_date,
+                    'check_out_date': check_out_date,
+                    'num_guests': row['num_guests'],
+                    'contact_name': row['contact_name'],
+                    'contact_number': row['contact_number'],
+                    'contact_email': row['contact_email'],
+                    'booking_mode': row['booking_mode'],
+                    'notes': row.get('notes', "")
+                })
+                results.append(ReservationService.BulkResult(reservation_id, None))
+
+            if new_rows:
+                session.execute(insert(Reservation), new_rows)
+                ReportingService.record(session, [(row['apartment_id'], row['check_in_date'], row['check_out_date'],
+                                                   row['booking_mode'], row['num_guests']) for row in new_rows])
+            session.commit()
+
+            if self.calendar is not None:
+                for row in new_rows:
+                    self.calendar.add(row['apartment_id'], row['check_in_date'], row['check_out_date'])
+
+            return results
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
     def get(self, reservation_id):
         """
         Get a reservation by ID.
@@ -84,6 +225,23 @@ class ReservationService:
         finally:
             session.close()
 
+    def get_snapshot(self, reservation_id):
+        """
+        Get a reservation by ID as a snapshot, read from the columns without loading the entity.
+
+        Args:
+            reservation_id (str): ID of the reservation
+
+        Returns:
+            ReservationSnapshot or None: The reservation if found, None otherwise
+        """
+        session = self.db_service.get_session()
+        try:
+            row = session.query(*Reservation.snapshot_columns()).filter(Reservation.id == reservation_id).first()
+            return ReservationSnapshot._make(row) if row else None
+        finally:
+            session.close()
+
     def update(self, reservation_id, **kwargs):
         """
         Update a reservation.
@@ -116,12 +274,24 @@ class ReservationService:
                 if conflicts > 0:
                     return False
 
+            previous = ReservationService._summary_key(reservation)
+
             # Update fields
             for key, value in kwargs.items():
                 if hasattr(reservation, key):
                     setattr(reservation, key, value)
 
+            # Read before the commit, which expires the attributes
+            current = ReservationService._summary_key(reservation)
+            if current != previous:
+                ReportingService.record(session, [previous], -1)
+                ReportingService.record(session, [current])
             session.commit()
+
+            if self.calendar is not None and current[:3] != previous[:3]:
+                self.calendar.remove(*previous[:3])
+                self.calendar.add(*current[:3])
+
             return True
         except Exception as e:
             session.rollback()
@@ -145,8 +315,15 @@ class ReservationService:
             if not reservation:
                 return False
 
+            previous = ReservationService._summary_key(reservation)
+
             session.delete(reservation)
+            ReportingService.record(session, [previous], -1)
             session.commit()
+
+            if self.calendar is not None:
+                self.calendar.remove(*previous[:3])
+
             return True
         except Exception as e:
             session.rollback()
@@ -173,6 +350,101 @@ class ReservationService:
         finally:
             session.close()
 
+    def get_page_by_apartment(self, apartment_id, limit=50, after=None, start_date=None, end_date=None):
+        """
+        Get one page of the reservations of an apartment, in check-in order.
+
+        Pages are read by keyset on (check_in_date, id), so the cost of a page does not
+        grow with the number of reservations before it.
+
+        Args:
+            apartment_id (str): ID of the apartment
+            limit (int, optional): Maximum number of reservations in the page
+            after (tuple, optional): next_cursor of the previous page
+            start_date (datetime, optional): Only reservations ending after this date
+            end_date (datetime, optional): Only reservations starting before this date
+
+        Returns:
+            Page: The reservations and the cursor of the next page
+        """
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+
+        session = self.db_service.get_session()
+        try:
+            query = self._by_apartment_query(session, apartment_id, start_date, end_date)
+            if after is not None:
+                query = query.filter(tuple_(Reservation.check_in_date, Reservation.id) >
+                                     tuple_(*after, types=(Reservation.check_in_date.type, Reservation.id.type)))
+            # One extra row tells whether there is a next page
+            reservations = query.limit(limit + 1).all()
+            if len(reservations) <= limit:
+                return Page(reservations, None)
+            reservations = reservations[:limit]
+            return Page(reservations, (reservations[-1].check_in_date, reservations[-1].id))
+        finally:
+            session.close()
+
+    def get_snapshots_by_apartment(self, apartment_id, start_date=None, end_date=None):
+        """
+        Get the reservations of an apartment as snapshots, in check-in order.
+
+        The rows are read as plain tuples, without the identity map and attribute state
+        of the entities, for read-only listings.
+
+        Args:
+            apartment_id (str): ID of the apartment
+            start_date (datetime, optional): Only reservations ending after this date
+            end_date (datetime, optional): Only reservations starting before this date
+
+        Returns:
+            list: List of ReservationSnapshot
+        """
+        session = self.db_service.get_session()
+        try:
+            query = self._by_apartment_query(session, apartment_id, start_date, end_date,
+                                             Reservation.snapshot_columns())
+            return [ReservationSnapshot._make(row) for row in query]
+        finally:
+            session.close()
+
+    def iter_by_apartment(self, apartment_id, start_date=None, end_date=None, batch_size=1000):
+        """
+        Stream the reservations of an apartment, in check-in order.
+
+        Rows are fetched batch_size at a time from a dedicated session, which stays open
+        until the generator is exhausted or closed, so memory does not depend on the
+        number of reservations as long as the caller does not keep them. The other
+        methods of the service can be called while iterating, also in scoped mode.
+
+        Args:
+            apartment_id (str): ID of the apartment
+            start_date (datetime, optional): Only reservations ending after this date
+            end_date (datetime, optional): Only reservations starting before this date
+            batch_size (int, optional): Rows fetched from the database at a time
+
+        Yields:
+            Reservation: The reservations
+        """
+        session = self.db_service.new_session()
+        try:
+            yield from self._by_apartment_query(session, apartment_id, start_date, end_date).yield_per(batch_size)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _by_apartment_query(session, apartment_id, start_date, end_date, columns=None):
+        """
+        Reservations of an apartment overlapping an optional date window, in (check_in_date, id) order.
+        With columns, the query returns those columns instead of the entities.
+        """
+        query = session.query(*(columns or [Reservation])).filter(Reservation.apartment_id == apartment_id)
+        if start_date is not None:
+            query = query.filter(Reservation.check_out_date > start_date)
+        if end_date is not None:
+            query = query.filter(Reservation.check_in_date < end_date)
+        return query.order_by(Reservation.check_in_date, Reservation.id)
+
     def find_available_dates(self, apartment_id, start_date, end_date):
         """
         Find available date ranges for an apartment.
@@ -194,26 +466,47 @@ class ReservationService:
                 Reservation.check_in_date < end_date
             ).order_by(Reservation.check_in_date).all()
 
-            # If no reservations, the entire range is available
-            if not reservations:
-                return [(start_date, end_date)]
+            return ReservationService._available_periods(reservations, start_date, end_date)
+        finally:
+            session.close()
 
-            # Find available periods
-            available_periods = []
-            current_date = start_date
+    @staticmethod
+    def _summary_key(reservation):
+        # Columns of a reservation that the occupancy calendar and the monthly summary depend on
+        return (reservation.apartment_id, reservation.check_in_date, reservation.check_out_date,
+                reservation.booking_mode, reservation.num_guests)
 
-            for res in reservations:
-                # If there's a gap before this reservation, add it
-                if current_date < res.check_in_date:
-                    available_periods.append((current_date, res.check_in_date))
+    @staticmethod
+    def _available_periods(reservations, start_date, end_date):
+        """
+        Gaps between reservations sorted by check-in date, within a date range.
 
-                # Move current_date to after this reservation
-                current_date = max(current_date, res.check_out_date)
+        Args:
+            reservations (list): Reservations overlapping the range, sorted by check_in_date
+            start_date (datetime): Start of the date range
+            end_date (datetime): End of the date range
 
-            # If there's a gap after the last reservation, add it
-            if current_date < end_date:
-                available_periods.append((current_date, end_date))
+        Returns:
+            list: List of (start_date, end_date) tuples representing available periods
+        """
+        # If no reservations, the entire range is available
+        if not reservations:
+            return [(start_date, end_date)]
 
-            return available_periods
-        finally:
-            session.close()
\ No newline at end of file
+        # Find available periods
+        available_periods = []
+        current_date = start_date
+
+        for res in reservations:
+            # If there's a gap before this reservation, add it
+            if current_date < res.check_in_date:
+                available_periods.append((current_date, res.check_in_date))
+
+            # Move current_date to after this reservation
+            current_date = max(current_date, res.check_out_date)
+
+        # If there's a gap after the last reservation, add it
+        if current_date < end_date:
+            available_periods.append((current_date, end_date))
+
+        return available_periods
\ No newline at end of file
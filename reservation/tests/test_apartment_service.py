@@ -0,0 +1,78 @@
+from core.services.database_service import DatabaseService
+from core.services.entity_cache import EntityCache
+from reservation.models import Apartment, ApartmentSnapshot, GuestHouse, GuestHouseSnapshot
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.guesthouse_service import GuestHouseService
+import unittest
+import uuid
+
+class TestApartmentServiceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.db_service = DatabaseService("sqlite://")
+        self.cache = EntityCache()
+        self.guesthouse_service = GuestHouseService(self.db_service, self.cache)
+        self.apartment_service = ApartmentService(self.db_service, self.cache)
+        self.guesthouse_id = self.guesthouse_service.create("Casa")
+
+    def test_get_snapshot(self):
+        apartment_id = self.apartment_service.create(self.guesthouse_id, "Apt 1")
+        apartment = self.apartment_service.get_snapshot(apartment_id)
+        self.assertEqual(apartment, ApartmentSnapshot(apartment_id, "Apt 1", self.guesthouse_id))
+        self.assertIs(self.apartment_service.get_snapshot(apartment_id), apartment)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        with self.assertRaises(AttributeError):
+            apartment.name = "Other"
+
+    def test_get_returns_entity(self):
+        # The cache only serves the snapshot methods: get and get_by_name return entities either way
+        apartment_id = self.apartment_service.create(self.guesthouse_id, "Apt 1")
+        self.apartment_service.get_snapshot(apartment_id)
+        self.assertIsInstance(self.apartment_service.get(apartment_id), Apartment)
+        self.assertIsInstance(self.apartment_service.get_by_name(self.guesthouse_id, "Apt 1"), Apartment)
+        self.assertIsInstance(self.guesthouse_service.get(self.guesthouse_id), GuestHouse)
+        self.assertEqual(self.apartment_service.get(apartment_id).to_dict()['name'], "Apt 1")
+
+    def test_snapshot_without_cache(self):
+        apartment_service = ApartmentService(self.db_service)
+        apartment_id = apartment_service.create(self.guesthouse_id, "Apt 1")
+        self.assertEqual(apartment_service.get_snapshot(apartment_id),
+                         ApartmentSnapshot(apartment_id, "Apt 1", self.guesthouse_id))
+        self.assertEqual(apartment_service.get_snapshot_by_name(self.guesthouse_id, "Apt 1").id, apartment_id)
+        self.assertEqual(GuestHouseService(self.db_service).get_snapshot(self.guesthouse_id),
+                         GuestHouseSnapshot(self.guesthouse_id, "Casa"))
+        self.assertIsNone(apartment_service.get_snapshot(str(uuid.uuid4())))
+
+    def test_create_invalidates_missing_name(self):
+        self.assertIsNone(self.apartment_service.get_snapshot_by_name(self.guesthouse_id, "Apt 1"))
+        apartment_id = self.apartment_service.create(self.guesthouse_id, "Apt 1")
+        self.assertEqual(self.apartment_service.get_snapshot_by_name(self.guesthouse_id, "Apt 1").id, apartment_id)
+
+    def test_update_invalidates(self):
+        apartment_id = self.apartment_service.create(self.guesthouse_id, "Apt 1")
+        self.apartment_service.get_snapshot(apartment_id)
+        self.apartment_service.get_snapshot_by_name(self.guesthouse_id, "Apt 1")
+        self.assertIsNone(self.apartment_service.get_snapshot_by_name(self.guesthouse_id, "Apt 2"))
+
+        self.assertTrue(self.apartment_service.update(apartment_id, "Apt 2"))
+        self.assertEqual(self.apartment_service.get_snapshot(apartment_id).name, "Apt 2")
+        self.assertIsNone(self.apartment_service.get_snapshot_by_name(self.guesthouse_id, "Apt 1"))
+        self.assertEqual(self.apartment_service.get_snapshot_by_name(self.guesthouse_id, "Apt 2").id, apartment_id)
+
+    def test_delete_invalidates(self):
+        apartment_id = self.apartment_service.create(self.guesthouse_id, "Apt 1")
+        self.apartment_service.get_snapshot(apartment_id)
+        self.assertTrue(self.apartment_service.delete(apartment_id))
+        self.assertIsNone(self.apartment_service.get_snapshot(apartment_id))
+
+    def test_guesthouse_delete_invalidates_apartments(self):
+        apartment_id = self.apartment_service.create(self.guesthouse_id, "Apt 1")
+        self.assertEqual(self.guesthouse_service.get_snapshot(self.guesthouse_id), GuestHouseSnapshot(self.guesthouse_id, "Casa"))
+        self.apartment_service.get_snapshot(apartment_id)
+        self.assertTrue(self.guesthouse_service.delete(self.guesthouse_id))
+        self.assertIsNone(self.guesthouse_service.get_snapshot(self.guesthouse_id))
+        self.assertIsNone(self.apartment_service.get_snapshot(apartment_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+from core.services.async_database_service import AsyncDatabaseService
+from core.services.database_service import DatabaseService
+from reservation.services.async_apartment_service import AsyncApartmentService
+from reservation.services.async_guesthouse_service import AsyncGuestHouseService
+from reservation.services.async_reservation_service import AsyncReservationService
+from reservation.services.reporting_service import ReportingService
+from datetime import datetime
+import asyncio
+import importlib.util
+import os
+import tempfile
+import unittest
+import uuid
+
+@unittest.skipUnless(importlib.util.find_spec("aiosqlite"), "aiosqlite is not installed")
+class TestAsyncServices(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.db_service = AsyncDatabaseService(f"sqlite+aiosqlite:///{self.db_path}", sqlite_wal=True,
+                                               sqlite_busy_timeout=5000)
+        await self.db_service.create_schema()
+        self.guesthouse_service = AsyncGuestHouseService(self.db_service)
+        self.apartment_service = AsyncApartmentService(self.db_service)
+        self.reservation_service = AsyncReservationService(self.db_service)
+        self.guesthouse_id = await self.guesthouse_service.create("Casa")
+        self.apt1 = await self.apartment_service.create(self.guesthouse_id, "Apt 1")
+
+    async def asyncTearDown(self):
+        await self.db_service.dispose()
+        os.remove(self.db_path)
+
+    async def _create(self, apartment_id, check_in_date, check_out_date):
+        return await self.reservation_service.create(apartment_id, check_in_date, check_out_date, 2, "Mario Rossi",
+                                                     "3331234567", "mario@example.com", "channel")
+
+    async def test_apartments(self):
+        self.assertIsNone(await self.apartment_service.create(self.guesthouse_id, "Apt 1"))
+        self.assertIsNone(await self.apartment_service.create(str(uuid.uuid4()), "Apt 9"))
+        apt2 = await self.apartment_service.create(self.guesthouse_id, "Apt 2")
+        self.assertFalse(await self.apartment_service.update(apt2, "Apt 1"))
+        self.assertTrue(await self.apartment_service.update(apt2, "Apt 3"))
+        self.assertEqual((await self.apartment_service.get(apt2)).name, "Apt 3")
+        self.assertEqual((await self.apartment_service.get_by_name(self.guesthouse_id, "Apt 3")).id, apt2)
+        self.assertTrue(await self.apartment_service.delete(apt2))
+        self.assertIsNone(await self.apartment_service.get(apt2))
+        self.assertFalse(await self.apartment_service.delete(apt2))
+
+    async def test_reservations(self):
+        first = await self._create(self.apt1, datetime(2024, 5, 1), datetime(2024, 5, 5))
+        self.assertIsNotNone(first)
+        self.assertIsNone(await self._create(self.apt1, datetime(2024, 5, 4), datetime(2024, 5, 6)))
+        second = await self._create(self.apt1, datetime(2024, 5, 10), datetime(2024, 5, 12))
+
+        self.assertFalse(await self.reservation_service.update(second, check_in_date=datetime(2024, 5, 3)))
+        self.assertTrue(await self.reservation_service.update(second, check_out_date=datetime(2024, 5, 13), num_guests=3))
+        reservation = await self.reservation_service.get(second)
+        self.assertEqual((reservation.check_out_date, reservation.num_guests), (datetime(2024, 5, 13), 3))
+
+        self.assertEqual(await self.reservation_service.find_available_dates(
+            self.apt1, datetime(2024, 4, 28), datetime(2024, 5, 20)),
+            [(datetime(2024, 4, 28), datetime(2024, 5, 1)), (datetime(2024, 5, 5), datetime(2024, 5, 10)),
+             (datetime(2024, 5, 13), datetime(2024, 5, 20))])
+        self.assertEqual({x.id for x in await self.reservation_service.get_all_by_apartment(self.apt1)},
+                         {first, second})
+
+        self.assertTrue(await self.reservation_service.delete(first))
+        self.assertFalse(await self.reservation_service.delete(first))
+        self.assertIsNone(await self.reservation_service.get(first))
+
+        # The monthly summary follows the writes
+        db_service = DatabaseService(f"sqlite:///{self.db_path}", create_schema=False)
+        report = ReportingService(db_service).monthly_report(datetime(2024, 5, 1), datetime(2024, 6, 1))
+        db_service.engine.dispose()
+        self.assertEqual([row[3:6] for row in report], [(3, 1, 9)])
+
+    async def test_concurrent_availability_checks(self):
+        await self._create(self.apt1, datetime(2024, 5, 1), datetime(2024, 5, 5))
+        results = await asyncio.gather(*[
+            self.reservation_service.find_available_dates(self.apt1, datetime(2024, 5, 1), datetime(2024, 5, 10))
+            for _ in range(20)
+        ])
+        self.assertEqual(results, [[(datetime(2024, 5, 5), datetime(2024, 5, 10))]] * 20)
+
+    async def test_delete_guesthouse_cascade(self):
+        reservation_id = await self._create(self.apt1, datetime(2024, 5, 1), datetime(2024, 5, 5))
+        self.assertEqual([x.id for x in await self.guesthouse_service.get_all()], [self.guesthouse_id])
+        self.assertTrue(await self.guesthouse_service.delete(self.guesthouse_id))
+        self.assertIsNone(await self.guesthouse_service.get(self.guesthouse_id))
+        self.assertIsNone(await self.apartment_service.get(self.apt1))
+        self.assertIsNone(await self.reservation_service.get(reservation_id))
+        self.assertFalse(await self.guesthouse_service.delete(self.guesthouse_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
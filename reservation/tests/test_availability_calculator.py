@@ -0,0 +1,56 @@
+from core.services.database_service import DatabaseService
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reservation_service import ReservationService
+from reservation.utils.availability_calculator import AvailabilityCalculator
+from datetime import datetime
+import unittest
+import uuid
+
+class TestAvailabilityCalculator(unittest.TestCase):
+
+    def setUp(self):
+        self.db_service = DatabaseService("sqlite://")
+        self.reservation_service = ReservationService(self.db_service)
+        self.calculator = AvailabilityCalculator(self.db_service)
+        self.guesthouse_id = GuestHouseService(self.db_service).create("Casa")
+        apartment_service = ApartmentService(self.db_service)
+        self.apt1 = apartment_service.create(self.guesthouse_id, "Apt 1")
+        self.apt2 = apartment_service.create(self.guesthouse_id, "Apt 2")
+        self.apt3 = apartment_service.create(self.guesthouse_id, "Apt 3")
+        self._reserve(self.apt1, datetime(2024, 5, 3), datetime(2024, 5, 6))
+        self._reserve(self.apt1, datetime(2024, 5, 6), datetime(2024, 5, 8))
+        self._reserve(self.apt1, datetime(2024, 5, 12), datetime(2024, 5, 15))
+        self._reserve(self.apt2, datetime(2024, 5, 1), datetime(2024, 5, 4))
+        self._reserve(self.apt2, datetime(2024, 5, 25), datetime(2024, 6, 9))
+
+    def _reserve(self, apartment_id, check_in_date, check_out_date):
+        return self.reservation_service.create(apartment_id, check_in_date, check_out_date, 2,
+                                               "Mario Rossi", "3331234567", "mario@example.com", "direct")
+
+    def test_find_available_dates_matches_reservation_service(self):
+        start, end = datetime(2024, 5, 2), datetime(2024, 5, 28)
+        result = self.calculator.find_available_dates(self.guesthouse_id, start, end)
+        self.assertEqual(set(result), {self.apt1, self.apt2, self.apt3})
+        for apartment_id, ranges in result.items():
+            expected = self.reservation_service.find_available_dates(apartment_id, start, end)
+            self.assertEqual(ranges, expected)
+        self.assertEqual(result[self.apt1], [(datetime(2024, 5, 2), datetime(2024, 5, 3)),
+                                             (datetime(2024, 5, 8), datetime(2024, 5, 12)),
+                                             (datetime(2024, 5, 15), datetime(2024, 5, 28))])
+        self.assertEqual(result[self.apt3], [(start, end)])
+
+    def test_find_available_apartments(self):
+        free = self.calculator.find_available_apartments(self.guesthouse_id, datetime(2024, 5, 8), datetime(2024, 5, 12))
+        self.assertEqual(set(free), {self.apt1, self.apt2, self.apt3})
+        free = self.calculator.find_available_apartments(self.guesthouse_id, datetime(2024, 5, 3), datetime(2024, 5, 9))
+        self.assertEqual(set(free), {self.apt3})
+        free = self.calculator.find_available_apartments(self.guesthouse_id, datetime(2024, 5, 20), datetime(2024, 5, 26))
+        self.assertEqual(set(free), {self.apt1, self.apt3})
+
+    def test_unknown_guesthouse(self):
+        self.assertEqual(self.calculator.find_available_dates(str(uuid.uuid4()), datetime(2024, 5, 1), datetime(2024, 5, 2)), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+from core.services.database_service import DatabaseService
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.export_service import ExportService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reservation_service import ReservationService
+from datetime import datetime, timedelta
+import csv
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import unittest
+import uuid
+
+class TestExportService(unittest.TestCase):
+
+    def setUp(self):
+        self.db_service = DatabaseService("sqlite://")
+        self.export_service = ExportService(self.db_service)
+        reservation_service = ReservationService(self.db_service)
+        apartment_service = ApartmentService(self.db_service)
+        guesthouse_service = GuestHouseService(self.db_service)
+        self.guesthouse1 = guesthouse_service.create("Casa")
+        self.guesthouse2 = guesthouse_service.create("Villa")
+        self.apt1 = apartment_service.create(self.guesthouse1, "Apt 1")
+        self.apt2 = apartment_service.create(self.guesthouse1, "Apt 2")
+        self.apt3 = apartment_service.create(self.guesthouse2, "Apt 3")
+        for apartment_id, days in ((self.apt1, (20, 0, 10)), (self.apt2, (5,)), (self.apt3, (0, 30))):
+            for day in days:
+                check_in_date = datetime(2024, 5, 1) + timedelta(days=day)
+                reservation_service.create(apartment_id, check_in_date, check_in_date + timedelta(days=3), 2,
+                                           "Mario Rossi", "3331234567", "mario@example.com", "direct",
+                                           'Arrivo "tardi", 23:00')
+
+    def test_csv(self):
+        output = io.StringIO()
+        count = self.export_service.export(output, 'csv', guesthouse_id=self.guesthouse1, batch_size=2)
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual(count, 4)
+        # Grouped by apartment, in check-in order
+        self.assertEqual([row['check_in_date'] for row in rows if row['apartment_id'] == self.apt1],
+                         ['2024-05-01T00:00:00', '2024-05-11T00:00:00', '2024-05-21T00:00:00'])
+        self.assertEqual([row['apartment_id'] for row in rows], sorted(row['apartment_id'] for row in rows))
+        self.assertEqual({row['guesthouse_id'] for row in rows}, {self.guesthouse1})
+        self.assertEqual(rows[0]['notes'], 'Arrivo "tardi", 23:00')
+        self.assertEqual(list(rows[0]), list(ExportService.COLUMNS))
+
+    def test_jsonl(self):
+        output = io.StringIO()
+        count = self.export_service.export(output, 'jsonl', start_date=datetime(2024, 5, 12),
+                                           end_date=datetime(2024, 5, 31), batch_size=1)
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(count, 2)
+        self.assertEqual([(row['apartment_id'], row['check_in_date']) for row in rows],
+                         [(self.apt1, '2024-05-11T00:00:00'), (self.apt1, '2024-05-21T00:00:00')])
+        self.assertEqual(rows[0]['num_guests'], 2)
+
+    def test_filters(self):
+        output = io.StringIO()
+        self.assertEqual(self.export_service.export(output, 'csv', apartment_id=self.apt3), 2)
+        self.assertEqual(self.export_service.export(io.StringIO(), 'jsonl', apartment_id=str(uuid.uuid4())), 0)
+        self.assertEqual(self.export_service.export(io.StringIO(), 'jsonl'), 6)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.export_service.export(io.StringIO(), 'xml')
+        with self.assertRaises(ValueError):
+            self.export_service.export(io.StringIO(), 'csv', batch_size=0)
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow is not installed")
+    def test_parquet(self):
+        import pyarrow.parquet
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "reservations.parquet")
+            self.assertEqual(self.export_service.export(path, 'parquet', batch_size=2), 6)
+            parquet_file = pyarrow.parquet.ParquetFile(path)
+            self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+            table = parquet_file.read()
+            self.assertEqual(table.column_names, list(ExportService.COLUMNS))
+            self.assertEqual(min(table.column('check_in_date').to_pylist()), datetime(2024, 5, 1))
+            self.assertEqual(table.column('num_guests').to_pylist(), [2] * 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+from core.services.database_service import DatabaseService
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reservation_service import ReservationService
+from reservation.utils.occupancy_calendar import OccupancyCalendar
+from datetime import datetime
+import unittest
+
+class TestOccupancyCalendar(unittest.TestCase):
+
+    def setUp(self):
+        self.db_service = DatabaseService("sqlite://")
+        guesthouse_id = GuestHouseService(self.db_service).create("Casa")
+        apartment_service = ApartmentService(self.db_service)
+        self.apt1 = apartment_service.create(guesthouse_id, "Apt 1")
+        self.apt2 = apartment_service.create(guesthouse_id, "Apt 2")
+        service = ReservationService(self.db_service)
+        self._reserve(service, self.apt1, datetime(2024, 5, 3), datetime(2024, 5, 6))
+        self._reserve(service, self.apt1, datetime(2024, 5, 30), datetime(2024, 6, 2))
+        self._reserve(service, self.apt1, datetime(2023, 12, 30), datetime(2024, 1, 3))
+        self.calendar = OccupancyCalendar.from_database(self.db_service, datetime(2024, 1, 1), datetime(2025, 1, 1))
+        self.service = ReservationService(self.db_service, calendar=self.calendar)
+
+    def _reserve(self, service, apartment_id, check_in_date, check_out_date):
+        return service.create(apartment_id, check_in_date, check_out_date, 2,
+                              "Mario Rossi", "3331234567", "mario@example.com", "direct")
+
+    def test_from_database(self):
+        self.assertEqual(set(self.calendar.apartment_ids), {self.apt1, self.apt2})
+        self.assertFalse(self.calendar.is_free(self.apt1, datetime(2024, 5, 5), datetime(2024, 5, 7)))
+        self.assertTrue(self.calendar.is_free(self.apt1, datetime(2024, 5, 6), datetime(2024, 5, 30)))
+        self.assertTrue(self.calendar.is_free(self.apt2, datetime(2024, 1, 1), datetime(2025, 1, 1)))
+        # The reservation starting before the window is clipped
+        self.assertFalse(self.calendar.is_free(self.apt1, datetime(2024, 1, 2), datetime(2024, 1, 3)))
+        self.assertTrue(self.calendar.is_free(self.apt1, datetime(2024, 1, 3), datetime(2024, 1, 4)))
+
+    def test_is_free_outside_window(self):
+        with self.assertRaises(ValueError):
+            self.calendar.is_free(self.apt1, datetime(2024, 12, 30), datetime(2025, 1, 2))
+
+    def test_occupied_days_per_month(self):
+        months = self.calendar.occupied_days_per_month(self.apt1)
+        self.assertEqual(len(months), 12)
+        self.assertEqual(months[(2024, 1)], 2)
+        self.assertEqual(months[(2024, 5)], 5)
+        self.assertEqual(months[(2024, 6)], 1)
+        self.assertEqual(months[(2024, 7)], 0)
+
+        all_months = self.calendar.occupied_days_per_month()
+        self.assertEqual(all_months[self.apt1], months)
+        self.assertEqual(sum(all_months[self.apt2].values()), 0)
+
+    def test_free_runs(self):
+        runs = self.calendar.free_runs(self.apt1, 3, datetime(2024, 5, 1), datetime(2024, 6, 10))
+        self.assertEqual(runs, [(datetime(2024, 5, 6), datetime(2024, 5, 30)),
+                                (datetime(2024, 6, 2), datetime(2024, 6, 10))])
+        runs = self.calendar.free_runs(self.apt1, 1, datetime(2024, 5, 1), datetime(2024, 6, 10))
+        self.assertEqual(runs[0], (datetime(2024, 5, 1), datetime(2024, 5, 3)))
+        self.assertEqual(self.calendar.free_runs(self.apt1, 25, datetime(2024, 5, 1), datetime(2024, 6, 10)), [])
+
+    def test_updated_by_reservation_service(self):
+        reservation_id = self._reserve(self.service, self.apt2, datetime(2024, 8, 1), datetime(2024, 8, 8))
+        self.assertFalse(self.calendar.is_free(self.apt2, datetime(2024, 8, 7), datetime(2024, 8, 8)))
+
+        self.assertTrue(self.service.update(reservation_id, check_out_date=datetime(2024, 8, 4)))
+        self.assertTrue(self.calendar.is_free(self.apt2, datetime(2024, 8, 4), datetime(2024, 8, 8)))
+        self.assertFalse(self.calendar.is_free(self.apt2, datetime(2024, 8, 3), datetime(2024, 8, 4)))
+
+        self.assertTrue(self.service.delete(reservation_id))
+        self.assertTrue(self.calendar.is_free(self.apt2, datetime(2024, 8, 1), datetime(2024, 8, 8)))
+
+        # A rejected write leaves the calendar untouched
+        self.assertIsNone(self._reserve(self.service, self.apt1, datetime(2024, 5, 4), datetime(2024, 5, 20)))
+        self.assertTrue(self.calendar.is_free(self.apt1, datetime(2024, 5, 6), datetime(2024, 5, 20)))
+
+    def test_updated_by_create_many(self):
+        apartment_id = ApartmentService(self.db_service).create(
+            GuestHouseService(self.db_service).create("Villa"), "Apt 3")
+        row = {'apartment_id': apartment_id, 'check_in_date': datetime(2024, 3, 1),
+               'check_out_date': datetime(2024, 3, 5), 'num_guests': 2, 'contact_name': "Mario Rossi",
+               'contact_number': "3331234567", 'contact_email': "mario@example.com", 'booking_mode': "direct"}
+        self.service.create_many([row])
+        self.assertEqual(self.calendar.occupied_days_per_month(apartment_id)[(2024, 3)], 4)
+
+    def test_remove_apartment(self):
+        self._reserve(self.service, self.apt2, datetime(2024, 8, 1), datetime(2024, 8, 8))
+        self.calendar.remove_apartment(self.apt1)
+        self.calendar.remove_apartment("missing")
+        self.assertEqual(self.calendar.apartment_ids, [self.apt2])
+        self.assertTrue(self.calendar.is_free(self.apt1, datetime(2024, 5, 3), datetime(2024, 5, 6)))
+        # The row of the other apartment keeps its nights
+        self.assertFalse(self.calendar.is_free(self.apt2, datetime(2024, 8, 1), datetime(2024, 8, 8)))
+        self.assertEqual(list(self.calendar.occupied_days_per_month()), [self.apt2])
+        self.calendar.add(self.apt1, datetime(2024, 9, 1), datetime(2024, 9, 3))
+        self.assertEqual(self.calendar.occupied_days_per_month(self.apt1)[(2024, 5)], 0)
+        self.assertEqual(self.calendar.occupied_days_per_month(self.apt2)[(2024, 8)], 7)
+
+    def test_updated_by_deletes(self):
+        guesthouse_service = GuestHouseService(self.db_service, calendar=self.calendar)
+        apartment_service = ApartmentService(self.db_service, calendar=self.calendar)
+        apt3 = apartment_service.create(guesthouse_service.create("Villa"), "Apt 3")
+        self._reserve(self.service, apt3, datetime(2024, 8, 1), datetime(2024, 8, 8))
+
+        # The reservations are deleted in cascade with their apartment
+        self.assertTrue(apartment_service.delete(self.apt1))
+        self.assertNotIn(self.apt1, self.calendar.apartment_ids)
+        self.assertTrue(self.calendar.is_free(self.apt1, datetime(2024, 5, 3), datetime(2024, 5, 6)))
+
+        self.assertTrue(guesthouse_service.delete(apartment_service.get(apt3).guesthouse_id))
+        self.assertNotIn(apt3, self.calendar.apartment_ids)
+        self.assertTrue(self.calendar.is_free(apt3, datetime(2024, 8, 1), datetime(2024, 8, 8)))
+        self.assertEqual(self.calendar.apartment_ids, [self.apt2])
+
+    def test_matches_reservation_service(self):
+        start_date, end_date = datetime(2024, 1, 1), datetime(2025, 1, 1)
+        for apartment_id in (self.apt1, self.apt2):
+            self.assertEqual(self.calendar.free_runs(apartment_id, 1, start_date, end_date),
+                             self.service.find_available_dates(apartment_id, start_date, end_date))
+
+if __name__ == '__main__':
+    unittest.main()
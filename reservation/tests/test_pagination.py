@@ -0,0 +1,103 @@
+from core.services.database_service import DatabaseService
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reservation_service import ReservationService
+from datetime import datetime, timedelta
+import unittest
+
+class TestPagination(unittest.TestCase):
+
+    def setUp(self):
+        self.db_service = DatabaseService("sqlite://")
+        self.reservation_service = ReservationService(self.db_service)
+        self.guesthouse_service = GuestHouseService(self.db_service)
+        guesthouse_id = self.guesthouse_service.create("Casa")
+        apartment_service = ApartmentService(self.db_service)
+        self.apt1 = apartment_service.create(guesthouse_id, "Apt 1")
+        self.apt2 = apartment_service.create(guesthouse_id, "Apt 2")
+        # Created out of order, so check-in order differs from insertion order
+        self.reservation_ids = {}
+        for day in (7, 0, 21, 14, 28, 35, 3):
+            check_in_date = datetime(2024, 5, 1) + timedelta(days=day)
+            self.reservation_ids[check_in_date] = self.reservation_service.create(
+                self.apt1, check_in_date, check_in_date + timedelta(days=2), 2,
+                "Mario Rossi", "3331234567", "mario@example.com", "direct")
+        self.reservation_service.create(self.apt2, datetime(2024, 5, 1), datetime(2024, 5, 5), 2,
+                                        "Mario Rossi", "3331234567", "mario@example.com", "direct")
+
+    def _all_pages(self, **kwargs):
+        pages, after = [], None
+        while True:
+            page = self.reservation_service.get_page_by_apartment(self.apt1, after=after, **kwargs)
+            pages.append([reservation.id for reservation in page.items])
+            if page.next_cursor is None:
+                return pages
+            after = page.next_cursor
+
+    def test_pages_in_check_in_order(self):
+        expected = [self.reservation_ids[day] for day in sorted(self.reservation_ids)]
+        self.assertEqual(self._all_pages(limit=3), [expected[0:3], expected[3:6], expected[6:]])
+        self.assertEqual(self._all_pages(limit=7), [expected])
+        self.assertEqual(self._all_pages(limit=100), [expected])
+
+    def test_date_window(self):
+        pages = self._all_pages(limit=2, start_date=datetime(2024, 5, 5), end_date=datetime(2024, 5, 23))
+        # Overlapping the window: the stay of May 4-6 is included, the one starting on May 29 is not
+        expected = [self.reservation_ids[datetime(2024, 5, day)] for day in (4, 8, 15, 22)]
+        self.assertEqual(pages, [expected[:2], expected[2:]])
+
+    def test_same_check_in_date(self):
+        # Ties on check_in_date are broken by id
+        self.reservation_service.create(self.apt1, datetime(2024, 5, 1), datetime(2024, 5, 1), 2,
+                                        "Mario Rossi", "3331234567", "mario@example.com", "direct")
+        ids = [x for page in self._all_pages(limit=1) for x in page]
+        self.assertEqual(len(ids), 8)
+        self.assertEqual(len(set(ids)), 8)
+
+    def test_invalid_limit(self):
+        with self.assertRaises(ValueError):
+            self.reservation_service.get_page_by_apartment(self.apt1, limit=0)
+
+    def test_iter_by_apartment(self):
+        expected = [self.reservation_ids[day] for day in sorted(self.reservation_ids)]
+        reservations = list(self.reservation_service.iter_by_apartment(self.apt1, batch_size=2))
+        self.assertEqual([reservation.id for reservation in reservations], expected)
+        # Loaded attributes stay readable after the generator closed the session
+        self.assertEqual(reservations[0].contact_name, "Mario Rossi")
+
+        reservations = self.reservation_service.iter_by_apartment(self.apt1, start_date=datetime(2024, 5, 30))
+        self.assertEqual([reservation.id for reservation in reservations], expected[-2:])
+
+    def test_iter_in_scoped_mode(self):
+        # Other calls while streaming close the thread's scoped session, not the generator's
+        db_service = DatabaseService("sqlite://", scoped=True)
+        reservation_service = ReservationService(db_service)
+        guesthouse_service = GuestHouseService(db_service)
+        apartment_id = ApartmentService(db_service).create(guesthouse_service.create("Casa"), "Apt 1")
+        guesthouse_service.create("Villa")
+        for day in range(5):
+            reservation_service.create(apartment_id, datetime(2024, 5, 1 + day), datetime(2024, 5, 2 + day), 2,
+                                       "Mario Rossi", "3331234567", "mario@example.com", "direct")
+        ids = [reservation_service.get(reservation.id).id
+               for reservation in reservation_service.iter_by_apartment(apartment_id, batch_size=2)]
+        self.assertEqual(len(ids), 5)
+        names = [guesthouse_service.get(guesthouse.id).name for guesthouse in guesthouse_service.iter_all(batch_size=1)]
+        self.assertEqual(names, ["Casa", "Villa"])
+        db_service.remove_session()
+
+    def test_guest_houses(self):
+        for name in ("Villa", "Baita", "Attico", "Casa"):
+            self.guesthouse_service.create(name)
+        names, after = [], None
+        while True:
+            page = self.guesthouse_service.get_page(limit=2, after=after)
+            names.append([guesthouse.name for guesthouse in page.items])
+            if page.next_cursor is None:
+                break
+            after = page.next_cursor
+        self.assertEqual(names, [["Attico", "Baita"], ["Casa", "Casa"], ["Villa"]])
+        self.assertEqual([guesthouse.name for guesthouse in self.guesthouse_service.iter_all(batch_size=2)],
+                         ["Attico", "Baita", "Casa", "Casa", "Villa"])
+
+if __name__ == '__main__':
+    unittest.main()
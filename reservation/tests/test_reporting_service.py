@@ -0,0 +1,101 @@
+from core.services.database_service import DatabaseService
+from reservation.models import BookingModeReport, Reservation
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reporting_service import ReportingService
+from reservation.services.reservation_service import ReservationService
+from datetime import datetime
+import unittest
+
+class TestReportingService(unittest.TestCase):
+
+    def setUp(self):
+        self.db_service = DatabaseService("sqlite://")
+        self.reservation_service = ReservationService(self.db_service)
+        self.reporting_service = ReportingService(self.db_service)
+        self.guesthouse_id = GuestHouseService(self.db_service).create("Casa")
+        self.apartment_service = ApartmentService(self.db_service)
+        self.apt1 = self.apartment_service.create(self.guesthouse_id, "Apt 1")
+        self.apt2 = self.apartment_service.create(self.guesthouse_id, "Apt 2")
+        # 3 nights in May, then 2 in May and 3 in June
+        self.res1 = self._reserve(self.apt1, datetime(2024, 5, 3), datetime(2024, 5, 6), "direct")
+        self.res2 = self._reserve(self.apt1, datetime(2024, 5, 30), datetime(2024, 6, 3), "booking.com", 3)
+        self.res3 = self._reserve(self.apt2, datetime(2024, 6, 10), datetime(2024, 6, 12), "direct")
+
+    def _reserve(self, apartment_id, check_in_date, check_out_date, booking_mode, num_guests=2):
+        return self.reservation_service.create(apartment_id, check_in_date, check_out_date, num_guests,
+                                               "Mario Rossi", "3331234567", "mario@example.com", booking_mode)
+
+    def _report(self, apartment_id=None):
+        return {(row.apartment_id, row.year, row.month): row[3:] for row in self.reporting_service.monthly_report(
+            datetime(2024, 1, 1), datetime(2025, 1, 1), apartment_id=apartment_id)}
+
+    def test_monthly_report_splits_stays_across_months(self):
+        report = self._report()
+        self.assertEqual(report[(self.apt1, 2024, 5)], (5, 2, 3 * 2 + 2 * 3, 5 / 31))
+        self.assertEqual(report[(self.apt1, 2024, 6)], (2, 0, 2 * 3, 2 / 30))
+        self.assertEqual(report[(self.apt2, 2024, 6)], (2, 1, 4, 2 / 30))
+        self.assertEqual(len(report), 3)
+
+    def test_monthly_report_filters(self):
+        rows = self.reporting_service.monthly_report(datetime(2024, 6, 1), datetime(2024, 7, 1), apartment_id=self.apt1)
+        self.assertEqual([(row.year, row.month) for row in rows], [(2024, 6)])
+
+        other = GuestHouseService(self.db_service).create("Villa")
+        apartment_id = self.apartment_service.create(other, "Apt 3")
+        self._reserve(apartment_id, datetime(2024, 6, 1), datetime(2024, 6, 2), "direct")
+        rows = self.reporting_service.monthly_report(datetime(2024, 1, 1), datetime(2025, 1, 1),
+                                                     guesthouse_id=self.guesthouse_id)
+        self.assertNotIn(apartment_id, {row.apartment_id for row in rows})
+
+    def test_bookings_by_mode(self):
+        rows = self.reporting_service.bookings_by_mode(datetime(2024, 5, 1), datetime(2024, 6, 1),
+                                                       apartment_id=self.apt1)
+        self.assertEqual(rows, [BookingModeReport(self.apt1, 2024, 5, "booking.com", 1, 2),
+                                BookingModeReport(self.apt1, 2024, 5, "direct", 1, 3)])
+
+    def test_update_and_delete(self):
+        self.assertTrue(self.reservation_service.update(self.res2, check_out_date=datetime(2024, 6, 1),
+                                                        booking_mode="direct"))
+        report = self._report(self.apt1)
+        self.assertEqual(report[(self.apt1, 2024, 5)][:2], (5, 2))
+        self.assertNotIn((self.apt1, 2024, 6), report)
+
+        self.assertTrue(self.reservation_service.delete(self.res1))
+        self.assertEqual(self._report(self.apt1)[(self.apt1, 2024, 5)][:2], (2, 1))
+
+        # A rejected write does not touch the summary
+        self.assertIsNone(self._reserve(self.apt1, datetime(2024, 5, 30), datetime(2024, 6, 2), "direct"))
+        self.assertEqual(self._report(self.apt1)[(self.apt1, 2024, 5)][:2], (2, 1))
+
+    def test_create_many(self):
+        row = {'apartment_id': self.apt2, 'check_in_date': datetime(2024, 7, 28),
+               'check_out_date': datetime(2024, 8, 2), 'num_guests': 1, 'contact_name': "Mario Rossi",
+               'contact_number': "3331234567", 'contact_email': "mario@example.com", 'booking_mode': "direct"}
+        self.reservation_service.create_many([row])
+        report = self._report(self.apt2)
+        self.assertEqual(report[(self.apt2, 2024, 7)][:3], (4, 1, 4))
+        self.assertEqual(report[(self.apt2, 2024, 8)][:3], (1, 0, 1))
+
+    def test_rebuild(self):
+        expected = self._report()
+        # A reservation written behind the services' back is only counted after a rebuild
+        session = self.db_service.get_session()
+        reservation = Reservation(datetime(2024, 9, 1), datetime(2024, 9, 4), 2, "Mario Rossi", "3331234567",
+                                  "mario@example.com", "phone")
+        reservation.apartment_id = self.apt2
+        session.add(reservation)
+        session.commit()
+        session.close()
+        self.assertEqual(self._report(), expected)
+
+        self.reporting_service.rebuild()
+        expected[(self.apt2, 2024, 9)] = (3, 1, 6, 3 / 30)
+        self.assertEqual(self._report(), expected)
+
+    def test_apartment_delete_removes_summary(self):
+        self.assertTrue(self.apartment_service.delete(self.apt1))
+        self.assertEqual(set(key[0] for key in self._report()), {self.apt2})
+
+if __name__ == '__main__':
+    unittest.main()
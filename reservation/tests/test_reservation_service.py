@@ -0,0 +1,96 @@
+from core.services.database_service import DatabaseService
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reservation_service import ReservationService
+from datetime import datetime, timedelta
+import random
+import unittest
+
+class TestReservationService(unittest.TestCase):
+
+    def setUp(self):
+        self.db_service = DatabaseService("sqlite://")
+        self.reservation_service = ReservationService(self.db_service)
+        guesthouse_id = GuestHouseService(self.db_service).create("Casa")
+        apartment_service = ApartmentService(self.db_service)
+        self.apt1 = apartment_service.create(guesthouse_id, "Apt 1")
+        self.apt2 = apartment_service.create(guesthouse_id, "Apt 2")
+
+    @staticmethod
+    def _row(apartment_id, check_in_date, check_out_date):
+        return {
+            'apartment_id': apartment_id,
+            'check_in_date': check_in_date,
+            'check_out_date': check_out_date,
+            'num_guests': 2,
+            'contact_name': "Mario Rossi",
+            'contact_number': "3331234567",
+            'contact_email': "mario@example.com",
+            'booking_mode': "channel"
+        }
+
+    def test_create_many(self):
+        existing_id = self.reservation_service.create(**self._row(self.apt1, datetime(2024, 5, 10), datetime(2024, 5, 15)))
+        results = self.reservation_service.create_many([
+            self._row(self.apt1, datetime(2024, 5, 1), datetime(2024, 5, 5)),
+            self._row(self.apt1, datetime(2024, 5, 14), datetime(2024, 5, 16)),
+            self._row(self.apt1, datetime(2024, 5, 4), datetime(2024, 5, 8)),
+            self._row(self.apt1, datetime(2024, 5, 5), datetime(2024, 5, 10)),
+            self._row(self.apt2, datetime(2024, 5, 4), datetime(2024, 5, 8)),
+        ])
+        self.assertIsNotNone(results[0].reservation_id)
+        self.assertEqual(results[1], ReservationService.BulkResult(None, existing_id))
+        self.assertEqual(results[2], ReservationService.BulkResult(None, results[0].reservation_id))
+        self.assertIsNotNone(results[3].reservation_id)
+        self.assertIsNotNone(results[4].reservation_id)
+
+        reservation = self.reservation_service.get(results[3].reservation_id)
+        self.assertEqual(reservation.apartment_id, self.apt1)
+        self.assertEqual(reservation.check_in_date, datetime(2024, 5, 5))
+        self.assertEqual(reservation.notes, "")
+        self.assertEqual(len(self.reservation_service.get_all_by_apartment(self.apt1)), 3)
+
+    def test_create_many_matches_create(self):
+        rng = random.Random(1)
+        rows = []
+        for _ in range(300):
+            check_in_date = datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 365))
+            rows.append(self._row(rng.choice([self.apt1, self.apt2]), check_in_date,
+                                  check_in_date + timedelta(days=rng.randint(1, 10))))
+
+        expected = [self.reservation_service.create(**row) is not None for row in rows]
+        for apartment_id in (self.apt1, self.apt2):
+            for reservation in self.reservation_service.get_all_by_apartment(apartment_id):
+                self.reservation_service.delete(reservation.id)
+
+        results = self.reservation_service.create_many(rows)
+        self.assertEqual([result.reservation_id is not None for result in results], expected)
+
+    def test_create_many_empty(self):
+        self.assertEqual(self.reservation_service.create_many([]), [])
+
+    def test_create_many_generator(self):
+        rows = (self._row(apartment_id, datetime(2024, 5, 1), datetime(2024, 5, 5))
+                for apartment_id in (self.apt1, self.apt2, self.apt1))
+        results = self.reservation_service.create_many(rows)
+        self.assertEqual([result.reservation_id is not None for result in results], [True, True, False])
+        self.assertEqual(len(self.reservation_service.get_all_by_apartment(self.apt1)), 1)
+
+    def test_create_many_many_apartments(self):
+        # More apartments than fit in one conflict query
+        apartment_service = ApartmentService(self.db_service)
+        guesthouse_service = GuestHouseService(self.db_service)
+        apartment_ids = []
+        for n in range(25):
+            guesthouse_id = guesthouse_service.create(f"Villa {n}")
+            apartment_ids.extend(apartment_service.create(guesthouse_id, f"Villa {n}/{m}") for m in range(10))
+        existing_id = self.reservation_service.create(
+            **self._row(apartment_ids[-1], datetime(2024, 5, 1), datetime(2024, 5, 5)))
+        results = self.reservation_service.create_many(
+            [self._row(apartment_id, datetime(2024, 5, 3), datetime(2024, 5, 6)) for apartment_id in apartment_ids])
+        self.assertEqual(results[-1], ReservationService.BulkResult(None, existing_id))
+        self.assertTrue(all(result.reservation_id is not None for result in results[:-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
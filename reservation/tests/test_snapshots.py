@@ -0,0 +1,79 @@
+from sqlalchemy import event
+from core.services.database_service import DatabaseService
+from reservation.models import ApartmentSnapshot, GuestHouseSnapshot, ReservationSnapshot
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reservation_service import ReservationService
+from datetime import datetime, timedelta
+import unittest
+import uuid
+
+class TestSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.db_service = DatabaseService("sqlite://")
+        self.reservation_service = ReservationService(self.db_service)
+        self.apartment_service = ApartmentService(self.db_service)
+        self.guesthouse_service = GuestHouseService(self.db_service)
+        self.guesthouse_id = self.guesthouse_service.create("Casa")
+        self.apt2 = self.apartment_service.create(self.guesthouse_id, "Apt 2")
+        self.apt1 = self.apartment_service.create(self.guesthouse_id, "Apt 1")
+        self.reservation_ids = []
+        for day in (10, 0, 20):
+            check_in_date = datetime(2024, 5, 1) + timedelta(days=day)
+            self.reservation_ids.append(self.reservation_service.create(
+                self.apt1, check_in_date, check_in_date + timedelta(days=3), 2,
+                "Mario Rossi", "3331234567", "mario@example.com", "direct", "Late arrival"))
+
+    def test_reservation_snapshot(self):
+        snapshot = self.reservation_service.get_snapshot(self.reservation_ids[0])
+        self.assertIsInstance(snapshot, ReservationSnapshot)
+        self.assertEqual(snapshot, self.reservation_service.get(self.reservation_ids[0]).to_snapshot())
+        self.assertEqual(snapshot.check_in_date, datetime(2024, 5, 11))
+        self.assertEqual(snapshot.notes, "Late arrival")
+        self.assertIsNone(self.reservation_service.get_snapshot(str(uuid.uuid4())))
+
+    def test_snapshots_by_apartment(self):
+        snapshots = self.reservation_service.get_snapshots_by_apartment(self.apt1)
+        self.assertEqual([s.check_in_date.day for s in snapshots], [1, 11, 21])
+        self.assertEqual(snapshots, [r.to_snapshot() for r in self.reservation_service.iter_by_apartment(self.apt1)])
+
+        snapshots = self.reservation_service.get_snapshots_by_apartment(self.apt1, start_date=datetime(2024, 5, 12),
+                                                                        end_date=datetime(2024, 5, 21))
+        self.assertEqual([s.check_in_date.day for s in snapshots], [11])
+        self.assertEqual(self.reservation_service.get_snapshots_by_apartment(self.apt2), [])
+
+    def test_apartment_and_guesthouse_snapshots(self):
+        self.assertEqual(self.apartment_service.get_snapshots_by_guesthouse(self.guesthouse_id),
+                         [ApartmentSnapshot(self.apt1, "Apt 1", self.guesthouse_id),
+                          ApartmentSnapshot(self.apt2, "Apt 2", self.guesthouse_id)])
+        self.guesthouse_service.create("Baita")
+        self.assertEqual([s.name for s in self.guesthouse_service.get_all_snapshots()], ["Baita", "Casa"])
+        self.assertIsInstance(self.guesthouse_service.get_all_snapshots()[0], GuestHouseSnapshot)
+
+    def test_tree(self):
+        tree = self.guesthouse_service.get_tree(self.guesthouse_id)
+        self.assertEqual((tree.id, tree.name), (self.guesthouse_id, "Casa"))
+        self.assertEqual([apartment.name for apartment in tree.apartments], ["Apt 1", "Apt 2"])
+        self.assertEqual([r.check_in_date.day for r in tree.apartments[0].reservations], [1, 11, 21])
+        self.assertEqual(tree.apartments[1].reservations, ())
+
+        # Current and upcoming stays only
+        tree = self.guesthouse_service.get_tree(self.guesthouse_id, from_date=datetime(2024, 5, 12))
+        self.assertEqual([r.check_in_date.day for r in tree.apartments[0].reservations], [11, 21])
+        self.assertIsNone(self.guesthouse_service.get_tree(str(uuid.uuid4())))
+
+    def test_tree_query_count(self):
+        for n in range(3, 10):
+            apartment_id = self.apartment_service.create(self.guesthouse_id, f"Apt {n}")
+            self.reservation_service.create(apartment_id, datetime(2024, 6, 1), datetime(2024, 6, 3), 2,
+                                            "Mario Rossi", "3331234567", "mario@example.com", "direct")
+        statements = []
+        event.listen(self.db_service.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        tree = self.guesthouse_service.get_tree(self.guesthouse_id)
+        self.assertEqual(len(tree.apartments), 9)
+        self.assertEqual(len(statements), 3)
+
+if __name__ == '__main__':
+    unittest.main()
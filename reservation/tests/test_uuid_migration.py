@@ -0,0 +1,84 @@
+from core.services.database_service import DatabaseService
+from reservation.models import MonthlyOccupancy
+from reservation.services.apartment_service import ApartmentService
+from reservation.services.guesthouse_service import GuestHouseService
+from reservation.services.reporting_service import ReportingService
+from reservation.services.reservation_service import ReservationService
+from reservation.utils.uuid_migration import legacy_metadata, migrate
+from sqlalchemy import create_engine, insert, text
+from datetime import datetime
+import os
+import tempfile
+import unittest
+import uuid
+
+class TestUUIDMigration(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source_url = f"sqlite:///{os.path.join(self.directory.name, 'source.db')}"
+        self.target_url = f"sqlite:///{os.path.join(self.directory.name, 'target.db')}"
+        self.guesthouse_id, self.apartment_id, self.reservation_id = (str(uuid.uuid4()) for _ in range(3))
+
+        # A database created by the models with String(36) keys, without the summary table
+        metadata = legacy_metadata()
+        metadata.remove(metadata.tables[MonthlyOccupancy.__tablename__])
+        engine = create_engine(self.source_url)
+        metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(insert(metadata.tables['guesthouses']), {'id': self.guesthouse_id, 'name': "Casa"})
+            connection.execute(insert(metadata.tables['apartments']),
+                               {'id': self.apartment_id, 'name': "Apt 1", 'guesthouse_id': self.guesthouse_id})
+            connection.execute(insert(metadata.tables['reservations']), {
+                'id': self.reservation_id, 'apartment_id': self.apartment_id, 'check_in_date': datetime(2024, 5, 1),
+                'check_out_date': datetime(2024, 5, 4), 'num_guests': 2, 'contact_name': "Mario Rossi",
+                'contact_number': "3331234567", 'contact_email': "mario@example.com", 'booking_mode': "direct",
+                'notes': ""})
+            self.assertEqual(connection.execute(text("SELECT typeof(id) FROM reservations")).scalar(), "text")
+        engine.dispose()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_migrate(self):
+        counts = migrate(self.source_url, self.target_url, batch_size=1)
+        self.assertEqual(counts, {'guesthouses': 1, 'apartments': 1, 'reservations': 1, 'monthly_occupancy': 0})
+
+        db_service = DatabaseService(self.target_url)
+        with db_service.engine.connect() as connection:
+            self.assertEqual(connection.execute(text("SELECT typeof(id), length(id) FROM reservations")).one(),
+                             ("blob", 16))
+
+        # The services find the rows under the same ids
+        reservation = ReservationService(db_service).get(self.reservation_id)
+        self.assertEqual((reservation.id, reservation.apartment_id), (self.reservation_id, self.apartment_id))
+        self.assertEqual(ApartmentService(db_service).get(self.apartment_id).guesthouse_id, self.guesthouse_id)
+        self.assertEqual(len(GuestHouseService(db_service).get_tree(self.guesthouse_id).apartments[0].reservations), 1)
+        report = ReportingService(db_service).monthly_report(datetime(2024, 5, 1), datetime(2024, 6, 1))
+        self.assertEqual([(row.apartment_id, row.nights) for row in report], [(self.apartment_id, 3)])
+        db_service.engine.dispose()
+
+    def test_text_keys_refused(self):
+        # Opening the database before migrating it would mix text and binary keys
+        with self.assertRaises(RuntimeError) as context:
+            DatabaseService(self.source_url)
+        self.assertIn("reservation.utils.uuid_migration", str(context.exception))
+        with self.assertRaises(RuntimeError):
+            DatabaseService(self.source_url, create_schema=False)
+
+        # Text ids stored in binary-declared columns, as SQLite allows
+        db_service = DatabaseService(self.target_url)
+        with db_service.engine.begin() as connection:
+            connection.execute(text("INSERT INTO guesthouses (id, name) VALUES (:id, 'Casa')"),
+                               {'id': str(uuid.uuid4())})
+        db_service.engine.dispose()
+        with self.assertRaises(RuntimeError):
+            DatabaseService(self.target_url)
+
+    def test_target_not_empty(self):
+        migrate(self.source_url, self.target_url)
+        with self.assertRaises(ValueError):
+            migrate(self.source_url, self.target_url)
+
+if __name__ == '__main__':
+    unittest.main()
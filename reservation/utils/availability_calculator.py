@@ -0,0 +1,194 @@
+from bisect import bisect_right
+from sqlalchemy import and_
+from reservation.models import Apartment, Reservation
+
+
+class AvailabilityIndex:
+    """Sorted interval index of the occupied periods of a set of apartments."""
+
+    def __init__(self, intervals_by_apartment):
+        """
+        Build the index.
+
+        Overlapping and adjacent reservations of the same apartment are merged, so
+        that each apartment is described by two sorted lists of disjoint bounds.
+
+        Args:
+            intervals_by_apartment (dict): Apartment ID -> iterable of (check_in_date, check_out_date)
+        """
+        self._starts = {}
+        self._ends = {}
+        for apartment_id, intervals in intervals_by_apartment.items():
+            starts = []
+            ends = []
+            for check_in_date, check_out_date in sorted(intervals):
+                if ends and check_in_date <= ends[-1]:
+                    ends[-1] = max(ends[-1], check_out_date)
+                else:
+                    starts.append(check_in_date)
+                    ends.append(check_out_date)
+            self._starts[apartment_id] = starts
+            self._ends[apartment_id] = ends
+
+    @property
+    def apartment_ids(self):
+        """list: IDs of the indexed apartments."""
+        return list(self._starts)
+
+    def free_ranges(self, apartment_id, start_date, end_date):
+        """
+        Find available date ranges for an apartment.
+
+        Args:
+            apartment_id (str): ID of the apartment
+            start_date (datetime): Start of the date range to check
+            end_date (datetime): End of the date range to check
+
+        Returns:
+            list: List of (start_date, end_date) tuples representing available periods
+        """
+        starts = self._starts.get(apartment_id, [])
+        ends = self._ends.get(apartment_id, [])
+
+        # First occupied period ending after the start of the range
+        i = bisect_right(ends, start_date)
+        if i == len(starts) or starts[i] >= end_date:
+            return [(start_date, end_date)]
+
+        available_periods = []
+        current_date = start_date
+        while i < len(starts) and starts[i] < end_date:
+            if current_date < starts[i]:
+                available_periods.append((current_date, starts[i]))
+            current_date = max(current_date, ends[i])
+            i += 1
+
+        if current_date < end_date:
+            available_periods.append((current_date, end_date))
+
+        return available_periods
+
+    def all_free_ranges(self, start_date, end_date):
+        """
+        Find available date ranges for every indexed apartment.
+
+        Args:
+            start_date (datetime): Start of the date range to check
+            end_date (datetime): End of the date range to check
+
+        Returns:
+            dict: Apartment ID -> list of (start_date, end_date) tuples
+        """
+        return {apartment_id: self.free_ranges(apartment_id, start_date, end_date)
+                for apartment_id in self._starts}
+
+    def is_free(self, apartment_id, check_in_date, check_out_date):
+        """
+        Check whether an apartment has no reservation overlapping the given stay.
+
+        Args:
+            apartment_id (str): ID of the apartment
+            check_in_date (datetime): Date of check-in
+            check_out_date (datetime): Date of check-out
+
+        Returns:
+            bool: True if the apartment is free for the whole stay
+        """
+        starts = self._starts.get(apartment_id, [])
+        ends = self._ends.get(apartment_id, [])
+        i = bisect_right(ends, check_in_date)
+        return i == len(starts) or starts[i] >= check_out_date
+
+    def available_apartments(self, check_in_date, check_out_date):
+        """
+        Get the apartments that are free for the given stay.
+
+        Args:
+            check_in_date (datetime): Date of check-in
+            check_out_date (datetime): Date of check-out
+
+        Returns:
+            list: IDs of the free apartments
+        """
+        return [apartment_id for apartment_id in self._starts
+                if self.is_free(apartment_id, check_in_date, check_out_date)]
+
+
+class AvailabilityCalculator:
+    """Batched availability queries over all the apartments of a guest house."""
+
+    def __init__(self, db_service):
+        """
+        Initialize the availability calculator.
+
+        Args:
+            db_service (DatabaseService): Database service
+        """
+        self.db_service = db_service
+
+    def build_index(self, guesthouse_id, start_date, end_date):
+        """
+        Load the reservations of a guest house overlapping a date range.
+
+        All the apartments of the guest house and their reservations are fetched
+        with a single query, so apartments without reservations are indexed too.
+
+        Args:
+            guesthouse_id (str): ID of the guest house
+            start_date (datetime): Start of the date range
+            end_date (datetime): End of the date range
+
+        Returns:
+            AvailabilityIndex: Index of the occupied periods
+        """
+        session = self.db_service.get_session()
+        try:
+            rows = session.query(
+                Apartment.id, Reservation.check_in_date, Reservation.check_out_date
+            ).outerjoin(Reservation, and_(
+                Reservation.apartment_id == Apartment.id,
+                Reservation.check_out_date > start_date,
+                Reservation.check_in_date < end_date
+            )).filter(
+                Apartment.guesthouse_id == guesthouse_id
+            ).all()
+        finally:
+            session.close()
+
+        intervals_by_apartment = {}
+        for apartment_id, check_in_date, check_out_date in rows:
+            intervals = intervals_by_apartment.setdefault(apartment_id, [])
+            if check_in_date is not None:
+                intervals.append((check_in_date, check_out_date))
+        return AvailabilityIndex(intervals_by_apartment)
+
+    def find_available_dates(self, guesthouse_id, start_date, end_date):
+        """
+        Find available date ranges for every apartment of a guest house.
+
+        Args:
+            guesthouse_id (str): ID of the guest house
+            start_date (datetime): Start of the date range to check
+            end_date (datetime): End of the date range to check
+
+        Returns:
+            dict: Apartment ID -> list of (start_date, end_date) tuples, as returned
+                  by ReservationService.find_available_dates
+        """
+        index = self.build_index(guesthouse_id, start_date, end_date)
+        return index.all_free_ranges(start_date, end_date)
+
+    def find_available_apartments(self, guesthouse_id, check_in_date, check_out_date):
+        """
+        Find the apartments of a guest house that are free for the given stay.
+
+        Args:
+            guesthouse_id (str): ID of the guest house
+            check_in_date (datetime): Date of check-in
+            check_out_date (datetime): Date of check-out
+
+        Returns:
+            list: IDs of the free apartments
+        """
+        index = self.build_index(guesthouse_id, check_in_date, check_out_date)
+        return index.available_apartments(check_in_date, check_out_date)
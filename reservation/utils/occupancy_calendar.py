@@ -0,0 +1,235 @@
+from datetime import datetime, timedelta
+from sqlalchemy import and_
+from reservation.models import Apartment, Reservation
+import numpy as np
+import threading
+
+
+class OccupancyCalendar:
+    """
+    Day-granularity occupancy of every apartment over a fixed window, in memory.
+
+    Each apartment is a row of a 2-D NumPy array with one cell per night of the window:
+    a reservation occupies the nights from the day of check-in to the day before
+    check-out. The cells count the reservations occupying the night, so removing a
+    reservation never frees a night still held by another one; a night is free when
+    its count is zero. Reservations are clipped to the window.
+
+    The calendar can be shared between threads: reads and writes take the same lock,
+    since adding an apartment may replace the array.
+    """
+
+    def __init__(self, start_date, end_date):
+        """
+        Initialize an empty calendar.
+
+        Args:
+            start_date (datetime): First day of the window
+            end_date (datetime): Day after the last night of the window
+        """
+        self.start_date = datetime.combine(start_date.date(), datetime.min.time())
+        self.num_days = (end_date.date() - self.start_date.date()).days
+        if self.num_days <= 0:
+            raise ValueError("end_date must be after start_date")
+
+        self._rows = {}
+        self._counts = np.zeros((0, self.num_days), dtype=np.uint16)
+        self._lock = threading.Lock()
+
+        # Month of each day (year * 12 + month - 1) and the first day of each month
+        days = np.arange(np.datetime64(self.start_date.date()), np.datetime64(self.start_date.date()) + self.num_days)
+        months = days.astype('datetime64[M]')
+        self._month_starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        self._months = [(1970 + month // 12, month % 12 + 1) for month in months[self._month_starts].astype(int).tolist()]
+
+    @classmethod
+    def from_database(cls, db_service, start_date, end_date):
+        """
+        Build the calendar of all the apartments from the reservations table.
+
+        Args:
+            db_service (DatabaseService): Database service
+            start_date (datetime): First day of the window
+            end_date (datetime): Day after the last night of the window
+
+        Returns:
+            OccupancyCalendar: The calendar
+        """
+        calendar = cls(start_date, end_date)
+        session = db_service.get_session()
+        try:
+            # Apartments without reservations in the window still get a row
+            rows = session.query(Apartment.id, Reservation.check_in_date, Reservation.check_out_date).outerjoin(
+                Reservation, and_(Reservation.apartment_id == Apartment.id,
+                                  Reservation.check_out_date > calendar.start_date,
+                                  Reservation.check_in_date < calendar.end_date)
+            ).all()
+        finally:
+            session.close()
+
+        apartment_ids = list(dict.fromkeys(apartment_id for apartment_id, _, _ in rows))
+        calendar._rows = {apartment_id: row for row, apartment_id in enumerate(apartment_ids)}
+        booked = [(calendar._rows[apartment_id],) + calendar._span(check_in_date, check_out_date)
+                  for apartment_id, check_in_date, check_out_date in rows if check_in_date is not None]
+
+        # Difference array: +1 on the first night, -1 after the last one, then a running sum
+        diff = np.zeros((len(apartment_ids), calendar.num_days + 1), dtype=np.int32)
+        if booked:
+            indexes, starts, stops = np.array(booked, dtype=np.intp).T
+            np.add.at(diff, (indexes, starts), 1)
+            np.add.at(diff, (indexes, stops), -1)
+        calendar._counts = np.cumsum(diff[:, :-1], axis=1).astype(np.uint16)
+        return calendar
+
+    @property
+    def end_date(self):
+        """datetime: Day after the last night of the window."""
+        return self.start_date + timedelta(days=self.num_days)
+
+    @property
+    def apartment_ids(self):
+        """list: IDs of the apartments in the calendar."""
+        with self._lock:
+            return list(self._rows)
+
+    def add(self, apartment_id, check_in_date, check_out_date):
+        """
+        Mark the nights of a reservation as occupied.
+
+        Args:
+            apartment_id (str): ID of the apartment
+            check_in_date (datetime): Date of check-in
+            check_out_date (datetime): Date of check-out
+        """
+        start, stop = self._span(check_in_date, check_out_date)
+        with self._lock:
+            row = self._row(apartment_id)
+            self._counts[row, start:stop] += 1
+
+    def remove(self, apartment_id, check_in_date, check_out_date):
+        """
+        Release the nights of a reservation added with add.
+
+        Args:
+            apartment_id (str): ID of the apartment
+            check_in_date (datetime): Date of check-in
+            check_out_date (datetime): Date of check-out
+        """
+        start, stop = self._span(check_in_date, check_out_date)
+        with self._lock:
+            row = self._rows.get(apartment_id)
+            if row is not None:
+                nights = self._counts[row, start:stop]
+                nights -= nights > 0
+
+    def remove_apartment(self, apartment_id):
+        """
+        Drop an apartment and all its nights, e.g. when it is deleted with its reservations.
+
+        Args:
+            apartment_id (str): ID of the apartment
+        """
+        with self._lock:
+            row = self._rows.pop(apartment_id, None)
+            if row is None:
+                return
+            # Move the last row into the freed one, so the rows stay 0 to len(self._rows) - 1
+            last = len(self._rows)
+            if row != last:
+                moved = next(key for key, value in self._rows.items() if value == last)
+                self._counts[row] = self._counts[last]
+                self._rows[moved] = row
+            self._counts[last] = 0
+
+    def is_free(self, apartment_id, start_date, end_date):
+        """
+        Check whether all the nights of a date range are free.
+
+        Args:
+            apartment_id (str): ID of the apartment
+            start_date (datetime): Start of the date range to check
+            end_date (datetime): End of the date range to check
+
+        Returns:
+            bool: True if no night of the range is occupied
+        """
+        start, stop = self._span(start_date, end_date, clip=False)
+        with self._lock:
+            row = self._rows.get(apartment_id)
+            return row is None or not self._counts[row, start:stop].any()
+
+    def occupied_days_per_month(self, apartment_id=None):
+        """
+        Count the occupied nights of each month of the window.
+
+        Args:
+            apartment_id (str, optional): ID of the apartment, all the apartments if omitted
+
+        Returns:
+            dict: (year, month) -> occupied nights, or apartment ID -> such a dict if apartment_id is omitted
+        """
+        if apartment_id is not None:
+            with self._lock:
+                row = self._rows.get(apartment_id)
+                occupied = (self._counts[row] > 0) if row is not None else np.zeros(self.num_days, dtype=bool)
+            totals = np.add.reduceat(occupied.astype(np.int32), self._month_starts)
+            return dict(zip(self._months, totals.tolist()))
+
+        with self._lock:
+            rows = dict(self._rows)
+            occupied = self._counts[:len(rows)] > 0
+        if not rows:
+            return {}
+        totals = np.add.reduceat(occupied.astype(np.int32), self._month_starts, axis=1).tolist()
+        return {apartment_id: dict(zip(self._months, totals[row])) for apartment_id, row in rows.items()}
+
+    def free_runs(self, apartment_id, min_nights=1, start_date=None, end_date=None):
+        """
+        Find the runs of consecutive free nights of an apartment.
+
+        Args:
+            apartment_id (str): ID of the apartment
+            min_nights (int, optional): Minimum length of a run
+            start_date (datetime, optional): Start of the date range, the start of the window if omitted
+            end_date (datetime, optional): End of the date range, the end of the window if omitted
+
+        Returns:
+            list: List of (start_date, end_date) tuples, one per run of at least min_nights nights
+        """
+        start, stop = self._span(start_date or self.start_date, end_date or self.end_date, clip=False)
+        with self._lock:
+            row = self._rows.get(apartment_id)
+            if row is None:
+                free = np.ones(stop - start, dtype=np.int8)
+            else:
+                free = (self._counts[row, start:stop] == 0).astype(np.int8)
+
+        # Edges of the runs of ones: alternating starts and stops
+        edges = np.flatnonzero(np.diff(np.r_[np.int8(0), free, np.int8(0)]))
+        starts, stops = edges[0::2], edges[1::2]
+        keep = stops - starts >= max(min_nights, 1)
+        return [(self.start_date + timedelta(days=int(start + a)), self.start_date + timedelta(days=int(start + b)))
+                for a, b in zip(starts[keep], stops[keep])]
+
+    def _span(self, check_in_date, check_out_date, clip=True):
+        # Nights [start, stop) of a stay as column indexes of the window
+        start = (check_in_date.date() - self.start_date.date()).days
+        stop = (check_out_date.date() - self.start_date.date()).days
+        if clip:
+            start = min(max(start, 0), self.num_days)
+            return start, min(max(stop, start), self.num_days)
+        if start < 0 or stop > self.num_days or stop < start:
+            raise ValueError("The date range is outside the calendar window")
+        return start, stop
+
+    def _row(self, apartment_id):
+        # Row of an apartment, added on first use; the array grows by doubling. Called with the lock held
+        row = self._rows.get(apartment_id)
+        if row is None:
+            row = len(self._rows)
+            if row == self._counts.shape[0]:
+                grown = np.zeros((max(2 * row, 8), self.num_days), dtype=self._counts.dtype)
+                grown[:row] = self._counts
+                self._counts = grown
+            self._rows[apartment_id] = row
+        return row
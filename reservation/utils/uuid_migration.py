@@ -0,0 +1,95 @@
+"""
+Migration of a database with String(36) text UUID keys to the 16-byte UUIDType keys.
+
+The rows are copied, batch by batch, from the source database into a new database
+created with the current schema, converting every key and foreign key. The source is
+only read, so it stays available as a backup until the new database is put in place.
+
+Usage: python -m reservation.utils.uuid_migration SOURCE_URL TARGET_URL [--batch-size N]
+"""
+from sqlalchemy import MetaData, String, create_engine, func, insert, inspect, select
+from core.services.database_service import Base, DatabaseService, UUIDType
+from reservation.models import MonthlyOccupancy
+from reservation.services.reporting_service import ReportingService
+import argparse
+
+
+def legacy_metadata():
+    """
+    The current schema with the UUIDType columns declared as String(36), as created by the
+    models before the binary keys.
+
+    Returns:
+        MetaData: Copy of Base.metadata
+    """
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table = table.to_metadata(metadata)
+        for column in table.columns:
+            if isinstance(column.type, UUIDType):
+                column.type = String(36)
+    return metadata
+
+
+def migrate(source_url, target_url, batch_size=10000):
+    """
+    Copy a database with text UUID keys into a new database with binary UUID keys.
+
+    The monthly occupancy summary is rebuilt if the source database does not have it.
+
+    Args:
+        source_url (str): SQLAlchemy connection string of the database to migrate
+        target_url (str): SQLAlchemy connection string of the new database, whose tables must be empty
+        batch_size (int, optional): Rows read and inserted at a time
+
+    Returns:
+        dict: Number of copied rows by table name
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+
+    source = create_engine(source_url)
+    target = DatabaseService(target_url)
+    try:
+        source_tables = set(inspect(source).get_table_names())
+        legacy = legacy_metadata()
+        counts = {}
+        with source.connect() as source_connection, target.engine.begin() as target_connection:
+            for table in Base.metadata.sorted_tables:
+                if target_connection.execute(select(func.count()).select_from(table)).scalar():
+                    raise ValueError(f"Table {table.name} of the target database is not empty")
+
+            for table in Base.metadata.sorted_tables:
+                counts[table.name] = 0
+                if table.name not in source_tables:
+                    continue
+
+                # Read through the String(36) columns, write through the UUIDType ones
+                result = source_connection.execution_options(yield_per=batch_size).execute(
+                    select(legacy.tables[table.name]))
+                for rows in result.mappings().partitions():
+                    target_connection.execute(insert(table), [dict(row) for row in rows])
+                    counts[table.name] += len(rows)
+
+        # Databases older than the summary table get it computed from the copied reservations
+        if MonthlyOccupancy.__tablename__ not in source_tables:
+            ReportingService(target).rebuild()
+        return counts
+    finally:
+        source.dispose()
+        target.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="SQLAlchemy connection string of the database to migrate")
+    parser.add_argument("target", help="SQLAlchemy connection string of the new database")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    for table, count in migrate(args.source, args.target, args.batch_size).items():
+        print(f"{table}: {count} rows")
+
+
+if __name__ == '__main__':
+    main()